@@ -0,0 +1,322 @@
+"""In-process stand-ins for the discord.py objects the cogs touch.
+
+They implement only the attributes and coroutines the cogs actually use, record what
+was sent, and never touch the network.
+"""
+import itertools
+from datetime import datetime, timedelta, timezone
+import discord
+
+_ids = itertools.count(10**17)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+class FakePermissions:
+    def __init__(self, admin: bool = False):
+        self.administrator = admin
+        self.manage_guild = admin
+        self.manage_messages = admin
+        self.manage_roles = admin
+        self.ban_members = admin
+        self.kick_members = admin
+
+
+class FakeRole:
+    def __init__(self, name: str, position: int = 0, guild=None):
+        self.id = next_id()
+        self.name = name
+        self.position = position
+        self.guild = guild
+        self.mention = f"<@&{self.id}>"
+
+    def __ge__(self, other):
+        return self.position >= other.position
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+    @property
+    def members(self):
+        return [m for m in self.guild.members if self in m.roles] if self.guild else []
+
+
+class FakeUser:
+    def __init__(self, name: str = "user", bot: bool = False, user_id: int | None = None):
+        self.id = user_id or next_id()
+        self.name = name
+        self.bot = bot
+        self.mention = f"<@{self.id}>"
+        self.avatar = None
+        self.color = discord.Color.default()
+        self.created_at = datetime.now(timezone.utc) - timedelta(days=365)
+        self.dms = []
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        self.dms.append((content, kwargs))
+
+
+class FakeMember(FakeUser):
+    def __init__(self, guild, name: str = "member", bot: bool = False, roles=None, admin: bool = False):
+        super().__init__(name, bot)
+        self.guild = guild
+        self.roles = [guild.default_role] + list(roles or [])
+        self.top_role = max(self.roles, key=lambda r: r.position)
+        self.guild_permissions = FakePermissions(admin)
+        self.joined_at = datetime.now(timezone.utc) - timedelta(days=30)
+
+    async def add_roles(self, *roles, **kwargs):
+        self.roles.extend(roles)
+
+    async def remove_roles(self, *roles, **kwargs):
+        self.roles = [r for r in self.roles if r not in roles]
+
+
+class FakeMessage:
+    def __init__(self, channel, author, content: str = "", embed=None, view=None):
+        self.id = next_id()
+        self.channel = channel
+        self.guild = getattr(channel, "guild", None)
+        self.author = author
+        self.content = content
+        self.embed = embed
+        self.view = view
+        self.attachments = []
+        self.reactions = []
+        self.created_at = datetime.now(timezone.utc)
+
+    async def edit(self, **kwargs):
+        self.content = kwargs.get("content", self.content)
+        self.embed = kwargs.get("embed", self.embed)
+        self.view = kwargs.get("view", self.view)
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+
+class FakeTextChannel:
+    def __init__(self, guild, name: str = "general", category=None):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.category = category
+        self.mention = f"<#{self.id}>"
+        self.messages = []
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        msg = FakeMessage(self, self.guild.me, content or "", kwargs.get("embed"), kwargs.get("view"))
+        self.sent.append(msg)
+        return msg
+
+    def get_partial_message(self, message_id: int):
+        msg = FakeMessage(self, self.guild.me)
+        msg.id = message_id
+        return msg
+
+    async def history(self, limit=None, oldest_first=False):
+        messages = self.messages if oldest_first else list(reversed(self.messages))
+        for msg in messages[:limit]:
+            yield msg
+
+    async def delete(self):
+        self.guild.channels.remove(self)
+        if self.category:
+            self.category.channels.remove(self)
+
+    async def set_permissions(self, *args, **kwargs):
+        pass
+
+    def typing(self):
+        return _NullAsyncContext()
+
+
+class FakeCategory:
+    def __init__(self, guild, name: str):
+        self.id = next_id()
+        self.guild = guild
+        self.name = name
+        self.channels = []
+
+    async def delete(self):
+        self.guild.categories.remove(self)
+
+
+class FakeGuild:
+    def __init__(self, name: str = "Bench Guild", staff_role: str = "Staff"):
+        self.id = next_id()
+        self.name = name
+        self.icon = None
+        self.owner = None
+        self.premium_subscription_count = 0
+        self.created_at = datetime.now(timezone.utc) - timedelta(days=1000)
+        self.default_role = FakeRole("@everyone", 0, self)
+        self.staff_role = FakeRole(staff_role, 5, self)
+        self.roles = [self.default_role, self.staff_role]
+        self.categories = []
+        self.channels = []
+        self.voice_channels = []
+        self._members = {}
+        self.me = self.add_member("bench-bot", bot=True, admin=True)
+
+    @property
+    def members(self):
+        return list(self._members.values())
+
+    @property
+    def member_count(self):
+        return len(self._members)
+
+    @property
+    def text_channels(self):
+        return [c for c in self.channels if isinstance(c, FakeTextChannel)]
+
+    def add_member(self, name: str = "member", bot: bool = False, staff: bool = False, admin: bool = False):
+        member = FakeMember(self, name, bot, [self.staff_role] if staff else [], admin)
+        self._members[member.id] = member
+        return member
+
+    def get_member(self, user_id: int):
+        return self._members.get(user_id)
+
+    def get_channel(self, channel_id: int):
+        return next((c for c in self.channels if c.id == channel_id), None)
+
+    async def fetch_member(self, user_id: int):
+        return self._members[user_id]
+
+    async def create_category(self, name: str, **kwargs):
+        category = FakeCategory(self, name)
+        self.categories.append(category)
+        return category
+
+    async def create_text_channel(self, name: str, category=None, **kwargs):
+        channel = FakeTextChannel(self, name, category)
+        self.channels.append(channel)
+        if category:
+            category.channels.append(channel)
+        return channel
+
+    async def create_role(self, name: str, **kwargs):
+        role = FakeRole(name, 1, self)
+        self.roles.append(role)
+        return role
+
+    async def ban(self, member, **kwargs):
+        self._members.pop(member.id, None)
+
+    async def kick(self, member, **kwargs):
+        self._members.pop(member.id, None)
+
+
+class _NullAsyncContext:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeBot:
+    """Just enough of commands.Bot for cogs driven directly through their callbacks."""
+
+    def __init__(self):
+        self.user = FakeUser("bench-bot", bot=True)
+        self.latency = 0.05
+        self.command_prefix = "!"
+        self.guilds = []
+        self.views = []
+        self._cogs = {}
+
+    async def add_cog(self, cog, **kwargs):
+        self._cogs[cog.qualified_name] = cog
+
+    def get_cog(self, name: str):
+        return self._cogs.get(name)
+
+    @property
+    def cogs(self):
+        return dict(self._cogs)
+
+    def get_user(self, user_id: int):
+        return None
+
+    def get_guild(self, guild_id: int):
+        return next((g for g in self.guilds if g.id == guild_id), None)
+
+    def is_ready(self) -> bool:
+        return True
+
+    def add_view(self, view, **kwargs):
+        self.views.append(view)
+
+
+class FakeContext:
+    def __init__(self, bot, guild, author, channel=None):
+        self.bot = bot
+        self.guild = guild
+        self.author = author
+        self.channel = channel or (guild.text_channels[0] if guild.text_channels else None)
+        self.message = FakeMessage(self.channel, author)
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+        return FakeMessage(self.channel, self.bot.user, content or "", kwargs.get("embed"))
+
+    def typing(self):
+        return _NullAsyncContext()
+
+
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+        self.sent = []
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        if self._done:
+            raise discord.InteractionResponded(None)
+        self._done = True
+        self.sent.append((content, kwargs))
+
+    async def defer(self, **kwargs):
+        if self._done:
+            raise discord.InteractionResponded(None)
+        self._done = True
+
+    async def edit_message(self, **kwargs):
+        if self._done:
+            raise discord.InteractionResponded(None)
+        self._done = True
+        self.sent.append((None, kwargs))
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+
+class FakeInteraction:
+    def __init__(self, bot, guild, user, channel=None, message=None):
+        self.id = next_id()
+        self.client = bot
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.message = message or FakeMessage(channel, bot.user)
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+        self.created_at = datetime.now(timezone.utc)
@@ -0,0 +1,243 @@
+"""Replay a recorded gateway trace against the cogs, offline.
+
+Traces come from the ``!trace start`` / ``!trace stop`` commands (cogs/tracing.py). Every
+event is fed to the same callbacks and listeners the live bot would run, using the
+stand-ins in ``benchmarks.fakes`` and a temporary data directory.
+
+    python -m benchmarks.replay data/traces/trace-20250101-120000.jsonl.gz --speed 10
+    python -m benchmarks.replay trace.jsonl.gz --speed max --save season-launch
+
+At a finite speed, events start at their recorded offsets divided by the speed and run
+concurrently, like real traffic. At ``max`` they run back to back, which gives the
+throughput ceiling of one process. Permission and role checks are not evaluated.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import shutil
+import sys
+import time
+import traceback
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeInteraction, FakeMessage, FakeRole, FakeTextChannel  # noqa: E402
+from benchmarks.run import BASELINES_DIR, isolate_storage, peak_rss_mb, percentiles, written_bytes  # noqa: E402
+from cogs import tracing  # noqa: E402
+
+COGS = ("cogs.tickets", "cogs.moderation", "cogs.economy", "cogs.profiles", "cogs.leveling", "cogs.fun",
+        "cogs.giveaways", "cogs.trivia", "cogs.polls", "cogs.utilities")
+
+
+class World:
+    """Fake guilds, members and channels created on demand from trace aliases."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.guilds = {}    # alias -> FakeGuild
+        self.members = {}   # (guild alias, alias) -> FakeMember
+        self.channels = {}  # (guild alias, alias) -> FakeTextChannel
+        self.roles = {}     # (guild alias, alias) -> FakeRole
+
+    def guild(self, alias):
+        guild = self.guilds.get(alias)
+        if guild is None:
+            guild = self.guilds[alias] = FakeGuild(f"guild-{alias}")
+            self.bot.guilds.append(guild)
+        return guild
+
+    def member(self, g, alias, bot: bool = False):
+        member = self.members.get((g, alias))
+        if member is None:
+            member = self.members[(g, alias)] = self.guild(g).add_member(f"user{alias}", bot=bot)
+        return member
+
+    def channel(self, g, alias):
+        if alias is None:
+            guild = self.guild(g)
+            return guild.text_channels[0] if guild.text_channels else self.channel(g, 0)
+        channel = self.channels.get((g, alias))
+        if channel is None:
+            guild = self.guild(g)
+            channel = self.channels[(g, alias)] = FakeTextChannel(guild, f"channel-{alias}")
+            guild.channels.append(channel)
+        return channel
+
+    def value(self, g, encoded):
+        """Inverse of ``tracing.Anonymizer.value``: placeholders with the same shape."""
+        if isinstance(encoded, list):
+            return [self.value(g, v) for v in encoded]
+        if not isinstance(encoded, dict):
+            return encoded
+        if "u" in encoded:
+            return self.member(g, encoded["u"])
+        if "c" in encoded:
+            return self.channel(g, encoded["c"])
+        if "r" in encoded:
+            role = self.roles.get((g, encoded["r"]))
+            if role is None:
+                role = self.roles[(g, encoded["r"])] = FakeRole(f"role-{encoded['r']}", 1, self.guild(g))
+                self.guild(g).roles.append(role)
+            return role
+        if "h" in encoded:
+            # Hashed free text: equal inputs share a digest, so repeat it out to the original length
+            size = encoded.get("s", 0)
+            return (encoded["h"] * (size // len(encoded["h"]) + 1))[:size]
+        return "x" * encoded.get("s", 0)
+
+
+class Replayer:
+    def __init__(self, bot):
+        self.bot = bot
+        self.world = World(bot)
+        self.commands = {}      # qualified name -> (cog, command)
+        self.app_commands = {}  # qualified name -> (cog, command)
+        self.listeners = {}     # event name -> [bound listener]
+        self.latencies = {}     # key -> [seconds]
+        self.errors = {}        # key -> count
+        self.first_error = {}   # key -> formatted traceback
+        self.skipped = {}       # key -> count
+
+    async def load(self):
+        for name in COGS:
+            await importlib.import_module(name).setup(self.bot)
+        for cog in self.bot.cogs.values():
+            for command in cog.walk_commands():
+                self.commands[command.qualified_name] = (cog, command)
+            for command in cog.walk_app_commands():
+                self.app_commands[command.qualified_name] = (cog, command)
+            for event, listener in cog.get_listeners():
+                self.listeners.setdefault(event, []).append(listener)
+
+    async def dispatch(self, event: str, *args):
+        for listener in self.listeners.get(event, ()):
+            await listener(*args)
+
+    def component(self, custom_id: str):
+        for view in self.bot.views:
+            for item in view.children:
+                if getattr(item, "custom_id", None) == custom_id:
+                    return item
+        return None
+
+    async def run(self, event: list):
+        _, kind, g, c, u, payload = event
+        world = self.world
+        if kind == tracing.MESSAGE:
+            channel = world.channel(g, c)
+            key, call = "message", lambda: self.dispatch("message", FakeMessage(channel, world.member(g, u), "x" * payload))
+        elif kind == tracing.COMMAND:
+            name, args, kwargs = payload
+            key = f"!{name}"
+            if name not in self.commands:
+                return self._skip(key)
+            cog, command = self.commands[name]
+            ctx = FakeContext(self.bot, world.guild(g), world.member(g, u), world.channel(g, c))
+            args = [world.value(g, a) for a in args]
+            kwargs = {k: world.value(g, v) for k, v in kwargs.items()}
+            call = lambda: command.callback(cog, ctx, *args, **kwargs)  # noqa: E731
+        elif kind == tracing.APP_COMMAND:
+            name, options = payload
+            key = f"/{name}"
+            if name not in self.app_commands:
+                return self._skip(key)
+            cog, command = self.app_commands[name]
+            interaction = FakeInteraction(self.bot, world.guild(g), world.member(g, u), world.channel(g, c))
+            options = {k: world.value(g, v) for k, v in options.items()}
+            call = lambda: command.callback(cog, interaction, **options)  # noqa: E731
+        elif kind == tracing.COMPONENT:
+            key = f"button:{payload}"
+            item = self.component(payload)
+            if item is None:
+                return self._skip(key)
+            channel = world.channel(g, c)
+            interaction = FakeInteraction(self.bot, world.guild(g), world.member(g, u), channel,
+                                          FakeMessage(channel, self.bot.user))
+            call = lambda: item.callback(interaction)  # noqa: E731
+        elif kind == tracing.MEMBER_JOIN:
+            key, call = "member_join", lambda: self.dispatch("member_join", world.member(g, u, bot=payload))
+        elif kind == tracing.MEMBER_REMOVE:
+            member = world.members.pop((g, u), None) or world.member(g, u, bot=payload)
+            world.guild(g)._members.pop(member.id, None)
+            key, call = "member_remove", lambda: self.dispatch("member_remove", member)
+        else:
+            return self._skip(f"unknown:{kind}")
+
+        start = time.perf_counter()
+        try:
+            await call()
+        except Exception:
+            self.errors[key] = self.errors.get(key, 0) + 1
+            self.first_error.setdefault(key, traceback.format_exc(limit=-3))
+        self.latencies.setdefault(key, []).append(time.perf_counter() - start)
+
+    def _skip(self, key: str):
+        self.skipped[key] = self.skipped.get(key, 0) + 1
+
+    async def replay(self, events: list, speed: float | None):
+        if speed is None:
+            for event in events:
+                await self.run(event)
+            return
+        start = time.perf_counter()
+        tasks = []
+        for event in events:
+            delay = event[0] / 1000 / speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.run(event)))
+        await asyncio.gather(*tasks)
+
+
+def report(replayer: Replayer, events: int, elapsed: float, bytes_written: int) -> dict:
+    results = {}
+    for key, latencies in replayer.latencies.items():
+        results[key] = {"n": len(latencies), "errors": replayer.errors.get(key, 0), **percentiles(latencies)}
+    print(f"\n{events} events in {elapsed:.2f}s — {events / elapsed if elapsed else 0:.1f} events/s, "
+          f"{bytes_written / 1024:.0f} KiB written, peak RSS {peak_rss_mb():.0f}MB")
+    for key, r in sorted(results.items(), key=lambda kv: kv[1]["n"], reverse=True):
+        errors = f"  ⚠️ {r['errors']} errors" if r["errors"] else ""
+        print(f"  {key:<32} ×{r['n']:<7} p50 {r['p50_ms']:>9.3f}ms  p99 {r['p99_ms']:>9.3f}ms{errors}")
+    for key, count in sorted(replayer.skipped.items()):
+        print(f"  {key:<32} ×{count:<7} skipped (no matching handler)")
+    for key, tb in replayer.first_error.items():
+        print(f"\nFirst error in {key}:\n{tb}")
+    return results
+
+
+async def main(args):
+    _, events = tracing.read_trace(Path(args.trace))
+    speed = None if args.speed == "max" else float(args.speed)
+    workdir = isolate_storage()
+    bot = FakeBot()
+    replayer = Replayer(bot)
+    print(f"{args.trace}: {len(events)} events over {events[-1][0] / 1000 if events else 0:.0f}s, speed {args.speed}")
+    try:
+        await replayer.load()
+        bytes_before = written_bytes()
+        start = time.perf_counter()
+        await replayer.replay(events, speed)
+        elapsed = time.perf_counter() - start
+        results = report(replayer, len(events), elapsed, int(written_bytes() - bytes_before))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        path = BASELINES_DIR / f"replay-{args.save}.json"
+        path.write_text(json.dumps({
+            "trace": str(args.trace), "speed": args.speed, "events": len(events),
+            "events_per_sec": round(len(events) / elapsed, 2) if elapsed else None, "results": results
+        }, indent=2), encoding="utf-8")
+        print(f"Saved {path.name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded gateway trace offline")
+    parser.add_argument("trace", help="trace file written by !trace")
+    parser.add_argument("--speed", default="1", help="time multiplier (1, 10, ...) or 'max'")
+    parser.add_argument("--save", metavar="NAME", help="save results as benchmarks/baselines/replay-NAME.json")
+    asyncio.run(main(parser.parse_args()))
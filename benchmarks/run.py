@@ -0,0 +1,253 @@
+"""Offline benchmarks for the cogs.
+
+Drives Economy, Profiles, Moderation, Tickets and generate_transcript through their
+command/view callbacks against the stand-ins in ``benchmarks.fakes``, with all data
+written to a temporary directory.
+
+    python -m benchmarks.run --users 100000 --ops 500 --messages 10000
+    python -m benchmarks.run --save main
+    python -m benchmarks.run --compare main
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeInteraction, FakeMessage, FakeTextChannel  # noqa: E402
+import cogs.storage as storage  # noqa: E402
+from cogs.metrics import REGISTRY  # noqa: E402
+from cogs.records import Account, Profile  # noqa: E402
+from cogs import economy, leveling, moderation, profiles, tickets  # noqa: E402
+
+BASELINES_DIR = Path(__file__).parent / "baselines"
+SCENARIOS = ("economy", "profiles", "leveling", "moderation", "tickets", "transcript")
+
+
+def written_bytes() -> float:
+    return sum(v for (name, labels), v in REGISTRY.counters.items()
+               if name == "bot_storage_bytes_total" and dict(labels).get("op") == "write")
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def isolate_storage() -> Path:
+    """Point every store at a fresh temporary directory; returns it for cleanup."""
+    workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+    storage.GUILDS_DIR = workdir / "guilds"
+    tickets.BASE = workdir  # transcripts
+    for store in storage.STORES.values():
+        store.legacy_path = None  # never adopt the real global data files
+    return workdir
+
+
+def percentiles(latencies: list) -> dict:
+    latencies = sorted(latencies)
+    n = len(latencies)
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[min(n - 1, int(n * 0.99))] * 1000, 3),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.results = {}
+
+    async def measure(self, scenario: str, op: str, n: int, make_call):
+        """Await ``make_call(i)`` n times and record throughput and latency percentiles."""
+        latencies = []
+        bytes_before = written_bytes()
+        start = time.perf_counter()
+        for i in range(n):
+            t0 = time.perf_counter()
+            await make_call(i)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        result = {
+            "n": n,
+            "ops_per_sec": round(n / elapsed, 2) if elapsed else float("inf"),
+            **percentiles(latencies),
+            "bytes_written": int(written_bytes() - bytes_before),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        self.results.setdefault(scenario, {})[op] = result
+        print(f"  {scenario:<11} {op:<18} {result['ops_per_sec']:>10.1f} ops/s  "
+              f"p50 {result['p50_ms']:>9.3f}ms  p99 {result['p99_ms']:>9.3f}ms  "
+              f"{result['bytes_written'] / 1024:>10.0f} KiB  rss {result['peak_rss_mb']:.0f}MB")
+
+
+def make_guild(bot, members: int):
+    guild = FakeGuild()
+    bot.guilds.append(guild)
+    for i in range(members):
+        guild.add_member(f"player{i}")
+    guild.channels.append(FakeTextChannel(guild, "general"))
+    return guild
+
+
+async def bench_economy(rec: Recorder, bot, args):
+    guild = make_guild(bot, min(args.users, 1000))
+    cog = economy.Economy(bot)
+    data = economy.ECONOMY.partition(guild.id)
+    for uid in range(args.users):
+        account = data[str(uid)] = Account()
+        account.balance = random.randint(0, 10**6)
+    members = guild.members[1:]
+    ctx = lambda author: FakeContext(bot, guild, author)  # noqa: E731
+
+    await rec.measure("economy", "balance", args.ops, lambda i: cog.balance.callback(cog, ctx(members[i % len(members)]), None))
+    await rec.measure("economy", "daily", min(args.ops, len(members)), lambda i: cog.daily.callback(cog, ctx(members[i])))
+    await rec.measure("economy", "pay", args.ops, lambda i: cog.pay.callback(
+        cog, ctx(members[i % len(members)]), members[(i + 1) % len(members)], 1))
+    await rec.measure("economy", "leaderboard", max(1, args.ops // 10), lambda i: cog.leaderboard.callback(cog, ctx(members[0])))
+
+
+async def bench_profiles(rec: Recorder, bot, args):
+    guild = make_guild(bot, min(args.users, 1000))
+    cog = profiles.Profiles(bot)
+    data = profiles.PROFILES.partition(guild.id)
+    for uid in range(args.users):
+        profile = data[str(uid)] = Profile()
+        profile.kills, profile.deaths = random.randint(0, 5000), random.randint(0, 5000)
+        profile.playtime_hours = random.randint(0, 2000)
+    members = guild.members[1:]
+    ctx = lambda author: FakeContext(bot, guild, author)  # noqa: E731
+
+    await rec.measure("profiles", "profile", args.ops, lambda i: cog.profile.callback(cog, ctx(members[i % len(members)]), None))
+    await rec.measure("profiles", "stats", args.ops, lambda i: cog.stats.callback(cog, ctx(members[i % len(members)]), None))
+    await rec.measure("profiles", "update_stat", args.ops, lambda i: cog.update_stat(guild.id, i % args.users, "kills", 1))
+    await rec.measure("profiles", "leaderboard_kills", max(1, args.ops // 10), lambda i: cog.leaderboard_kills.callback(cog, ctx(members[0])))
+    if profiles.np is not None:
+        await rec.measure("profiles", "serverstats", max(1, args.ops // 10), lambda i: cog.serverstats.callback(cog, ctx(members[0])))
+
+
+async def bench_leveling(rec: Recorder, bot, args):
+    guild = make_guild(bot, min(args.users, 1000))
+    cog = leveling.Leveling(bot)
+    channel = guild.text_channels[0]
+    members = guild.members[1:]
+    n = args.ops * 10
+
+    await rec.measure("leveling", "on_message", n, lambda i: cog.on_message(FakeMessage(channel, members[i % len(members)], "gg")))
+    await rec.measure("leveling", "flush", 1, lambda i: cog.flush())
+
+
+async def bench_moderation(rec: Recorder, bot, args):
+    guild = make_guild(bot, min(args.users, 1000))
+    cog = moderation.Moderation(bot)
+    mod = guild.add_member("moderator", staff=True, admin=True)
+    mod.top_role = guild.staff_role
+    members = guild.members[1:-1]
+    ctx = FakeContext(bot, guild, mod)
+
+    await rec.measure("moderation", "warn", args.ops, lambda i: cog.warn.callback(cog, ctx, members[i % len(members)], reason="bench"))
+    await rec.measure("moderation", "cases", args.ops, lambda i: cog.cases.callback(cog, ctx, members[i % len(members)]))
+
+
+async def bench_tickets(rec: Recorder, bot, args):
+    guild = make_guild(bot, min(args.users, 1000))
+    cog = tickets.Tickets(bot)
+    staff = guild.add_member("staff", staff=True, admin=True)
+    openers = guild.members[1:-1]
+    n = min(args.ops, len(openers))
+    opened = []
+
+    async def open_one(i):
+        interaction = FakeInteraction(bot, guild, openers[i])
+        await tickets.open_ticket(interaction, "general")
+        opened.append(guild.text_channels[-1])
+
+    async def claim_one(i):
+        channel = opened[i]
+        view = tickets.TicketCloseView()
+        await view.claim_ticket.callback(FakeInteraction(bot, guild, staff, channel, FakeMessage(channel, bot.user)))
+
+    async def close_one(i):
+        await cog.closeticket.callback(cog, FakeContext(bot, guild, staff, opened[i]))
+
+    await rec.measure("tickets", "open", n, open_one)
+    await rec.measure("tickets", "claim", n, claim_one)
+    await rec.measure("tickets", "close", n, close_one)
+
+
+async def bench_transcript(rec: Recorder, bot, args):
+    guild = make_guild(bot, 10)
+    channel = await guild.create_text_channel("ticket-bench")
+    authors = guild.members
+    for i in range(args.messages):
+        channel.messages.append(FakeMessage(channel, authors[i % len(authors)], f"message {i} " + "lorem ipsum " * 8))
+    await rec.measure("transcript", f"html_{args.messages}", 3, lambda i: tickets.generate_transcript(channel, format="html"))
+    await rec.measure("transcript", f"txt_{args.messages}", 3, lambda i: tickets.generate_transcript(channel, format="txt"))
+
+
+BENCHES = {
+    "economy": bench_economy,
+    "profiles": bench_profiles,
+    "leveling": bench_leveling,
+    "moderation": bench_moderation,
+    "tickets": bench_tickets,
+    "transcript": bench_transcript,
+}
+
+
+def compare(results: dict, baseline: dict):
+    print("\nChange vs baseline (ops/s, p99):")
+    for scenario, ops in results.items():
+        for op, result in ops.items():
+            base = baseline.get("results", {}).get(scenario, {}).get(op)
+            if not base:
+                continue
+            throughput = (result["ops_per_sec"] / base["ops_per_sec"] - 1) * 100 if base["ops_per_sec"] else 0
+            p99 = (result["p99_ms"] / base["p99_ms"] - 1) * 100 if base["p99_ms"] else 0
+            flag = "  ⚠️" if throughput < -20 or p99 > 25 else ""
+            print(f"  {scenario:<11} {op:<18} {throughput:+7.1f}% ops/s  {p99:+7.1f}% p99{flag}")
+
+
+async def main(args):
+    workdir = isolate_storage()
+    bot = FakeBot()
+    rec = Recorder()
+    selected = args.only.split(",") if args.only else SCENARIOS
+    print(f"users={args.users} ops={args.ops} messages={args.messages} workdir={workdir}")
+    try:
+        for name in selected:
+            await BENCHES[name](rec, bot, args)
+        await asyncio.sleep(0)  # let fire-and-forget DM sends finish
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {"generated_at": datetime.utcnow().isoformat(), "params": vars(args), "results": rec.results}
+    if args.compare:
+        path = BASELINES_DIR / f"{args.compare}.json"
+        if path.exists():
+            compare(rec.results, json.loads(path.read_text(encoding="utf-8")))
+        else:
+            print(f"No baseline named {args.compare!r} in {BASELINES_DIR}")
+    if args.save:
+        BASELINES_DIR.mkdir(exist_ok=True)
+        (BASELINES_DIR / f"{args.save}.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Saved baseline {args.save!r}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline cog benchmarks")
+    parser.add_argument("--users", type=int, default=1000, help="accounts/profiles seeded per guild")
+    parser.add_argument("--ops", type=int, default=200, help="operations per benchmark")
+    parser.add_argument("--messages", type=int, default=10000, help="messages in the transcript channel")
+    parser.add_argument("--only", help=f"comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--save", metavar="NAME", help="save results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against a saved baseline")
+    asyncio.run(main(parser.parse_args()))
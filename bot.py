@@ -1,5 +1,9 @@
 import os
+import sys
 import json
+import time
+import asyncio
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
@@ -32,45 +36,225 @@ intents.message_content = True
 intents.guilds = True
 intents.members = True
 
-bot = commands.Bot(command_prefix=config.get("prefix", "!"), intents=intents)
+# Sharding: "single" (one connection), "auto" (AutoShardedBot in this process) or
+# "multiprocess" (shard ranges in worker processes sharing a local state service)
+SHARDING = config.get("sharding", {})
+SHARD_MODE = SHARDING.get("mode", "single")
+# Set by run_cluster() for each worker process
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i]
+WORKER_INDEX = os.getenv("WORKER_INDEX")
 
-
-@bot.event
-async def setup_hook():
-    # Load all cogs
-    cogs = [
+# Extensions load in stages: everything in a stage loads concurrently, and a stage only
+# starts once the previous one is done. cogs.metrics and cogs.outbox go first because the
+# other cogs import them and discord.py re-executes an extension module when it loads it;
+# the last stage holds cogs that import another extension (cogs.leveling -> cogs.profiles,
+# cogs.giveaways -> cogs.economy and cogs.profiles).
+EXTENSION_STAGES = [
+    ["cogs.metrics", "cogs.outbox"],
+    [
+        "cogs.watchdog",
+        "cogs.tracing",
         "cogs.tickets",
         "cogs.moderation",
         "cogs.economy",
         "cogs.profiles",
         "cogs.fun",
+        "cogs.trivia",
+        "cogs.polls",
         "cogs.utilities"
-    ]
-    
-    for cog in cogs:
-        try:
-            await bot.load_extension(cog)
-            logger.info(f"Loaded cog: {cog}")
-        except Exception:
-            logger.exception(f"Failed to load cog {cog}")
+    ],
+    ["cogs.leveling", "cogs.giveaways"]
+]
+STARTUP_PROFILE_FILE = Path(__file__).parent / "data" / (
+    f"startup_profile_{WORKER_INDEX}.json" if WORKER_INDEX else "startup_profile.json"
+)
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfile:
+    """Per-extension import/setup timings plus startup milestones, written as JSON."""
+
+    def __init__(self):
+        self.extensions = {}  # name -> {"start", "setup_start", "end", "ok"}
+        self.milestones = {}  # name -> seconds since process start
+
+    def since_start(self) -> float:
+        return round(time.perf_counter() - PROCESS_START, 4)
+
+    def mark(self, milestone: str):
+        self.milestones[milestone] = self.since_start()
+
+    def report(self) -> dict:
+        extensions = {}
+        for name, t in self.extensions.items():
+            end = t.get("end", t["start"])
+            setup_start = t.get("setup_start", end)
+            extensions[name] = {
+                "ok": t.get("ok", False),
+                "import_seconds": round(setup_start - t["start"], 4),
+                "setup_seconds": round(end - setup_start, 4),
+                "total_seconds": round(end - t["start"], 4)
+            }
+        return {"generated_at": datetime.utcnow().isoformat(), "milestones": self.milestones, "extensions": extensions}
+
+    def save(self):
+        report = self.report()
+        previous = {}
+        if STARTUP_PROFILE_FILE.exists():
+            try:
+                previous = json.loads(STARTUP_PROFILE_FILE.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                previous = {}
+        STARTUP_PROFILE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        STARTUP_PROFILE_FILE.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+        for name, ext in sorted(report["extensions"].items(), key=lambda kv: -kv[1]["total_seconds"]):
+            logger.info("Startup: %-16s import %.3fs setup %.3fs", name, ext["import_seconds"], ext["setup_seconds"])
+        for milestone, seconds in report["milestones"].items():
+            before = previous.get("milestones", {}).get(milestone)
+            if before and seconds > before * 1.5 and seconds - before > 1:
+                logger.warning("Startup regression: %s took %.2fs (previous run %.2fs)", milestone, seconds, before)
+            else:
+                logger.info("Startup: %s at %.2fs", milestone, seconds)
+
+
+PROFILE = StartupProfile()
+
+
+class MinecraftBot(commands.AutoShardedBot if SHARD_MODE != "single" else commands.Bot):
+    async def add_cog(self, cog, **kwargs):
+        # First add_cog from an extension marks the end of its import phase
+        timings = PROFILE.extensions.get(type(cog).__module__)
+        if timings is not None and "setup_start" not in timings:
+            timings["setup_start"] = time.perf_counter()
+        await super().add_cog(cog, **kwargs)
+
+    def add_view(self, view, **kwargs):
+        super().add_view(view, **kwargs)
+        if "first_ready" not in PROFILE.milestones:
+            PROFILE.mark("persistent_views_registered")
+
+
+bot_options = {}
+if SHARD_IDS:
+    bot_options = {"shard_ids": SHARD_IDS, "shard_count": int(os.environ["SHARD_COUNT"])}
+elif SHARD_MODE == "auto" and SHARDING.get("shard_count"):
+    bot_options = {"shard_count": SHARDING["shard_count"]}
+
+bot = MinecraftBot(command_prefix=config.get("prefix", "!"), intents=intents, **bot_options)
 
-    # Sync slash commands
+
+async def load_extension_profiled(name: str):
+    timings = PROFILE.extensions[name] = {"start": time.perf_counter()}
     try:
-        await bot.tree.sync()
-        logger.info("Slash commands synced successfully")
+        await bot.load_extension(name)
+        timings["ok"] = True
+        logger.info(f"Loaded cog: {name}")
     except Exception:
-        logger.exception("Failed to sync slash commands")
+        logger.exception(f"Failed to load cog {name}")
+    finally:
+        timings["end"] = time.perf_counter()
+
+
+@bot.event
+async def setup_hook():
+    PROFILE.mark("setup_hook_start")
+    # Load all cogs, stage by stage
+    for stage in EXTENSION_STAGES:
+        await asyncio.gather(*(load_extension_profiled(name) for name in stage))
+    PROFILE.mark("extensions_loaded")
+
+    if os.getenv("STATE_SOCKET"):
+        from cogs.storage import CLIENT
+        bot.loop.create_task(CLIENT.listen())
 
+    # Sync slash commands only if the command tree changed since the last sync.
+    # In multi-process mode only the first worker syncs.
+    utilities = bot.get_cog("Utilities")
+    if WORKER_INDEX not in (None, "0"):
+        logger.info("Skipping slash command sync on worker %s", WORKER_INDEX)
+    elif utilities:
+        await utilities.sync_command_tree()
+    else:
+        try:
+            await bot.tree.sync()
+            logger.info("Slash commands synced successfully")
+        except Exception:
+            logger.exception("Failed to sync slash commands")
+
+    PROFILE.mark("setup_hook_complete")
     logger.info("Setup hook complete.")
 
 
+@bot.listen("on_command_error")
+async def on_stale_write(ctx, error):
+    """Ask the user to retry a command whose change lost a race with another shard."""
+    from cogs.storage import STALE_WRITE_MESSAGE, StaleWriteError
+    if isinstance(getattr(error, "original", None), StaleWriteError):
+        await ctx.send(STALE_WRITE_MESSAGE)
+
+
+@bot.tree.error
+async def on_app_command_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+    from cogs.storage import StaleWriteError, notify_stale_write
+    if isinstance(getattr(error, "original", None), StaleWriteError):
+        await notify_stale_write(interaction)
+    await discord.app_commands.CommandTree.on_error(bot.tree, interaction, error)
+
+
 @bot.event
 async def on_ready():
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    if "first_ready" not in PROFILE.milestones:
+        PROFILE.mark("first_ready")
+        PROFILE.save()
+
+
+async def run_cluster():
+    """Run the state service here and each shard range in its own worker process."""
+    from cogs.storage import StateService
+
+    shard_count = SHARDING.get("shard_count")
+    processes = SHARDING.get("processes", 2)
+    if not shard_count:
+        raise RuntimeError('sharding.shard_count must be set for "multiprocess" mode')
+    socket_path = str(Path(__file__).parent / SHARDING.get("socket", "data/state.sock"))
+    Path(socket_path).parent.mkdir(parents=True, exist_ok=True)
+
+    service = StateService(socket_path)
+    server = await service.serve()
+
+    ranges = [list(range(shard_count))[i::processes] for i in range(processes)]
+    ranges = [r for r in ranges if r]
+
+    async def worker(index: int, shard_ids: list):
+        env = dict(os.environ, SHARD_IDS=",".join(map(str, shard_ids)), SHARD_COUNT=str(shard_count),
+                   WORKER_INDEX=str(index), STATE_SOCKET=socket_path)
+        while True:
+            logger.info("Starting worker %s for shards %s", index, shard_ids)
+            proc = await asyncio.create_subprocess_exec(sys.executable, __file__, env=env)
+            try:
+                code = await proc.wait()
+            except asyncio.CancelledError:
+                proc.terminate()
+                await proc.wait()
+                raise
+            logger.warning("Worker %s exited with code %s; restarting in 5s", index, code)
+            await asyncio.sleep(5)
+
+    try:
+        await asyncio.gather(*(worker(i, r) for i, r in enumerate(ranges)))
+    finally:
+        server.close()
 
 
 if __name__ == "__main__":
     try:
-        bot.run(TOKEN)
+        if SHARD_MODE == "multiprocess" and not SHARD_IDS:
+            asyncio.run(run_cluster())
+        else:
+            bot.run(TOKEN)
+    except KeyboardInterrupt:
+        pass
     except Exception:
         logger.exception("Bot terminated with an exception")
@@ -0,0 +1,95 @@
+import time
+from cogs.storage import PartitionedStore
+
+PRUNE_EVERY = 100  # writes to a guild's cooldowns between sweeps of expired entries
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    if seconds < 86400:
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+    return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(text: str) -> int | None:
+    """Seconds from ``30s``/``10m``/``2h``/``7d``/``1w`` or a bare number of seconds; None if invalid."""
+    text = text.strip().lower()
+    if text.isdigit():
+        return int(text)
+    if len(text) > 1 and text[:-1].isdigit() and text[-1] in DURATION_UNITS:
+        return int(text[:-1]) * DURATION_UNITS[text[-1]]
+    return None
+
+
+class CooldownService:
+    """Persistent per-guild cooldowns keyed by (name, user).
+
+    Each guild's cooldowns live in ``data/guilds/<guild_id>/cooldowns.json`` as
+    ``{"daily": {"<user_id>": <expiry epoch>}, "weekly": {...}}``, loaded on first use
+    and held in memory. Expired entries are swept on every ``PRUNE_EVERY``-th write to a
+    guild rather than on each one, so a write doesn't walk every running cooldown; an
+    expired entry left in the file reads the same as no entry.
+    """
+
+    def __init__(self):
+        self.store = PartitionedStore("cooldowns")
+        self._writes = {}  # guild_id -> writes since the last sweep
+
+    def remaining(self, guild_id: int, name: str, user_id: int, now: int | None = None) -> int:
+        """Seconds until ``name`` is available to the user again (0 when ready)."""
+        now = now if now is not None else int(time.time())
+        expires = self.store.partition(guild_id).get(name, {}).get(str(user_id), 0)
+        return max(0, expires - now)
+
+    async def claim(self, guild_id: int, name: str, user_id: int, seconds: int) -> int:
+        """Start the cooldown if it isn't running. Returns 0 if claimed, else the seconds left."""
+        left = self.remaining(guild_id, name, user_id)
+        if left:
+            return left
+
+        def start(data: dict) -> int:
+            now = int(time.time())
+            expires = data.get(name, {}).get(str(user_id), 0)
+            if expires > now:  # claimed on another shard in the meantime
+                return expires - now
+            data.setdefault(name, {})[str(user_id)] = now + seconds
+            self._maybe_prune(guild_id, data)
+            return 0
+        return await self.store.update(guild_id, start)
+
+    async def set(self, guild_id: int, name: str, user_id: int, expires: int):
+        def put(data: dict):
+            data.setdefault(name, {})[str(user_id)] = int(expires)
+            self._maybe_prune(guild_id, data)
+        await self.store.update(guild_id, put)
+
+    async def reset(self, guild_id: int, name: str, user_id: int):
+        if str(user_id) in self.store.partition(guild_id).get(name, {}):
+            await self.store.update(guild_id, lambda data: data.get(name, {}).pop(str(user_id), None))
+
+    def _maybe_prune(self, guild_id: int, data: dict):
+        writes = self._writes.get(guild_id, 0) + 1
+        if writes >= PRUNE_EVERY:
+            self._prune(data)
+            writes = 0
+        self._writes[guild_id] = writes
+
+    @staticmethod
+    def _prune(data: dict):
+        now = int(time.time())
+        for name in list(data):
+            entries = data[name]
+            for uid in [uid for uid, expires in entries.items() if expires <= now]:
+                del entries[uid]
+            if not entries:
+                del data[name]
+
+
+COOLDOWNS = CooldownService()
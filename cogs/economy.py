@@ -1,8 +1,20 @@
 import discord
 from discord.ext import commands
+from discord.ui import Button, View
+from cogs.cooldowns import COOLDOWNS, format_duration
+from cogs.metrics import STAFF_ROLES
+from cogs.outbox import queue_dm
+from cogs.records import Account
+from cogs.storage import UPDATE_ATTEMPTS, PartitionedStore, StaleWriteError, partition_path, read_bytes
 from pathlib import Path
-from datetime import datetime
+import asyncio
+import bisect
+import csv
+import io
 import json
+import math
+import time
+from datetime import datetime, timezone
 
 BASE = Path(__file__).parent.parent
 ECONOMY_FILE = BASE / "data" / "economy.json"
@@ -10,52 +22,421 @@ SHOP_FILE = BASE / "data" / "shop.json"
 
 logger = __import__("logging").getLogger(__name__)
 
-def load_json(path: Path):
-    if not path.exists():
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+ECONOMY = PartitionedStore("economy", legacy_path=ECONOMY_FILE, record_type=Account)
+
+# Timed rewards: name -> (cooldown seconds, coins, label)
+REWARDS = {
+    "daily": (86400, 500, "daily"),
+    "weekly": (7 * 86400, 2500, "weekly"),
+}
+SHOP_PAGE_SIZE = 6
+MAX_QUANTITY = 10_000
+MAX_CART_ITEMS = 20
+SHOP_CHECK_INTERVAL = 5  # seconds between mtime checks of shop.json
+PAYOUT_CHUNK = 5000  # accounts credited between event-loop yields
+PAYOUT_PROGRESS_INTERVAL = 2.0  # seconds between progress message edits
+MAX_CSV_BYTES = 5 * 1024 * 1024
+STATS_DAYS_KEPT = 30
+TRANSACTIONS_PAGE_SIZE = 10
+BALANCE_BUCKETS = 64  # bucket i holds balances in [2**(i-1), 2**i); zero balances aren't counted
+
+
+class ShopCatalog:
+    """shop.json loaded once into lookup indexes, reloaded only when the file changes.
+
+    Accepts the shipped ``{"items": [{"id": ...}, ...]}`` layout as well as an
+    id-keyed object. Items without a ``category`` are filed under ``general``.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.items = {}          # id -> item
+        self.by_name = {}        # lowercased name -> id
+        self.by_category = {}    # category -> [ids], cheapest first
+        self.ids_by_price = []   # all ids, cheapest first
+        self.prices = []         # parallel to ids_by_price, for bisect
+        self._mtime = None
+        self._checked = 0.0
+
+    def refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked < SHOP_CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if force or mtime != self._mtime:
+            try:
+                self._index(json.loads(read_bytes(self.path) or b"{}") if mtime is not None else {})
+            except ValueError as e:
+                # Usually a half-saved edit: keep selling from the last good catalog and retry
+                # on the next check, since the mtime isn't recorded
+                logger.warning("Keeping the previous shop catalog, couldn't load %s: %s", self.path, e)
+                return
+            self._mtime = mtime
+
+    def _index(self, raw):
+        """Rebuild the indexes from parsed shop.json; raises ValueError (indexes untouched) on a bad layout."""
+        if not isinstance(raw, dict):
+            raise ValueError(f"expected a JSON object, got {type(raw).__name__}")
+        if "items" in raw:
+            if not isinstance(raw["items"], list):
+                raise ValueError('"items" must be a list')
+            entries = raw["items"]
+        else:
+            entries = [dict(item, id=item_id) if isinstance(item, dict) else item for item_id, item in raw.items()]
+        items = {}
+        for entry in entries:
+            if not isinstance(entry, dict) or not entry.get("id") or not isinstance(entry.get("price"), (int, float)):
+                logger.warning("Skipping shop item without id/price: %r", entry)
+                continue
+            item = dict(entry, id=str(entry["id"]).lower(), category=str(entry.get("category", "general")).lower())
+            item.setdefault("name", item["id"])
+            items[item["id"]] = item
+        ordered = sorted(items.values(), key=lambda i: (i["price"], i["id"]))
+        self.items = items
+        self.by_name = {item["name"].lower(): item["id"] for item in ordered}
+        self.by_category = {}
+        for item in ordered:
+            self.by_category.setdefault(item["category"], []).append(item["id"])
+        self.ids_by_price = [item["id"] for item in ordered]
+        self.prices = [item["price"] for item in ordered]
+        logger.info("Loaded %d shop items in %d categories", len(items), len(self.by_category))
+
+    def get(self, key: str) -> dict | None:
+        """Look an item up by id or (case-insensitive) name."""
+        self.refresh()
+        key = key.lower()
+        item = self.items.get(key)
+        if item is None and key in self.by_name:
+            item = self.items[self.by_name[key]]
+        return item
+
+    def categories(self) -> list:
+        self.refresh()
+        return sorted(self.by_category)
+
+    def search(self, category: str | None = None, max_price: int | None = None) -> list:
+        """Items matching the filters, cheapest first."""
+        self.refresh()
+        if category:
+            ids = self.by_category.get(category.lower(), [])
+            items = [self.items[i] for i in ids]
+            return [i for i in items if i["price"] <= max_price] if max_price is not None else items
+        end = bisect.bisect_right(self.prices, max_price) if max_price is not None else len(self.ids_by_price)
+        return [self.items[i] for i in self.ids_by_price[:end]]
+
+
+CATALOG = ShopCatalog(SHOP_FILE)
+
+
+class EconomyStats:
+    """Money supply, daily mint/burn and a balance distribution sketch, updated per change.
+
+    Per guild (``economy_stats.json``): total ``supply``; ``counts``/``sums`` of positive
+    balances in power-of-two buckets; and per UTC day the coins ``minted`` and ``burned``
+    by source. Transfers between players change the distribution but not the supply.
+    The first access for a guild without stats seeds them with one scan of the accounts.
+    Changes are queued by ``record`` and only counted by ``commit`` once the accounts
+    they were made to have been saved, so a rejected write never shows up in the totals.
+    """
+
+    def __init__(self):
+        self.store = PartitionedStore("economy_stats")
+        self._pending = {}  # guild_id -> (accounts dict, [(old, new, source)] made to it, not saved yet)
+
+    def stats(self, guild_id: int) -> dict:
+        stats = self.store.partition(guild_id)
+        self._seed(guild_id, stats)
+        return stats
+
+    def _seed(self, guild_id: int, stats: dict) -> bool:
+        """Fill in missing stats from the current balances; False if they were already there."""
+        if "supply" in stats:
+            return False
+        stats.update(supply=0, counts=[0] * BALANCE_BUCKETS, sums=[0] * BALANCE_BUCKETS, days={})
+        accounts = ECONOMY.partition(guild_id)
+        for account in accounts.values():
+            self._move(stats, 0, account.balance)
+        for old, new, _ in reversed(self._queued(guild_id, accounts)):  # counted when they're committed
+            self._move(stats, new, old)
+        return True
+
+    @staticmethod
+    def _move(stats: dict, old: int, new: int):
+        stats["supply"] += new - old
+        if old > 0:
+            i = min(old.bit_length(), BALANCE_BUCKETS - 1)
+            stats["counts"][i] -= 1
+            stats["sums"][i] -= old
+        if new > 0:
+            i = min(new.bit_length(), BALANCE_BUCKETS - 1)
+            stats["counts"][i] += 1
+            stats["sums"][i] += new
+
+    def _queued(self, guild_id: int, accounts: dict) -> list:
+        entry = self._pending.get(guild_id)
+        return entry[1] if entry is not None and entry[0] is accounts else []
+
+    def record(self, guild_id: int, old: int, new: int, source: str):
+        """Queue a change made to the guild's current accounts."""
+        accounts = ECONOMY.partition(guild_id)
+        entry = self._pending.get(guild_id)
+        if entry is None or entry[0] is not accounts:  # the old queue's accounts were dropped unsaved
+            entry = self._pending[guild_id] = (accounts, [])
+        entry[1].append((old, new, source))
+
+    def discard(self, guild_id: int, accounts: dict):
+        """Forget the changes queued against ``accounts``: they were dropped unsaved."""
+        if self._queued(guild_id, accounts):
+            del self._pending[guild_id]
+
+    async def commit(self, guild_id: int, accounts: dict):
+        """Count the changes queued against ``accounts`` (now saved) and save the stats.
+
+        The counting runs again on a fresh read if another shard saved the stats first.
+        """
+        changes = self._queued(guild_id, accounts)
+        if not changes:
+            return
+        del self._pending[guild_id]
+        day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+        def count(stats: dict):
+            seeded = self._seed(guild_id, stats)  # a fresh scan already includes the changes
+            days = stats["days"]
+            for old, new, source in changes:
+                if not seeded:
+                    self._move(stats, old, new)
+                if source == "transfer" or new == old:
+                    continue
+                if day not in days:
+                    days[day] = {"minted": {}, "burned": {}}
+                    for stale in sorted(days)[:-STATS_DAYS_KEPT]:
+                        del days[stale]
+                bucket = days[day]["minted" if new > old else "burned"]
+                bucket[source] = bucket.get(source, 0) + abs(new - old)
+        await self.store.update(guild_id, count)
+
+    @staticmethod
+    def percentile(stats: dict, q: float) -> int:
+        """Estimate from the bucket sketch, interpolating within the bucket."""
+        total = sum(stats["counts"])
+        if not total:
+            return 0
+        target, running = q * total, 0
+        for i, count in enumerate(stats["counts"]):
+            if count and running + count >= target:
+                lo, hi = (2 ** (i - 1), 2 ** i) if i else (0, 1)
+                return int(lo + (hi - lo) * (target - running) / count)
+            running += count
+        return 0
+
+    @staticmethod
+    def gini(stats: dict) -> float:
+        """Gini coefficient of positive balances, treating each bucket as equal holdings."""
+        total_count, total_sum = sum(stats["counts"]), sum(stats["sums"])
+        if not total_count or not total_sum:
+            return 0.0
+        area, cumulative = 0.0, 0.0
+        for count, amount in zip(stats["counts"], stats["sums"]):
+            if not count:
+                continue
+            share = amount / total_sum
+            area += count / total_count * (2 * cumulative + share)
+            cumulative += share
+        return max(0.0, 1 - area)
+
+
+ECONOMY_STATS = EconomyStats()
+
+
+class TransactionsView(View):
+    """Newest-first pages over an account's transaction list.
+
+    ``end`` is the cursor: the list index just past the newest row on the page. Rows are
+    only ever appended, so the cursor keeps pointing at the same rows while new
+    transactions arrive, and each page slices out just its own rows.
+    """
+
+    def __init__(self, author, member, account: Account):
+        super().__init__(timeout=180)
+        self.author = author
+        self.member = member
+        self.account = account
+        self.end = len(account.transactions)
+        self.message = None
+        self._update_buttons()
+
+    def page(self) -> list:
+        start = max(0, self.end - TRANSACTIONS_PAGE_SIZE)
+        return self.account.transactions[start:self.end][::-1]
+
+    def embed(self) -> discord.Embed:
+        embed = discord.Embed(title=f"🧾 {self.member.name}'s Transactions", color=discord.Color.blurple())
+        lines = []
+        for tx in self.page():
+            sign = "+" if tx.type == "add" else "-"
+            lines.append(f"<t:{tx.timestamp}:R> **{sign}{tx.amount:,}** {tx.reason or ''}".rstrip())
+        embed.description = "\n".join(lines) or "No transactions yet."
+        total = len(self.account.transactions)
+        newest = total - self.end + 1
+        if lines:
+            embed.set_footer(text=f"Showing {newest:,}–{newest + len(lines) - 1:,} of {total:,} (newest first)")
+        return embed
+
+    def _update_buttons(self):
+        self.newer.disabled = self.end >= len(self.account.transactions)
+        self.older.disabled = self.end <= TRANSACTIONS_PAGE_SIZE
+
+    async def _turn(self, interaction: discord.Interaction, delta: int):
+        if interaction.user != self.author:
+            return await interaction.response.send_message("❌ These aren't your buttons.", ephemeral=True)
+        if self.end + delta > 0:  # the oldest page may be short; never step past it
+            self.end = min(len(self.account.transactions), self.end + delta)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="◀ Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: Button):
+        await self._turn(interaction, TRANSACTIONS_PAGE_SIZE)
+
+    @discord.ui.button(label="Older ▶", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: Button):
+        await self._turn(interaction, -TRANSACTIONS_PAGE_SIZE)
+
+    async def on_timeout(self):
+        if self.message:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
 
-def save_json(path: Path, data):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
 
 class Economy(commands.Cog):
     """Economy system for Minecraft network."""
     
     def __init__(self, bot):
         self.bot = bot
-        ECONOMY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        self.carts = {}  # (guild_id, user_id) -> {item_id: quantity}, kept in memory only
 
-    def get_balance(self, user_id: int) -> int:
-        """Get user's balance."""
-        data = load_json(ECONOMY_FILE)
-        return data.get(str(user_id), {}).get("balance", 0)
+    async def cog_load(self):
+        CATALOG.refresh(force=True)
 
-    def add_balance(self, user_id: int, amount: int, reason: str = ""):
-        """Add coins to user."""
-        data = load_json(ECONOMY_FILE)
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    def get_account(self, guild_id: int, user_id: int) -> Account:
+        """Get or create a user's account (not saved until it changes)."""
+        data = ECONOMY.partition(guild_id)
         uid = str(user_id)
         if uid not in data:
-            data[uid] = {"balance": 0, "transactions": []}
-        data[uid]["balance"] = max(0, data[uid]["balance"] + amount)
-        data[uid]["transactions"].append({
-            "type": "add" if amount > 0 else "remove",
-            "amount": abs(amount),
+            data[uid] = Account()
+        return data[uid]
+
+    def get_balance(self, guild_id: int, user_id: int) -> int:
+        """Get user's balance."""
+        account = ECONOMY.partition(guild_id).get(str(user_id))
+        return account.balance if account else 0
+
+    def apply(self, guild_id: int, account: Account, amount: int, reason: str, source: str, now: int | None = None):
+        """Change a balance in memory and queue the change for ``ECONOMY_STATS`` (no save)."""
+        old = account.balance
+        account.apply(amount, reason, now)
+        ECONOMY_STATS.record(guild_id, old, account.balance, source)
+
+    async def save(self, guild_id: int, changed: dict | None = None):
+        """Save the accounts (``changed``: the partition the caller modified, see ``PartitionedStore.save``)."""
+        accounts = changed if changed is not None else ECONOMY.partition(guild_id)
+        try:
+            await ECONOMY.save(guild_id, changed)
+        except StaleWriteError:
+            ECONOMY_STATS.discard(guild_id, accounts)  # the changes are made again on a fresh read, if at all
+            raise
+        try:
+            await ECONOMY_STATS.commit(guild_id, accounts)
+        except StaleWriteError:
+            logger.warning("Economy stats for guild %s kept changing on other shards; last changes not counted", guild_id)
+
+    async def transact(self, guild_id: int, change):
+        """Run ``change(accounts)`` and save, returning its result.
+
+        If another shard saved the accounts first, ``change`` runs again on a fresh read,
+        so it must check balances against the accounts it is given.
+        """
+        for attempt in range(1, UPDATE_ATTEMPTS + 1):
+            accounts = ECONOMY.partition(guild_id)
+            result = change(accounts)
+            try:
+                await self.save(guild_id, accounts)
+                return result
+            except StaleWriteError:
+                if attempt == UPDATE_ATTEMPTS:
+                    raise
+                logger.info("Retrying economy change in guild %s after a conflicting write", guild_id)
+
+    async def add_balance(self, guild_id: int, user_id: int, amount: int, reason: str = "", source: str = "admin"):
+        """Add coins to user."""
+        await self.transact(guild_id, lambda data: self.apply(
+            guild_id, self.get_account(guild_id, user_id), amount, reason, source
+        ))
+
+    async def bulk_credit(self, guild_id: int, credits: dict, reason: str, progress=None) -> dict:
+        """Credit ``{user_id: amount}`` to many accounts with a single save and journal entry.
+
+        Rows are checked in chunks, yielding to the event loop and awaiting
+        ``progress(done, total)`` after each chunk. The accounts are then credited in one
+        pass with no await in between, so the payout is saved whole or not at all.
+        Non-positive amounts are skipped. Returns a summary dict.
+        """
+        rows = list(credits.items())
+        items = []
+        for offset in range(0, len(rows), PAYOUT_CHUNK):
+            for uid, amount in rows[offset:offset + PAYOUT_CHUNK]:
+                if int(amount) > 0:
+                    items.append((str(uid), int(amount)))
+            if progress:
+                await progress(min(offset + PAYOUT_CHUNK, len(rows)), len(rows))
+            await asyncio.sleep(0)
+        now = int(time.time())
+        compute_seconds = 0.0
+
+        def credit(data):
+            nonlocal compute_seconds
+            start = time.perf_counter()
+            for uid, amount in items:
+                account = data.get(uid)
+                if account is None:
+                    account = data[uid] = Account()
+                self.apply(guild_id, account, amount, reason, "payout", now)
+            compute_seconds = time.perf_counter() - start
+
+        write_start = time.perf_counter()
+        await self.transact(guild_id, credit)
+        write_seconds = time.perf_counter() - write_start - compute_seconds
+        summary = {
+            "at": now,
             "reason": reason,
-            "timestamp": datetime.utcnow().isoformat()
-        })
-        save_json(ECONOMY_FILE, data)
+            "players": len(items),
+            "total": sum(amount for _, amount in items),
+            "skipped": len(rows) - len(items),
+        }
+        journal = partition_path(guild_id, "payouts.log")
+        journal.parent.mkdir(parents=True, exist_ok=True)
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(summary, credits=dict(items)), separators=(",", ":")) + "\n")
+        summary["compute_ms"] = round(compute_seconds * 1000, 1)
+        summary["write_ms"] = round(write_seconds * 1000, 1)
+        logger.info("Payout in guild %s: %s", guild_id, summary)
+        return summary
 
     @commands.command(name="balance")
     async def balance(self, ctx, member: discord.Member = None):
         """💰 Check player balance."""
         member = member or ctx.author
-        bal = self.get_balance(member.id)
+        bal = self.get_balance(ctx.guild.id, member.id)
         
         embed = discord.Embed(title="💰 Balance", color=discord.Color.gold())
         embed.add_field(name="Player", value=member.mention)
@@ -63,32 +444,55 @@ class Economy(commands.Cog):
         
         await ctx.send(embed=embed)
 
-    @commands.command(name="daily")
-    async def daily(self, ctx):
-        """🎁 Claim your daily reward."""
-        data = load_json(ECONOMY_FILE)
-        uid = str(ctx.author.id)
-        
-        if uid not in data:
-            data[uid] = {"balance": 0, "transactions": [], "last_daily": None}
-        
-        last_daily = data[uid].get("last_daily")
-        if last_daily:
-            last_time = datetime.fromisoformat(last_daily)
-            if (datetime.utcnow() - last_time).total_seconds() < 86400:
-                return await ctx.send("❌ You already claimed your daily reward. Come back tomorrow!")
-
-        reward = 500
-        self.add_balance(ctx.author.id, reward, "Daily reward")
-        data[uid]["last_daily"] = datetime.utcnow().isoformat()
-        save_json(ECONOMY_FILE, data)
-
-        embed = discord.Embed(title="🎁 Daily Reward", color=discord.Color.green())
+    async def migrate_last_daily(self, guild_id: int, user_id: int, seconds: int):
+        """Carry a pre-cooldown-service daily claim time over to ``COOLDOWNS`` once.
+
+        The cooldown is set before the account is saved without ``last_daily``, so a
+        restart in between only repeats the carry-over instead of losing the cooldown.
+        """
+        account = ECONOMY.partition(guild_id).get(str(user_id))
+        if account is None or account.last_daily is None:
+            return
+        if account.last_daily + seconds > time.time():
+            await COOLDOWNS.set(guild_id, "daily", user_id, account.last_daily + seconds)
+
+        def clear(data):
+            if str(user_id) in data:
+                data[str(user_id)].last_daily = None
+        await self.transact(guild_id, clear)
+
+    async def claim_reward(self, ctx, name: str):
+        """Shared body of the timed reward commands in ``REWARDS``."""
+        seconds, reward, label = REWARDS[name]
+        if name == "daily":
+            await self.migrate_last_daily(ctx.guild.id, ctx.author.id, seconds)
+
+        left = await COOLDOWNS.claim(ctx.guild.id, name, ctx.author.id, seconds)
+        if left:
+            return await ctx.send(f"❌ You already claimed your {label} reward. Come back in **{format_duration(left)}**!")
+        try:
+            await self.add_balance(ctx.guild.id, ctx.author.id, reward, f"{label.capitalize()} reward", source=name)
+        except Exception:
+            # Not credited, so don't make them wait out the cooldown for nothing
+            await COOLDOWNS.reset(ctx.guild.id, name, ctx.author.id)
+            raise
+
+        embed = discord.Embed(title=f"🎁 {label.capitalize()} Reward", color=discord.Color.green())
         embed.add_field(name="Claimed", value=f"+{reward:,} coins")
-        embed.set_footer(text="Come back tomorrow for your next reward!")
+        embed.set_footer(text=f"Come back in {format_duration(seconds)} for your next reward!")
         
         await ctx.send(embed=embed)
 
+    @commands.command(name="daily")
+    async def daily(self, ctx):
+        """🎁 Claim your daily reward."""
+        await self.claim_reward(ctx, "daily")
+
+    @commands.command(name="weekly")
+    async def weekly(self, ctx):
+        """🎁 Claim your weekly reward."""
+        await self.claim_reward(ctx, "weekly")
+
     @commands.command(name="pay")
     async def pay(self, ctx, member: discord.Member, amount: int):
         """💸 Send coins to another player."""
@@ -97,12 +501,18 @@ class Economy(commands.Cog):
         if member == ctx.author:
             return await ctx.send("❌ You can't pay yourself.")
 
-        balance = self.get_balance(ctx.author.id)
-        if balance < amount:
-            return await ctx.send(f"❌ Insufficient balance. You have **{balance:,}** coins.")
+        def transfer(data) -> int | None:
+            """Move the coins; returns the sender's balance instead if it's too low."""
+            sender = self.get_account(ctx.guild.id, ctx.author.id)
+            if sender.balance < amount:
+                return sender.balance
+            self.apply(ctx.guild.id, sender, -amount, f"Paid to {member}", "transfer")
+            self.apply(ctx.guild.id, self.get_account(ctx.guild.id, member.id), amount, f"Received from {ctx.author}", "transfer")
+            return None
 
-        self.add_balance(ctx.author.id, -amount, f"Paid to {member}")
-        self.add_balance(member.id, amount, f"Received from {ctx.author}")
+        balance = await self.transact(ctx.guild.id, transfer)
+        if balance is not None:
+            return await ctx.send(f"❌ Insufficient balance. You have **{balance:,}** coins.")
 
         embed = discord.Embed(title="💸 Payment Sent", color=discord.Color.green())
         embed.add_field(name="From", value=ctx.author.mention)
@@ -114,10 +524,10 @@ class Economy(commands.Cog):
     @commands.command(name="leaderboard")
     async def leaderboard(self, ctx):
         """🏆 Top players by coins."""
-        data = load_json(ECONOMY_FILE)
+        data = ECONOMY.partition(ctx.guild.id)
         sorted_users = sorted(
             data.items(),
-            key=lambda x: x[1].get("balance", 0),
+            key=lambda x: x[1].balance,
             reverse=True
         )[:10]
 
@@ -125,50 +535,298 @@ class Economy(commands.Cog):
         for rank, (uid, info) in enumerate(sorted_users, 1):
             member = ctx.guild.get_member(int(uid))
             name = member.mention if member else f"<@{uid}>"
-            balance = info.get("balance", 0)
+            balance = info.balance
             emoji = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
             embed.add_field(name=f"{emoji} {name}", value=f"**{balance:,}**", inline=False)
 
         await ctx.send(embed=embed)
 
     @commands.command(name="shop")
-    async def shop(self, ctx):
-        """🛍️ View the shop."""
-        shop_data = load_json(SHOP_FILE)
-        if not shop_data:
-            return await ctx.send("❌ Shop is empty.")
+    async def shop(self, ctx, *filters: str):
+        """🛍️ View the shop: !shop [category] [<=price] [page]"""
+        category, max_price, page = None, None, 1
+        for token in filters:
+            if token.isdigit():
+                page = int(token)
+            elif token.startswith("<=") and token[2:].isdigit():
+                max_price = int(token[2:])
+            elif token.startswith("<") and token[1:].isdigit():
+                max_price = int(token[1:]) - 1
+            elif token.lower() != "all":
+                category = token
+        if category and category.lower() not in CATALOG.categories():
+            return await ctx.send(f"❌ Unknown category. Categories: {', '.join(CATALOG.categories()) or 'none'}")
 
-        embed = discord.Embed(title="🛍️ Shop", color=discord.Color.blurple())
-        for item_id, item in shop_data.items():
-            embed.add_field(name=f"{item['name']} (ID: {item_id})", value=f"**Cost:** {item['price']:,} coins", inline=False)
+        items = CATALOG.search(category, max_price)
+        if not items:
+            return await ctx.send("❌ No items match." if filters else "❌ Shop is empty.")
+        pages = math.ceil(len(items) / SHOP_PAGE_SIZE)
+        page = min(max(1, page), pages)
 
-        embed.set_footer(text="Use /buy <item_id> to purchase")
+        title = "🛍️ Shop" + (f" — {category.title()}" if category else "")
+        embed = discord.Embed(title=title, color=discord.Color.blurple())
+        if max_price is not None:
+            embed.description = f"Up to **{max_price:,}** coins"
+        for item in items[(page - 1) * SHOP_PAGE_SIZE:page * SHOP_PAGE_SIZE]:
+            embed.add_field(
+                name=f"{item.get('emoji', '')} {item['name']} (ID: {item['id']})".strip(),
+                value=f"**Cost:** {item['price']:,} coins" + (f"\n{item['description']}" if item.get("description") else ""),
+                inline=False
+            )
+        embed.set_footer(text=f"Page {page}/{pages} • !shop [category] [<=price] [page] • Categories: "
+                              f"{', '.join(CATALOG.categories())} • !buy <item_id> to purchase")
         await ctx.send(embed=embed)
 
+    async def checkout(self, guild_id: int, user_id: int, counts: dict) -> tuple[bool, int]:
+        """Buy ``{item_id: quantity}`` in one step: debit, credit the inventory, save once.
+
+        Returns (ok, total cost); nothing changes unless the whole order is affordable.
+        """
+        total = sum(CATALOG.items[item_id]["price"] * qty for item_id, qty in counts.items())
+        summary = ", ".join(f"{qty}× {CATALOG.items[item_id]['name']}" for item_id, qty in counts.items())
+
+        def buy(data) -> bool:
+            account = self.get_account(guild_id, user_id)
+            if account.balance < total:
+                return False
+            self.apply(guild_id, account, -total, f"Bought {summary}", "shop")
+            account.add_items(counts)
+            return True
+        return await self.transact(guild_id, buy), total
+
+    def _cart(self, ctx) -> dict:
+        return self.carts.setdefault((ctx.guild.id, ctx.author.id), {})
+
     @commands.command(name="buy")
-    async def buy(self, ctx, item_id: str):
+    async def buy(self, ctx, item_id: str, quantity: int = 1):
         """🛒 Buy an item from the shop."""
-        shop_data = load_json(SHOP_FILE)
-        if item_id not in shop_data:
+        item = CATALOG.get(item_id)
+        if item is None:
             return await ctx.send("❌ Item not found.")
+        if not 1 <= quantity <= MAX_QUANTITY:
+            return await ctx.send(f"❌ Quantity must be between 1 and {MAX_QUANTITY:,}.")
 
-        item = shop_data[item_id]
-        balance = self.get_balance(ctx.author.id)
-        
-        if balance < item["price"]:
-            return await ctx.send(f"❌ Insufficient balance. Cost: **{item['price']:,}** coins")
-
-        self.add_balance(ctx.author.id, -item["price"], f"Bought {item['name']}")
+        ok, total = await self.checkout(ctx.guild.id, ctx.author.id, {item["id"]: quantity})
+        if not ok:
+            return await ctx.send(f"❌ Insufficient balance. Cost: **{total:,}** coins")
 
         embed = discord.Embed(title="✅ Purchase Successful", color=discord.Color.green())
-        embed.add_field(name="Item", value=item["name"])
-        embed.add_field(name="Cost", value=f"-{item['price']:,} coins")
+        embed.add_field(name="Item", value=f"{quantity}× {item['name']}" if quantity > 1 else item["name"])
+        embed.add_field(name="Cost", value=f"-{total:,} coins")
         
         await ctx.send(embed=embed)
-        try:
-            await ctx.author.send(f"🎉 You purchased **{item['name']}** for **{item['price']:,}** coins!")
-        except:
-            pass
+        queue_dm(self.bot, ctx.author, f"🎉 You purchased **{quantity}× {item['name']}** for **{total:,}** coins!")
+
+    @commands.group(name="cart", invoke_without_command=True)
+    async def cart(self, ctx):
+        """🛒 View your cart."""
+        cart = self._cart(ctx)
+        if not cart:
+            return await ctx.send("🛒 Your cart is empty. Add items with `!cart add <item> [qty]`.")
+        embed = discord.Embed(title="🛒 Cart", color=discord.Color.blurple())
+        total = 0
+        for item_id, qty in cart.items():
+            item = CATALOG.get(item_id)
+            if item is None:  # removed from the shop since it was added; checkout skips it
+                embed.add_field(name=f"{qty}× {item_id}", value="❌ No longer available", inline=False)
+                continue
+            total += item["price"] * qty
+            embed.add_field(name=f"{qty}× {item['name']}", value=f"{item['price'] * qty:,} coins", inline=False)
+        embed.set_footer(text=f"Total: {total:,} coins • !checkout to buy everything")
+        await ctx.send(embed=embed)
+
+    @cart.command(name="add")
+    async def cart_add(self, ctx, item_id: str, quantity: int = 1):
+        item = CATALOG.get(item_id)
+        if item is None:
+            return await ctx.send("❌ Item not found.")
+        cart = self._cart(ctx)
+        if not 1 <= quantity or cart.get(item["id"], 0) + quantity > MAX_QUANTITY:
+            return await ctx.send(f"❌ Quantity must be between 1 and {MAX_QUANTITY:,}.")
+        if item["id"] not in cart and len(cart) >= MAX_CART_ITEMS:
+            return await ctx.send(f"❌ Your cart can hold at most {MAX_CART_ITEMS} different items.")
+        cart[item["id"]] = cart.get(item["id"], 0) + quantity
+        await ctx.send(f"🛒 Added **{quantity}× {item['name']}** to your cart.")
+
+    @cart.command(name="remove")
+    async def cart_remove(self, ctx, item_id: str):
+        item = CATALOG.get(item_id)
+        if item is None or self._cart(ctx).pop(item["id"], None) is None:
+            return await ctx.send("❌ That item isn't in your cart.")
+        await ctx.send(f"🗑️ Removed **{item['name']}** from your cart.")
+
+    @cart.command(name="clear")
+    async def cart_clear(self, ctx):
+        self.carts.pop((ctx.guild.id, ctx.author.id), None)
+        await ctx.send("🗑️ Cart cleared.")
+
+    @commands.command(name="checkout")
+    async def checkout_cmd(self, ctx):
+        """💳 Buy everything in your cart at once."""
+        cart = self._cart(ctx)
+        CATALOG.refresh()
+        # Drop anything removed from the shop since it was added
+        counts = {item_id: qty for item_id, qty in cart.items() if item_id in CATALOG.items}
+        if not counts:
+            return await ctx.send("🛒 Your cart is empty.")
+        lines = [f"{qty}× {CATALOG.items[item_id]['name']}" for item_id, qty in counts.items()]
+        ok, total = await self.checkout(ctx.guild.id, ctx.author.id, counts)
+        if not ok:
+            balance = self.get_balance(ctx.guild.id, ctx.author.id)
+            return await ctx.send(f"❌ Insufficient balance. Total: **{total:,}** coins, you have **{balance:,}**.")
+        self.carts.pop((ctx.guild.id, ctx.author.id), None)
+
+        embed = discord.Embed(title="✅ Checkout Complete", color=discord.Color.green())
+        embed.description = "\n".join(lines)
+        embed.add_field(name="Total", value=f"-{total:,} coins")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="inventory", aliases=["inv"])
+    async def inventory(self, ctx, member: discord.Member = None):
+        """🎒 View owned items."""
+        member = member or ctx.author
+        account = ECONOMY.partition(ctx.guild.id).get(str(member.id))
+        owned = account.inventory if account else None
+        if not owned:
+            return await ctx.send(f"🎒 {member.mention} doesn't own any items yet.")
+
+        embed = discord.Embed(title=f"🎒 {member.name}'s Inventory", color=discord.Color.blurple())
+        worth = 0
+        for item_id, qty in sorted(owned.items(), key=lambda kv: -kv[1])[:25]:
+            item = CATALOG.get(item_id)
+            name = f"{item.get('emoji', '')} {item['name']}".strip() if item else item_id
+            worth += item["price"] * qty if item else 0
+            embed.add_field(name=name, value=f"×**{qty:,}**", inline=True)
+        embed.set_footer(text=f"{sum(owned.values()):,} items • worth {worth:,} coins at shop prices")
+        await ctx.send(embed=embed)
+
+    @commands.command(name="transactions", aliases=["txs"])
+    async def transactions(self, ctx, member: discord.Member = None):
+        """🧾 Browse your transaction history (staff can view anyone's)."""
+        member = member or ctx.author
+        if member != ctx.author and not (
+            any(r.name in STAFF_ROLES for r in ctx.author.roles) or ctx.author.guild_permissions.manage_guild
+        ):
+            return await ctx.send("❌ You can only view your own transactions.")
+        account = ECONOMY.partition(ctx.guild.id).get(str(member.id))
+        if account is None or not account.transactions:
+            return await ctx.send(f"🧾 {member.mention} has no transactions yet.")
+        view = TransactionsView(ctx.author, member, account)
+        view.message = await ctx.send(embed=view.embed(), view=view)
+
+    @commands.command(name="economystats")
+    async def economystats(self, ctx):
+        """📊 Money supply, inflation and wealth distribution."""
+        stats = ECONOMY_STATS.stats(ctx.guild.id)
+        holders = sum(stats["counts"])
+        embed = discord.Embed(title="📊 Economy Stats", color=discord.Color.gold())
+        embed.add_field(name="💰 Supply", value=f"**{stats['supply']:,}** coins", inline=True)
+        embed.add_field(name="👥 Holders", value=f"**{holders:,}**", inline=True)
+        embed.add_field(name="📐 Average", value=f"**{stats['supply'] // max(1, holders):,}**", inline=True)
+        embed.add_field(
+            name="Balance Percentiles (≈)",
+            value=" · ".join(f"p{int(q * 100)} {ECONOMY_STATS.percentile(stats, q):,}" for q in (0.5, 0.9, 0.99)),
+            inline=False
+        )
+        embed.add_field(name="⚖️ Gini (≈)", value=f"**{ECONOMY_STATS.gini(stats):.2f}**", inline=True)
+
+        days = stats["days"]
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        entry = days.get(today, {"minted": {}, "burned": {}})
+        for label, by_source in (("🪙 Minted Today", entry["minted"]), ("🔥 Burned Today", entry["burned"])):
+            detail = ", ".join(f"{k} {v:,}" for k, v in sorted(by_source.items(), key=lambda kv: -kv[1])) or "—"
+            embed.add_field(name=label, value=f"**{sum(by_source.values()):,}**\n{detail}", inline=True)
+        week = sorted(days)[-7:]
+        net = sum(sum(days[d]["minted"].values()) - sum(days[d]["burned"].values()) for d in week)
+        embed.add_field(name="📈 Net Issuance (7d)", value=f"**{net:+,}** coins", inline=False)
+        embed.set_footer(text="Percentiles and Gini are estimated from power-of-two balance buckets")
+        await ctx.send(embed=embed)
+
+    # --- Bulk payouts ---
+
+    async def _run_payout(self, ctx, credits: dict, reason: str):
+        if not credits:
+            return await ctx.send("❌ Nobody to pay.")
+        status = await ctx.send(f"⏳ Paying **{len(credits):,}** players...")
+        last_edit = time.monotonic()
+
+        async def progress(done, total):
+            nonlocal last_edit
+            if time.monotonic() - last_edit >= PAYOUT_PROGRESS_INTERVAL:
+                last_edit = time.monotonic()
+                try:
+                    await status.edit(content=f"⏳ Paying players... {done:,}/{total:,}")
+                except discord.HTTPException:
+                    logger.warning("Couldn't update payout progress in guild %s", ctx.guild.id)
+
+        summary = await self.bulk_credit(ctx.guild.id, credits, reason, progress)
+        embed = discord.Embed(title="💸 Payout Complete", color=discord.Color.green())
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Players", value=f"**{summary['players']:,}**", inline=True)
+        embed.add_field(name="Total", value=f"**{summary['total']:,}** coins", inline=True)
+        if summary["skipped"]:
+            embed.add_field(name="Skipped", value=f"{summary['skipped']:,} with no positive amount", inline=True)
+        embed.set_footer(text=f"Computed in {summary['compute_ms']}ms • saved in {summary['write_ms']}ms")
+        await status.edit(content=None, embed=embed)
+
+    @commands.group(name="payout", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def payout(self, ctx):
+        """💸 Bulk payouts (admin)."""
+        await ctx.send(
+            "**Payouts**\n"
+            "`!payout interest <percent> [cap]` — pay interest on every balance\n"
+            "`!payout role <role> <amount> [reason]` — flat amount to every member of a role\n"
+            "`!payout csv [reason]` — attach a CSV of `user_id,amount` rows"
+        )
+
+    @payout.command(name="interest")
+    @commands.has_permissions(administrator=True)
+    async def payout_interest(self, ctx, percent: float, cap: int = None):
+        if not 0 < percent <= 100:
+            return await ctx.send("❌ Percent must be between 0 and 100.")
+        if cap is not None and cap <= 0:
+            return await ctx.send("❌ Cap must be positive (leave it out for no cap).")
+        rate = percent / 100
+        credits = {}
+        for uid, account in ECONOMY.partition(ctx.guild.id).items():
+            amount = int(account.balance * rate)
+            if amount > 0:
+                credits[uid] = min(amount, cap) if cap is not None else amount
+        await self._run_payout(ctx, credits, f"Interest {percent:g}%")
+
+    @payout.command(name="role")
+    @commands.has_permissions(administrator=True)
+    async def payout_role(self, ctx, role: discord.Role, amount: int, *, reason: str = None):
+        if amount <= 0:
+            return await ctx.send("❌ Amount must be positive.")
+        credits = {member.id: amount for member in role.members if not member.bot}
+        await self._run_payout(ctx, credits, reason or f"{role.name} reward")
+
+    @payout.command(name="csv")
+    @commands.has_permissions(administrator=True)
+    async def payout_csv(self, ctx, *, reason: str = "Event reward"):
+        attachment = ctx.message.attachments[0] if ctx.message.attachments else None
+        if attachment is None:
+            return await ctx.send("❌ Attach a CSV file with `user_id,amount` rows.")
+        if attachment.size > MAX_CSV_BYTES:
+            return await ctx.send("❌ CSV is too large (max 5 MB).")
+        text = (await attachment.read()).decode("utf-8-sig", errors="replace")
+        credits, skipped = {}, 0
+        for row in csv.reader(io.StringIO(text)):
+            try:
+                uid, amount = int(row[0].strip().strip("<@!>")), int(row[1])
+            except (IndexError, ValueError):
+                skipped += 1  # header or malformed line
+                continue
+            if amount <= 0:
+                skipped += 1
+                continue
+            credits[uid] = credits.get(uid, 0) + amount
+        if skipped:
+            await ctx.send(f"ℹ️ Skipped {skipped} row(s) that weren't `user_id,amount` with a positive amount.")
+        await self._run_payout(ctx, credits, reason)
+
 
 async def setup(bot):
     await bot.add_cog(Economy(bot))
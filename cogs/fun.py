@@ -130,97 +130,6 @@ class Fun(commands.Cog):
         
         await ctx.send(embed=embed)
 
-    @commands.command(name="giveaway")
-    @commands.has_permissions(administrator=True)
-    async def giveaway(self, ctx, duration: int, *, prize: str):
-        """🎁 Start a giveaway."""
-        if duration < 1 or duration > 3600:
-            return await ctx.send("❌ Duration must be between 1 and 3600 seconds.")
-
-        embed = discord.Embed(title="🎁 GIVEAWAY", color=discord.Color.gold())
-        embed.add_field(name="Prize", value=prize, inline=False)
-        embed.add_field(name="Duration", value=f"{duration} seconds", inline=False)
-        embed.set_footer(text="React with 🎉 to enter!")
-        
-        msg = await ctx.send(embed=embed)
-        await msg.add_reaction("🎉")
-
-        await __import__("asyncio").sleep(duration)
-
-        # Get all reactions
-        reaction = discord.utils.get(msg.reactions, emoji="🎉")
-        if reaction and reaction.count > 1:
-            participants = await reaction.users().flatten()
-            participants = [u for u in participants if u != self.bot.user]
-
-            if participants:
-                winner = random.choice(participants)
-                embed.title = "🎉 GIVEAWAY WINNER"
-                embed.add_field(name="Winner", value=winner.mention, inline=False)
-                await ctx.send(embed=embed)
-                
-                try:
-                    await winner.send(f"🎉 You won the giveaway!\n**Prize:** {prize}")
-                except:
-                    pass
-            else:
-                await ctx.send("❌ No valid participants.")
-        else:
-            await ctx.send("❌ Not enough participants for the giveaway.")
-
-    @commands.command(name="poll")
-    async def poll(self, ctx, *, question: str):
-        """📊 Create a quick poll."""
-        embed = discord.Embed(title="📊 Poll", description=question, color=discord.Color.blurple())
-        embed.set_footer(text=f"Poll by {ctx.author.name}")
-        
-        msg = await ctx.send(embed=embed)
-        await msg.add_reaction("👍")
-        await msg.add_reaction("👎")
-        await msg.add_reaction("🤷")
-
-    @commands.command(name="trivia")
-    async def trivia(self, ctx):
-        """🧠 Answer a trivia question."""
-        questions = [
-            {
-                "q": "What is the capital of France?",
-                "options": ["Paris", "London", "Berlin", "Rome"],
-                "answer": "Paris"
-            },
-            {
-                "q": "What is 2 + 2?",
-                "options": ["3", "4", "5", "6"],
-                "answer": "4"
-            },
-            {
-                "q": "What is the largest planet in our solar system?",
-                "options": ["Saturn", "Mars", "Jupiter", "Neptune"],
-                "answer": "Jupiter"
-            },
-            {
-                "q": "Who wrote 'Hamlet'?",
-                "options": ["Charles Dickens", "William Shakespeare", "Jane Austen", "Mark Twain"],
-                "answer": "William Shakespeare"
-            },
-            {
-                "q": "What is the smallest country in the world?",
-                "options": ["Monaco", "Liechtenstein", "Vatican City", "San Marino"],
-                "answer": "Vatican City"
-            }
-        ]
-
-        q = random.choice(questions)
-        options_str = "\n".join([f"{chr(65+i)}. {opt}" for i, opt in enumerate(q["options"])])
-
-        embed = discord.Embed(title="🧠 Trivia Question", color=discord.Color.blurple())
-        embed.add_field(name=q["q"], value=options_str, inline=False)
-        embed.set_footer(text="React with the corresponding letter to answer")
-
-        msg = await ctx.send(embed=embed)
-        for i in range(len(q["options"])):
-            await msg.add_reaction(chr(127462 + i))  # Regional indicator emojis
-
     @commands.command(name="joke")
     async def joke(self, ctx):
         """😄 Tell a joke."""
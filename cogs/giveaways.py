@@ -0,0 +1,445 @@
+import array
+import logging
+import random
+import re
+import time
+from pathlib import Path
+import discord
+from discord.ext import commands
+from discord.ui import Button, View
+from cogs.cooldowns import format_duration, parse_duration
+from cogs.economy import ECONOMY
+from cogs.outbox import queue_dm
+from cogs.profiles import PROFILES
+from cogs.scheduler import SCHEDULER
+from cogs.storage import PartitionedStore, partition_path
+
+logger = logging.getLogger(__name__)
+
+MIN_DURATION = 10
+MAX_DURATION = 30 * 86400
+MAX_WINNERS = 20
+# Ended giveaways and their entrant files are kept this long so winners can be rerolled
+KEEP_ENDED_SECONDS = 7 * 86400
+ENTRANT_SIZE = 8  # bytes per user id in an entrant file
+TICKET_ITEM = "giveaway_ticket"
+# How much each entry counts in a weighted giveaway; everyone has at least weight 1
+WEIGHT_MODES = {
+    "level": "🌟 Odds weighted by level",
+    "playtime": "⏱️ Odds weighted by playtime",
+    "tickets": "🎟️ +1 entry per Giveaway Ticket owned",
+}
+
+GIVEAWAYS = PartitionedStore("giveaways")
+RNG = random.SystemRandom()
+
+
+def entrants_path(guild_id: int, message_id: int) -> Path:
+    return partition_path(guild_id, f"giveaways/{message_id}.entrants")
+
+
+def read_entrants(path: Path) -> array.array:
+    """All entrant ids of a giveaway in entry order, as one flat array of 64-bit ints."""
+    ids = array.array("Q")
+    if path.exists():
+        raw = path.read_bytes()
+        ids.frombytes(raw[:len(raw) - len(raw) % ENTRANT_SIZE])  # ignore a torn final write
+    return ids
+
+
+def draw(ids, count: int, eligible) -> list:
+    """Up to ``count`` distinct ids picked uniformly at random, skipping ids ``eligible`` rejects.
+
+    A partial Fisher-Yates shuffle over a sparse swap map: each pick is O(1) and the
+    entrant array is never copied or shuffled in full.
+    """
+    swaps = {}
+    winners = []
+    n = len(ids)
+    for i in range(n):
+        if len(winners) >= count:
+            break
+        j = RNG.randrange(i, n)
+        pick = swaps.get(j, j)
+        swaps[j] = swaps.get(i, i)
+        if eligible(ids[pick]):
+            winners.append(ids[pick])
+    return winners
+
+
+class FenwickSampler:
+    """Weighted picks without replacement over integer weights.
+
+    A Fenwick (binary indexed) tree of the weights is built once in O(n); each pick
+    walks it in O(log n) and removes the picked item in O(log n), so drawing k winners
+    from a large pool is O(n + k log n) instead of re-summing the pool for every winner.
+    """
+
+    def __init__(self, weights):
+        self.weights = list(weights)
+        self.n = len(self.weights)
+        self.total = sum(self.weights)
+        tree = [0] + self.weights
+        for i in range(1, self.n + 1):
+            parent = i + (i & -i)
+            if parent <= self.n:
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def pick(self) -> int | None:
+        """Index of a random item with probability weight / total, or None when all are used."""
+        if self.total <= 0:
+            return None
+        target = RNG.randrange(self.total)
+        pos, step = 0, 1 << self.n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] <= target:
+                pos = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return pos  # the 1-based tree slot pos + 1
+
+    def remove(self, index: int):
+        weight, self.weights[index] = self.weights[index], 0
+        self.total -= weight
+        i = index + 1
+        while i <= self.n:
+            self.tree[i] -= weight
+            i += i & -i
+
+
+def draw_weighted(ids, weights, count: int, eligible) -> list:
+    """Like ``draw``, but each id is picked with probability proportional to its weight."""
+    sampler = FenwickSampler(weights)
+    winners = []
+    while len(winners) < count:
+        index = sampler.pick()
+        if index is None:
+            break
+        sampler.remove(index)
+        if eligible(ids[index]):
+            winners.append(ids[index])
+    return winners
+
+
+def entry_weights(guild_id: int, ids, mode: str) -> list:
+    """One integer weight per entrant (at least 1), read from profiles or economy inventories.
+
+    The weighted records are gathered into an int-keyed map first, so the per-entrant pass
+    is a single dict lookup with no string conversion.
+    """
+    if mode == "tickets":
+        weighted = {int(uid): 1 + account.inventory[TICKET_ITEM]
+                    for uid, account in ECONOMY.partition(guild_id).items()
+                    if account.inventory and account.inventory.get(TICKET_ITEM)}
+    else:
+        attr = "level" if mode == "level" else "playtime_hours"
+        weighted = {int(uid): int(getattr(prof, attr)) for uid, prof in PROFILES.partition(guild_id).items()
+                    if getattr(prof, attr) >= 2}
+    get = weighted.get
+    return [get(uid, 1) for uid in ids]
+
+
+class EntrantSet:
+    """Deduplicated entrants of one running giveaway.
+
+    Each new entrant is appended to ``data/guilds/<guild_id>/giveaways/<message_id>.entrants``
+    as an 8-byte id (100k entrants is 800 KB), so entries survive a restart without
+    rewriting anything. The in-memory set only exists while the giveaway runs and is
+    rebuilt from the file on first use.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._ids = set(read_entrants(path))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._ids
+
+    def add(self, user_id: int) -> bool:
+        """Record an entry. Returns False if the user had already entered."""
+        if user_id in self._ids:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(array.array("Q", (user_id,)).tobytes())
+        self._ids.add(user_id)
+        return True
+
+
+class WeightMode(commands.Converter):
+    """``by:level`` / ``by:playtime`` / ``by:tickets`` -> the weighting mode."""
+
+    async def convert(self, ctx, argument: str) -> str:
+        mode = argument.lower().removeprefix("by:")
+        if not argument.lower().startswith("by:") or mode not in WEIGHT_MODES:
+            raise commands.BadArgument(f"Weighting must be one of: {', '.join('by:' + m for m in WEIGHT_MODES)}")
+        return mode
+
+
+class WinnerCount(commands.Converter):
+    """``3w`` -> 3, so a prize that starts with a number isn't mistaken for a winner count."""
+
+    async def convert(self, ctx, argument: str) -> int:
+        match = re.fullmatch(r"(\d+)w", argument.lower())
+        if not match:
+            raise commands.BadArgument("Winner count must look like 3w")
+        return int(match.group(1))
+
+
+def message_link(guild_id: int, record: dict, message_id) -> str:
+    return f"https://discord.com/channels/{guild_id}/{record['channel_id']}/{message_id}"
+
+
+def giveaway_embed(record: dict) -> discord.Embed:
+    if record["ended"]:
+        embed = discord.Embed(title="🎉 GIVEAWAY ENDED", color=discord.Color.dark_gold())
+    else:
+        embed = discord.Embed(title="🎁 GIVEAWAY", color=discord.Color.gold())
+    embed.add_field(name="Prize", value=record["prize"], inline=False)
+    if record["ended"]:
+        winners = ", ".join(f"<@{uid}>" for uid in record["winner_ids"]) or "No valid entrants"
+        embed.add_field(name="Winners", value=winners, inline=False)
+        embed.add_field(name="Entries", value=f"{record.get('entries', 0):,}", inline=True)
+    else:
+        embed.add_field(name="Winners", value=str(record["winners"]), inline=True)
+        embed.add_field(name="Ends", value=f"<t:{record['ends_at']}:R>", inline=True)
+        if record.get("weight"):
+            embed.add_field(name="Odds", value=WEIGHT_MODES[record["weight"]], inline=False)
+        embed.set_footer(text="Click 🎉 Enter to join!")
+    embed.add_field(name="Hosted by", value=f"<@{record['host_id']}>", inline=True)
+    return embed
+
+
+class GiveawayView(View):
+    """The Enter button on every giveaway message; persistent, so it works after a restart."""
+
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="🎉 Enter", style=discord.ButtonStyle.success, custom_id="giveaway_enter_v1")
+    async def enter(self, interaction: discord.Interaction, button: Button):
+        cog = interaction.client.get_cog("Giveaways")
+        if cog is None:
+            return await interaction.response.send_message("❌ Giveaways are unavailable right now.", ephemeral=True)
+        await cog.enter(interaction)
+
+
+class Giveaways(commands.Cog):
+    """Giveaways that survive restarts.
+
+    Records live in ``giveaways.json`` per guild, entrants in append-only id files, and
+    every running giveaway's end is a job on the shared scheduler.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.entrants = {}  # (guild_id, message_id) -> EntrantSet, running giveaways only
+
+    async def cog_load(self):
+        if self.bot.is_ready():
+            self.schedule_all()
+
+    async def cog_unload(self):
+        SCHEDULER.cancel_owner("giveaway")
+
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.schedule_all()
+
+    def schedule_all(self):
+        for guild in self.bot.guilds:
+            for message_id, record in GIVEAWAYS.partition(guild.id).items():
+                if not record["ended"]:
+                    self.schedule(guild.id, int(message_id), record["ends_at"])
+
+    def schedule(self, guild_id: int, message_id: int, ends_at: int):
+        SCHEDULER.schedule(("giveaway", guild_id, message_id), ends_at, lambda: self.end(guild_id, message_id))
+
+    def entrant_set(self, guild_id: int, message_id: int) -> EntrantSet:
+        entrants = self.entrants.get((guild_id, message_id))
+        if entrants is None:
+            entrants = self.entrants[(guild_id, message_id)] = EntrantSet(entrants_path(guild_id, message_id))
+        return entrants
+
+    def entry_count(self, guild_id: int, message_id: int) -> int:
+        entrants = self.entrants.get((guild_id, message_id))
+        if entrants is not None:
+            return len(entrants)
+        path = entrants_path(guild_id, message_id)
+        return path.stat().st_size // ENTRANT_SIZE if path.exists() else 0
+
+    async def enter(self, interaction: discord.Interaction):
+        guild_id, message_id = interaction.guild_id, interaction.message.id
+        record = GIVEAWAYS.partition(guild_id).get(str(message_id))
+        if record is None or record["ended"] or record["ends_at"] <= time.time():
+            return await interaction.response.send_message("❌ This giveaway has ended.", ephemeral=True)
+        if not self.entrant_set(guild_id, message_id).add(interaction.user.id):
+            return await interaction.response.send_message("✅ You're already entered.", ephemeral=True)
+        await interaction.response.send_message("🎉 You're entered! Good luck.", ephemeral=True)
+
+    def pick_winners(self, guild, message_id: int, record: dict, count: int, exclude=()) -> tuple[list, int]:
+        """Draw winners who are still in the server. Returns (winner ids, total entries)."""
+        ids = read_entrants(entrants_path(guild.id, message_id))
+        excluded = set(exclude)
+
+        def eligible(uid):
+            return uid not in excluded and guild.get_member(uid) is not None
+
+        mode = record.get("weight")
+        if mode:
+            winners = draw_weighted(ids, entry_weights(guild.id, ids, mode), count, eligible)
+        else:
+            winners = draw(ids, count, eligible)
+        return winners, len(ids)
+
+    async def end(self, guild_id: int, message_id: int):
+        """Close a giveaway, draw its winners and announce them. Safe to call more than once."""
+        record = GIVEAWAYS.partition(guild_id).get(str(message_id))
+        if record is None or record["ended"]:
+            return
+        SCHEDULER.cancel(("giveaway", guild_id, message_id))
+        self.entrants.pop((guild_id, message_id), None)
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            # The bot left the server; keep the record for when (if) it comes back
+            return
+
+        def finish(data: dict) -> dict | None:
+            record = data.get(str(message_id))
+            if record is None or record["ended"]:  # ended on another shard meanwhile
+                return None
+            winners, entries = self.pick_winners(guild, message_id, record, record["winners"])
+            now = int(time.time())
+            record.update(ended=True, ended_at=now, entries=entries, winner_ids=winners)
+            self._prune(guild_id, data, now)
+            return record
+
+        record = await GIVEAWAYS.update(guild_id, finish)
+        if record is not None:
+            await self.announce(guild, message_id, record, record["winner_ids"])
+
+    async def announce(self, guild, message_id: int, record: dict, winners: list, reroll: bool = False):
+        channel = guild.get_channel(record["channel_id"])
+        if channel is None:
+            return
+        if not reroll:
+            try:
+                await channel.get_partial_message(message_id).edit(embed=giveaway_embed(record), view=None)
+            except discord.HTTPException:
+                pass
+        link = message_link(guild.id, record, message_id)
+        if winners:
+            mentions = ", ".join(f"<@{uid}>" for uid in winners)
+            verb = "New winner" if reroll else "Congratulations"
+            await channel.send(f"🎉 {verb} {mentions}! You won **{record['prize']}**\n{link}")
+            for uid in winners:
+                queue_dm(self.bot, uid, f"🎉 You won the giveaway in **{guild.name}**!\n**Prize:** {record['prize']}\n{link}",
+                         guild=guild)
+        else:
+            await channel.send(f"❌ No valid entrants for **{record['prize']}**.\n{link}")
+
+    @staticmethod
+    def _prune(guild_id: int, data: dict, now: int):
+        for message_id, record in list(data.items()):
+            if record["ended"] and now - record.get("ended_at", now) > KEEP_ENDED_SECONDS:
+                del data[message_id]
+                entrants_path(guild_id, message_id).unlink(missing_ok=True)
+
+    def find(self, ctx, message_id: int) -> dict | None:
+        return GIVEAWAYS.partition(ctx.guild.id).get(str(message_id))
+
+    @commands.group(name="giveaway", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def giveaway(self, ctx, duration: str, winners: WinnerCount | None = None,
+                       weight: WeightMode | None = None, *, prize: str):
+        """🎁 Start a giveaway, e.g. `!giveaway 2h 3w by:level VIP Rank`."""
+        seconds = parse_duration(duration)
+        if seconds is None or not MIN_DURATION <= seconds <= MAX_DURATION:
+            return await ctx.send(f"❌ Duration must be between {format_duration(MIN_DURATION)} and "
+                                  f"{format_duration(MAX_DURATION)} (e.g. 30m, 2h, 7d).")
+        winners = winners or 1
+        if not 1 <= winners <= MAX_WINNERS:
+            return await ctx.send(f"❌ Winner count must be between 1 and {MAX_WINNERS}.")
+
+        record = {
+            "channel_id": ctx.channel.id,
+            "host_id": ctx.author.id,
+            "prize": prize,
+            "winners": winners,
+            "ends_at": int(time.time()) + seconds,
+            "ended": False,
+            "winner_ids": [],
+        }
+        if weight:
+            record["weight"] = weight
+        msg = await ctx.send(embed=giveaway_embed(record), view=GiveawayView())
+        await GIVEAWAYS.update(ctx.guild.id, lambda data: data.update({str(msg.id): record}))
+        self.schedule(ctx.guild.id, msg.id, record["ends_at"])
+
+    @giveaway.command(name="end")
+    @commands.has_permissions(administrator=True)
+    async def giveaway_end(self, ctx, message_id: int):
+        """End a giveaway now and draw its winners."""
+        record = self.find(ctx, message_id)
+        if record is None:
+            return await ctx.send("❌ No giveaway with that message ID.")
+        if record["ended"]:
+            return await ctx.send("❌ That giveaway has already ended.")
+        await self.end(ctx.guild.id, message_id)
+        await ctx.message.add_reaction("✅")
+
+    @giveaway.command(name="reroll")
+    @commands.has_permissions(administrator=True)
+    async def giveaway_reroll(self, ctx, message_id: int, count: int = 1):
+        """Draw replacement winners for an ended giveaway."""
+        record = self.find(ctx, message_id)
+        if record is None:
+            return await ctx.send("❌ No giveaway with that message ID (or it has expired).")
+        if not record["ended"]:
+            return await ctx.send("❌ That giveaway is still running.")
+        if not 1 <= count <= MAX_WINNERS:
+            return await ctx.send(f"❌ Winner count must be between 1 and {MAX_WINNERS}.")
+
+        def reroll(data: dict) -> tuple:
+            record = data.get(str(message_id))
+            if record is None:  # pruned on another shard meanwhile
+                return None, []
+            winners, _ = self.pick_winners(ctx.guild, message_id, record, count, exclude=record["winner_ids"])
+            record["winner_ids"] = record["winner_ids"] + winners
+            return record, winners
+
+        record, winners = await GIVEAWAYS.update(ctx.guild.id, reroll)
+        if record is not None:
+            await self.announce(ctx.guild, message_id, record, winners, reroll=True)
+
+    @giveaway.command(name="list")
+    @commands.has_permissions(administrator=True)
+    async def giveaway_list(self, ctx):
+        """List running giveaways."""
+        running = [(mid, r) for mid, r in GIVEAWAYS.partition(ctx.guild.id).items() if not r["ended"]]
+        if not running:
+            return await ctx.send("🎁 No giveaways running.")
+        embed = discord.Embed(title="🎁 Running Giveaways", color=discord.Color.gold())
+        for message_id, record in sorted(running, key=lambda item: item[1]["ends_at"])[:25]:
+            entries = self.entry_count(ctx.guild.id, int(message_id))
+            embed.add_field(
+                name=record["prize"][:256],
+                value=f"Ends <t:{record['ends_at']}:R> · {entries:,} entries · "
+                      f"[jump]({message_link(ctx.guild.id, record, message_id)}) · `{message_id}`",
+                inline=False,
+            )
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Giveaways(bot))
+    # Register the persistent Enter button so it keeps working after a restart
+    bot.add_view(GiveawayView())
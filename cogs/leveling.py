@@ -0,0 +1,186 @@
+import asyncio
+import bisect
+import logging
+import random
+import time
+from collections import OrderedDict
+import discord
+from discord.ext import commands
+from cogs.metrics import CONFIG, REGISTRY
+from cogs.profiles import PROFILES, sync_stats
+from cogs.records import Profile
+from cogs.storage import StaleWriteError
+
+logger = logging.getLogger(__name__)
+
+XP_PER_MESSAGE = (15, 25)
+XP_COOLDOWN = CONFIG.get("xp_cooldown_seconds", 60)
+FLUSH_INTERVAL = CONFIG.get("xp_flush_seconds", 60)
+COOLDOWN_MAX_ENTRIES = 100_000
+MAX_LEVEL = 500
+PREFIX = CONFIG.get("prefix", "!")
+
+
+def xp_for_next(level: int) -> int:
+    """XP needed to go from ``level`` to ``level + 1``."""
+    return 5 * level ** 2 + 50 * level + 100
+
+
+# LEVEL_THRESHOLDS[i] is the total XP at which a player reaches level i + 1
+LEVEL_THRESHOLDS = [0]
+for _level in range(1, MAX_LEVEL):
+    LEVEL_THRESHOLDS.append(LEVEL_THRESHOLDS[-1] + xp_for_next(_level))
+
+
+def level_for(xp: int) -> int:
+    return bisect.bisect_right(LEVEL_THRESHOLDS, xp)
+
+
+class TTLMap:
+    """Insertion-ordered map whose entries expire after ``ttl`` seconds, capped at ``max_entries``.
+
+    Entries are only ever refreshed by re-inserting them at the end, so the oldest is
+    always first and both expiry and the size cap are trimmed from the front.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()  # key -> expiry (monotonic)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        expiry = self._data.get(key)
+        return expiry is not None and expiry > time.monotonic()
+
+    def add(self, key):
+        now = time.monotonic()
+        self._data.pop(key, None)
+        self._data[key] = now + self.ttl
+        while self._data:
+            oldest, expiry = next(iter(self._data.items()))
+            if expiry > now and len(self._data) <= self.max_entries:
+                break
+            del self._data[oldest]
+
+
+class Leveling(commands.Cog):
+    """Message-activity XP. Gains are accumulated in memory and written to profiles in batches."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.cooldowns = TTLMap(XP_COOLDOWN, COOLDOWN_MAX_ENTRIES)
+        self.pending = {}  # guild_id -> {user_id: xp}
+        self.channels = {}  # (guild_id, user_id) -> channel of the latest counted message
+        self._flusher = None
+
+    async def cog_load(self):
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    async def cog_unload(self):
+        if self._flusher:
+            self._flusher.cancel()
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("XP flush failed")
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.author.bot or message.content.startswith(PREFIX):
+            return
+        key = (message.guild.id, message.author.id)
+        if key in self.cooldowns:
+            return
+        self.cooldowns.add(key)
+        guild_pending = self.pending.setdefault(message.guild.id, {})
+        guild_pending[message.author.id] = guild_pending.get(message.author.id, 0) + random.randint(*XP_PER_MESSAGE)
+        self.channels[key] = message.channel
+
+    def pending_xp(self, guild_id: int, user_id: int) -> int:
+        return self.pending.get(guild_id, {}).get(user_id, 0)
+
+    async def flush(self):
+        """Apply pending XP: one partition save per guild, then level-up announcements.
+
+        A guild's level-ups and stats-table rows are only taken from a save that went
+        through; if it keeps losing to other shards, its XP waits for the next flush.
+        """
+        pending, self.pending = self.pending, {}
+        channels, self.channels = self.channels, {}
+        level_ups = []
+        start = time.perf_counter()
+        for guild_id, gains in pending.items():
+            try:
+                awarded = await PROFILES.update(guild_id, lambda data, gains=gains: self._award(data, gains))
+            except StaleWriteError:
+                retry = self.pending.setdefault(guild_id, {})
+                for user_id, xp in gains.items():
+                    retry[user_id] = retry.get(user_id, 0) + xp
+                    if (guild_id, user_id) in channels:
+                        self.channels.setdefault((guild_id, user_id), channels[(guild_id, user_id)])
+                continue
+            for user_id, prof, level in awarded:
+                sync_stats(guild_id, user_id, prof)
+                if level is not None:
+                    level_ups.append((channels.get((guild_id, user_id)), user_id, level))
+            REGISTRY.inc("bot_xp_awarded_total", sum(gains.values()))
+        if pending:
+            REGISTRY.observe("bot_xp_flush_seconds", time.perf_counter() - start)
+        for channel, user_id, level in level_ups:
+            if channel is None:
+                continue
+            try:
+                await channel.send(f"⭐ <@{user_id}> reached **level {level}**!")
+            except discord.HTTPException:
+                pass
+
+    @staticmethod
+    def _award(data: dict, gains: dict) -> list:
+        """Add ``{user_id: xp}`` to the profiles; (user_id, profile, new level or None) per player."""
+        now = int(time.time())
+        awarded = []
+        for user_id, xp in gains.items():
+            prof = data.get(str(user_id))
+            if prof is None:
+                prof = data[str(user_id)] = Profile()
+            prof.xp += xp
+            new_level = level_for(prof.xp)
+            leveled = new_level > prof.level
+            if leveled:
+                prof.level = new_level
+            prof.last_seen = now
+            awarded.append((user_id, prof, new_level if leveled else None))
+        return awarded
+
+    @commands.command(name="rank")
+    async def rank(self, ctx, member: discord.Member = None):
+        """⭐ Show level and XP progress."""
+        member = member or ctx.author
+        prof = PROFILES.partition(ctx.guild.id).get(str(member.id)) or Profile()
+        xp = prof.xp + self.pending_xp(ctx.guild.id, member.id)
+        level = max(prof.level, level_for(xp))
+        floor = LEVEL_THRESHOLDS[min(level, MAX_LEVEL) - 1]
+        needed = xp_for_next(level)
+        progress = max(0.0, min(1.0, (xp - floor) / needed))
+        bar = "█" * int(progress * 10) + "░" * (10 - int(progress * 10))
+
+        embed = discord.Embed(title=f"⭐ {member.name}", color=discord.Color.gold())
+        embed.add_field(name="Level", value=f"**{level}**", inline=True)
+        embed.add_field(name="XP", value=f"**{xp:,}**", inline=True)
+        embed.add_field(name="Next Level", value=f"`{bar}` {max(0, xp - floor):,}/{needed:,}", inline=False)
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Leveling(bot))
@@ -0,0 +1,285 @@
+import functools
+import json
+import logging
+import os
+import time
+from pathlib import Path
+import discord
+from discord.ext import commands
+from aiohttp import web
+
+BASE = Path(__file__).parent.parent
+CONFIG_FILE = BASE / "config.json"
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (Prometheus client defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _load_config() -> dict:
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+CONFIG = _load_config()
+METRICS_HOST = CONFIG.get("metrics_host", "127.0.0.1")
+METRICS_PORT = CONFIG.get("metrics_port", 9108)  # 0 disables the HTTP endpoint
+if METRICS_PORT and os.getenv("WORKER_INDEX"):
+    # Each shard worker process serves its own registry on the next port up
+    METRICS_PORT += int(os.environ["WORKER_INDEX"])
+STAFF_ROLES = CONFIG.get("staff_roles", ["Staff"])
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(LATENCY_BUCKETS)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        target = q * self.count
+        running = 0
+        for i, count in enumerate(self.counts):
+            running += count
+            if count and running >= target:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+        return 0.0
+
+
+class Registry:
+    """In-process metric store: labelled counters, gauges and latency histograms."""
+
+    def __init__(self):
+        self.counters = {}    # (name, labels) -> float
+        self.gauges = {}      # (name, labels) -> float
+        self.histograms = {}  # (name, labels) -> Histogram
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = Histogram()
+        hist.observe(value)
+
+    def render(self) -> str:
+        """Serialize every metric in the Prometheus text exposition format."""
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+            return "{" + body + "}"
+
+        lines = []
+        for kind, store in (("counter", self.counters), ("gauge", self.gauges)):
+            seen = set()
+            for (name, labels), value in sorted(store.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{fmt(labels)} {value}")
+        seen = set()
+        for (name, labels), hist in sorted(self.histograms.items(), key=lambda kv: kv[0]):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            running = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), hist.counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{fmt(labels, [('le', le)])} {running}")
+            lines.append(f"{name}_sum{fmt(labels)} {hist.sum}")
+            lines.append(f"{name}_count{fmt(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def record_storage(op: str, path: Path, seconds: float, nbytes: int):
+    """Called by the JSON helpers in each cog after a read or write."""
+    name = Path(path).name
+    REGISTRY.observe("bot_storage_seconds", seconds, op=op, file=name)
+    REGISTRY.inc("bot_storage_bytes_total", nbytes, op=op, file=name)
+
+
+def instrumented(name: str):
+    """Decorator timing a view/button callback under ``bot_interaction_seconds``."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                REGISTRY.inc("bot_interaction_errors_total", callback=name)
+                raise
+            finally:
+                REGISTRY.observe("bot_interaction_seconds", time.perf_counter() - start, callback=name)
+        return wrapper
+    return decorator
+
+
+class Metrics(commands.Cog):
+    """Command, interaction, storage and gateway metrics with a /metrics endpoint."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.started = time.time()
+        self._runner = None
+        self._tree_on_error = None
+
+    async def cog_load(self):
+        self._wrap_tree_errors()
+        if not METRICS_PORT:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle_metrics)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, METRICS_HOST, METRICS_PORT).start()
+            logger.info("Metrics endpoint listening on http://%s:%s/metrics", METRICS_HOST, METRICS_PORT)
+        except OSError:
+            logger.exception("Failed to bind metrics endpoint on %s:%s", METRICS_HOST, METRICS_PORT)
+
+    async def cog_unload(self):
+        if self._tree_on_error is not None:
+            self.bot.tree.on_error = self._tree_on_error
+            self._tree_on_error = None
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _wrap_tree_errors(self):
+        """Count app command errors, then hand them to the tree's own handler (which logs them)."""
+        tree = getattr(self.bot, "tree", None)
+        if tree is None:
+            return
+        original = self._tree_on_error = tree.on_error
+
+        async def on_error(interaction: discord.Interaction, error: discord.app_commands.AppCommandError):
+            name = f"/{interaction.command.qualified_name}" if interaction.command else "/unknown"
+            REGISTRY.inc("bot_command_errors_total", command=name, error=type(error).__name__)
+            await original(interaction, error)
+
+        tree.on_error = on_error
+
+    def _sample_gauges(self):
+        latency = self.bot.latency
+        if latency == latency and latency != float("inf"):  # NaN/inf before the first heartbeat
+            REGISTRY.set("bot_gateway_latency_seconds", latency)
+        REGISTRY.set("bot_guilds", len(self.bot.guilds))
+        REGISTRY.set("bot_uptime_seconds", time.time() - self.started)
+
+    async def _handle_metrics(self, request):
+        self._sample_gauges()
+        return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx):
+        ctx._metrics_start = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx):
+        start = getattr(ctx, "_metrics_start", None)
+        if start is not None:
+            REGISTRY.observe("bot_command_seconds", time.perf_counter() - start, command=ctx.command.qualified_name)
+        REGISTRY.inc("bot_commands_total", command=ctx.command.qualified_name)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error):
+        name = ctx.command.qualified_name if ctx.command else "unknown"
+        REGISTRY.inc("bot_command_errors_total", command=name, error=type(error).__name__)
+        # Any on_command_error listener switches off discord.py's default handler, so log here
+        if (ctx.command and ctx.command.has_error_handler()) or (ctx.cog and ctx.cog.has_error_handler()):
+            return
+        if isinstance(error, commands.CommandNotFound):
+            return
+        if isinstance(error, commands.CommandInvokeError):
+            logger.error("Ignoring exception in command %s", name, exc_info=error.original)
+        elif isinstance(error, (commands.UserInputError, commands.CheckFailure, commands.CommandOnCooldown)):
+            logger.info("Command %s rejected: %s: %s", name, type(error).__name__, error)
+        else:
+            logger.error("Ignoring exception in command %s", name, exc_info=error)
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        REGISTRY.inc("bot_app_commands_total", command=command.qualified_name)
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        REGISTRY.observe("bot_app_command_seconds", max(0.0, elapsed), command=command.qualified_name)
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if interaction.type == discord.InteractionType.component:
+            custom_id = (interaction.data or {}).get("custom_id", "unknown")
+            REGISTRY.inc("bot_component_interactions_total", custom_id=custom_id)
+
+    @commands.command(name="perf")
+    @commands.has_any_role(*STAFF_ROLES)
+    async def perf(self, ctx):
+        """📉 Performance summary for staff."""
+        self._sample_gauges()
+        embed = discord.Embed(title="📉 Performance", color=discord.Color.blurple())
+        latency = REGISTRY.gauges.get(("bot_gateway_latency_seconds", ()))
+        embed.add_field(name="Gateway", value=f"**{latency * 1000:.0f}ms**" if latency is not None else "n/a", inline=True)
+        embed.add_field(name="Uptime", value=f"**{(time.time() - self.started) / 3600:.1f}h**", inline=True)
+
+        def top(metric, limit=8):
+            rows = [(dict(labels), h) for (name, labels), h in REGISTRY.histograms.items() if name == metric]
+            rows.sort(key=lambda r: r[1].count, reverse=True)
+            return rows[:limit]
+
+        cmd_lines = []
+        for labels, hist in top("bot_command_seconds"):
+            errors = sum(v for (n, l), v in REGISTRY.counters.items()
+                         if n == "bot_command_errors_total" and dict(l).get("command") == labels["command"])
+            cmd_lines.append(
+                f"`{labels['command']}` ×{hist.count} avg {hist.sum / hist.count * 1000:.0f}ms "
+                f"p99 ≤{hist.quantile(0.99) * 1000:.0f}ms" + (f" ⚠️{errors:.0f}" if errors else "")
+            )
+        embed.add_field(name="Commands", value="\n".join(cmd_lines) or "No data", inline=False)
+
+        io_lines = []
+        for labels, hist in top("bot_storage_seconds"):
+            nbytes = REGISTRY.counters.get(("bot_storage_bytes_total", tuple(sorted(labels.items()))), 0)
+            io_lines.append(
+                f"`{labels['file']}` {labels['op']} ×{hist.count} avg {hist.sum / hist.count * 1000:.1f}ms "
+                f"{nbytes / 1024:.0f} KiB"
+            )
+        embed.add_field(name="Storage", value="\n".join(io_lines) or "No data", inline=False)
+        if METRICS_PORT:
+            embed.set_footer(text=f"Full metrics: http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Metrics(bot))
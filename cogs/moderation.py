@@ -3,9 +3,11 @@ import logging
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
+from cogs.metrics import instrumented
+from cogs.outbox import queue_dm
+from cogs.storage import PartitionedStore, StaleWriteError, notify_stale_write
 from pathlib import Path
 from datetime import datetime, timedelta
-import json
 
 BASE = Path(__file__).parent.parent
 MODERATION_FILE = BASE / "data" / "moderation.json"
@@ -13,44 +15,50 @@ APPEALS_FILE = BASE / "data" / "appeals.json"
 
 logger = logging.getLogger(__name__)
 
-# Helper functions
-def load_json(path: Path):
-    if not path.exists():
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
-
-def save_json(path: Path, data):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+CASES = PartitionedStore("moderation", legacy_path=MODERATION_FILE)
+APPEALS = PartitionedStore("appeals", legacy_path=APPEALS_FILE)
+
+
+async def add_case(guild_id: int, case: dict) -> str:
+    """Store a moderation case under the next case number and return that number."""
+    def append(data: dict) -> str:
+        case_id = str(len(data) + 1)
+        data[case_id] = case
+        return case_id
+    return await CASES.update(guild_id, append)
+
 
 # Appeal button view
 class AppealView(View):
-    def __init__(self, case_id: str):
+    def __init__(self, guild_id: int, case_id: str):
         super().__init__(timeout=None)
+        self.guild_id = guild_id
         self.case_id = case_id
 
+    async def on_error(self, interaction: discord.Interaction, error: Exception, item):
+        if isinstance(error, StaleWriteError):
+            return await notify_stale_write(interaction)
+        await super().on_error(interaction, error, item)
+
     @discord.ui.button(label="Appeal Ban", style=discord.ButtonStyle.primary, custom_id=f"appeal_btn")
+    @instrumented("appeal")
     async def appeal_button(self, interaction: discord.Interaction, button: Button):
         """Open appeal form for banned user."""
-        appeals = load_json(APPEALS_FILE)
-        if str(interaction.user.id) in appeals:
+        def submit(appeals: dict) -> bool:
+            if str(interaction.user.id) in appeals:
+                return False
+            appeals[str(interaction.user.id)] = {
+                "case_id": self.case_id,
+                "reason": "Pending",
+                "status": "pending",
+                "submitted_at": datetime.utcnow().isoformat(),
+                "response": None
+            }
+            return True
+
+        if not await APPEALS.update(self.guild_id, submit):
             return await interaction.response.send_message("❌ You already have an active appeal.", ephemeral=True)
-        
-        # Create appeal in data
-        appeals[str(interaction.user.id)] = {
-            "case_id": self.case_id,
-            "reason": "Pending",
-            "status": "pending",
-            "submitted_at": datetime.utcnow().isoformat(),
-            "response": None
-        }
-        save_json(APPEALS_FILE, appeals)
-        
+
         await interaction.response.send_message("✅ Your appeal has been submitted. Please wait for staff review.", ephemeral=True)
 
 
@@ -59,7 +67,10 @@ class Moderation(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
-        MODERATION_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+    async def cog_check(self, ctx):
+        # Banned users can only reach the bot by DM, so !appeal also works outside servers
+        return ctx.guild is not None or ctx.command.name == "appeal"
 
     @commands.command(name="warn")
     @commands.has_permissions(manage_messages=True)
@@ -70,17 +81,13 @@ class Moderation(commands.Cog):
         if member.top_role >= ctx.author.top_role:
             return await ctx.send("❌ You can't warn someone with equal or higher role.")
 
-        mod_data = load_json(MODERATION_FILE)
-        case_id = str(len(mod_data) + 1)
-        
-        mod_data[case_id] = {
+        case_id = await add_case(ctx.guild.id, {
             "type": "warn",
             "user_id": member.id,
             "moderator_id": ctx.author.id,
             "reason": reason,
             "timestamp": datetime.utcnow().isoformat()
-        }
-        save_json(MODERATION_FILE, mod_data)
+        })
 
         embed = discord.Embed(title="⚠️ User Warned", color=discord.Color.orange())
         embed.add_field(name="User", value=member.mention)
@@ -89,10 +96,7 @@ class Moderation(commands.Cog):
         embed.set_footer(text=f"Warned by {ctx.author}")
         
         await ctx.send(embed=embed)
-        try:
-            await member.send(f"⚠️ You were warned in {ctx.guild.name}.\n**Reason:** {reason}")
-        except:
-            pass
+        queue_dm(self.bot, member, f"⚠️ You were warned in {ctx.guild.name}.\n**Reason:** {reason}")
 
     @commands.command(name="mute")
     @commands.has_permissions(manage_roles=True)
@@ -124,9 +128,7 @@ class Moderation(commands.Cog):
 
         await member.add_roles(muted_role)
         
-        mod_data = load_json(MODERATION_FILE)
-        case_id = str(len(mod_data) + 1)
-        mod_data[case_id] = {
+        case_id = await add_case(ctx.guild.id, {
             "type": "mute",
             "user_id": member.id,
             "moderator_id": ctx.author.id,
@@ -134,8 +136,7 @@ class Moderation(commands.Cog):
             "duration": seconds,
             "timestamp": datetime.utcnow().isoformat(),
             "expires_at": (datetime.utcnow() + timedelta(seconds=seconds)).isoformat()
-        }
-        save_json(MODERATION_FILE, mod_data)
+        })
 
         embed = discord.Embed(title="🔇 User Muted", color=discord.Color.red())
         embed.add_field(name="User", value=member.mention)
@@ -161,17 +162,13 @@ class Moderation(commands.Cog):
         if member.top_role >= ctx.author.top_role:
             return await ctx.send("❌ You can't ban someone with equal or higher role.")
 
-        mod_data = load_json(MODERATION_FILE)
-        case_id = str(len(mod_data) + 1)
-        
-        mod_data[case_id] = {
+        case_id = await add_case(ctx.guild.id, {
             "type": "ban",
             "user_id": member.id,
             "moderator_id": ctx.author.id,
             "reason": reason,
             "timestamp": datetime.utcnow().isoformat()
-        }
-        save_json(MODERATION_FILE, mod_data)
+        })
 
         # Send appeal embed before banning
         embed = discord.Embed(
@@ -183,10 +180,11 @@ class Moderation(commands.Cog):
         embed.add_field(name="Case ID", value=f"#{case_id}", inline=True)
         embed.set_footer(text="You can appeal this ban using the button below.")
         
+        # The DM must land before the ban removes our shared guild, but don't wait on it forever
         try:
-            await member.send(embed=embed, view=AppealView(case_id))
-        except:
-            pass
+            await asyncio.wait_for(queue_dm(self.bot, member, embed=embed.copy(), view=AppealView(ctx.guild.id, case_id)), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning("Ban DM to %s still pending after 5s; banning anyway", member.id)
 
         await ctx.guild.ban(member, reason=reason)
         
@@ -204,17 +202,13 @@ class Moderation(commands.Cog):
         if member.top_role >= ctx.author.top_role:
             return await ctx.send("❌ You can't kick someone with equal or higher role.")
 
-        mod_data = load_json(MODERATION_FILE)
-        case_id = str(len(mod_data) + 1)
-        
-        mod_data[case_id] = {
+        case_id = await add_case(ctx.guild.id, {
             "type": "kick",
             "user_id": member.id,
             "moderator_id": ctx.author.id,
             "reason": reason,
             "timestamp": datetime.utcnow().isoformat()
-        }
-        save_json(MODERATION_FILE, mod_data)
+        })
 
         await ctx.guild.kick(member, reason=reason)
         
@@ -230,7 +224,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(manage_messages=True)
     async def cases(self, ctx, member: discord.Member):
         """📋 View moderation cases for a user."""
-        mod_data = load_json(MODERATION_FILE)
+        mod_data = CASES.partition(ctx.guild.id)
         user_cases = [
             (cid, case) for cid, case in mod_data.items()
             if case.get("user_id") == member.id
@@ -252,20 +246,26 @@ class Moderation(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.command(name="appeal")
-    async def appeal(self, ctx):
-        """📝 Check your ban appeal status."""
-        appeals = load_json(APPEALS_FILE)
-        if str(ctx.author.id) not in appeals:
+    async def appeal(self, ctx, guild_id: int = None):
+        """📝 Check your ban appeal status (in DMs, optionally pass the server ID)."""
+        if ctx.guild is not None:
+            guilds = [ctx.guild]
+        else:
+            guilds = [g for g in self.bot.guilds if guild_id is None or g.id == guild_id]
+        found = [(g, APPEALS.partition(g.id).get(str(ctx.author.id))) for g in guilds]
+        found = [(g, appeal) for g, appeal in found if appeal]
+        if not found:
             return await ctx.send("❌ You don't have any active appeals.")
 
-        appeal = appeals[str(ctx.author.id)]
-        embed = discord.Embed(title="📝 Your Appeal", color=discord.Color.blurple())
-        embed.add_field(name="Status", value=appeal["status"].upper(), inline=False)
-        embed.add_field(name="Case ID", value=appeal["case_id"], inline=True)
-        if appeal.get("response"):
-            embed.add_field(name="Response", value=appeal["response"], inline=False)
-        
-        await ctx.send(embed=embed)
+        for guild, appeal in found[:10]:
+            embed = discord.Embed(title="📝 Your Appeal", color=discord.Color.blurple())
+            if ctx.guild is None:
+                embed.add_field(name="Server", value=guild.name, inline=False)
+            embed.add_field(name="Status", value=appeal["status"].upper(), inline=False)
+            embed.add_field(name="Case ID", value=appeal["case_id"], inline=True)
+            if appeal.get("response"):
+                embed.add_field(name="Response", value=appeal["response"], inline=False)
+            await ctx.send(embed=embed)
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+import discord
+from discord.ext import commands
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 4
+MAX_QUEUE = 5000
+MAX_ATTEMPTS = 3
+# How long to remember that a user has DMs closed before trying them again
+CLOSED_DM_TTL = 6 * 3600
+CLOSED_DM_SWEEP_INTERVAL = 600  # seconds between purges of expired closed-DM entries
+
+
+class Outbox(commands.Cog):
+    """Background DM dispatcher.
+
+    Commands enqueue direct messages and return immediately; a small worker pool
+    delivers them with bounded concurrency, retries rate limits and server errors
+    and skips users whose DMs were recently found to be closed.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.queue = asyncio.Queue(maxsize=MAX_QUEUE)
+        self.closed_dms = {}  # user_id -> epoch when the entry expires
+        self._last_sweep = time.time()
+        self.sent = 0
+        self.failed = 0
+        self._workers = []
+
+    async def cog_load(self):
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(WORKERS)]
+
+    async def cog_unload(self):
+        for task in self._workers:
+            task.cancel()
+        self._workers = []
+
+    def sweep_closed_dms(self, now: float):
+        """Forget every expired closed-DM entry, not just the ones that get looked up again."""
+        self._last_sweep = now
+        for user_id in [uid for uid, expires in self.closed_dms.items() if expires < now]:
+            del self.closed_dms[user_id]
+
+    def dms_closed(self, user_id: int) -> bool:
+        now = time.time()
+        if now - self._last_sweep > CLOSED_DM_SWEEP_INTERVAL:
+            self.sweep_closed_dms(now)
+        expires = self.closed_dms.get(user_id)
+        if expires is None:
+            return False
+        if expires < now:
+            self.closed_dms.pop(user_id, None)
+            return False
+        return True
+
+    def enqueue(self, user, content: str = None, *, guild: discord.Guild = None, **kwargs) -> asyncio.Future:
+        """Queue a DM to a user (object or ID). Returns a future resolving to True once delivered."""
+        future = asyncio.get_running_loop().create_future()
+        user_id = user if isinstance(user, int) else user.id
+        if self.dms_closed(user_id):
+            future.set_result(False)
+            return future
+        try:
+            self.queue.put_nowait((user, guild, content, kwargs, future))
+        except asyncio.QueueFull:
+            logger.warning("DM outbox full; dropping DM to %s", user_id)
+            future.set_result(False)
+        return future
+
+    async def _resolve(self, user, guild):
+        """Prefer cached users/members and only fall back to a REST fetch."""
+        if not isinstance(user, int):
+            return user
+        cached = (guild.get_member(user) if guild else None) or self.bot.get_user(user)
+        if cached:
+            return cached
+        return await self.bot.fetch_user(user)
+
+    async def _deliver(self, user, guild, content, kwargs) -> bool:
+        target = await self._resolve(user, guild)
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await target.send(content, **kwargs)
+                return True
+            except discord.Forbidden:
+                self.closed_dms[target.id] = time.time() + CLOSED_DM_TTL
+                return False
+            except discord.HTTPException as e:
+                # Only rate limits and server errors are worth retrying; other 4xx won't change
+                if attempt == MAX_ATTEMPTS or not (e.status == 429 or e.status >= 500):
+                    raise
+                await asyncio.sleep(2 ** attempt)
+        return False
+
+    async def _worker(self, index: int):
+        while True:
+            user, guild, content, kwargs, future = await self.queue.get()
+            try:
+                delivered = await self._deliver(user, guild, content, kwargs)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to deliver DM to %s", getattr(user, "id", user))
+                delivered = False
+            finally:
+                self.queue.task_done()
+            if delivered:
+                self.sent += 1
+            else:
+                self.failed += 1
+            if not future.done():
+                future.set_result(delivered)
+
+
+_fallback_sends = set()  # keeps fire-and-forget sends alive until they finish
+
+
+def queue_dm(bot, user, content: str = None, **kwargs) -> asyncio.Future:
+    """Queue a DM through the Outbox cog, falling back to a fire-and-forget send if it isn't loaded."""
+    outbox = bot.get_cog("Outbox")
+    if outbox is not None:
+        return outbox.enqueue(user, content, **kwargs)
+
+    async def _send():
+        kwargs.pop("guild", None)
+        try:
+            target = user if not isinstance(user, int) else (bot.get_user(user) or await bot.fetch_user(user))
+            await target.send(content, **kwargs)
+            return True
+        except Exception:
+            return False
+    task = asyncio.ensure_future(_send())
+    _fallback_sends.add(task)
+    task.add_done_callback(_fallback_sends.discard)
+    return task
+
+
+async def setup(bot):
+    await bot.add_cog(Outbox(bot))
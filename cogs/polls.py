@@ -0,0 +1,310 @@
+import logging
+import re
+import struct
+import time
+from pathlib import Path
+import discord
+from discord.ext import commands
+from discord.ui import Button, View
+from cogs.cooldowns import format_duration, parse_duration
+from cogs.metrics import CONFIG
+from cogs.scheduler import SCHEDULER
+from cogs.storage import PartitionedStore, partition_path
+
+logger = logging.getLogger(__name__)
+
+# The live results embed is edited at most this often, however fast votes come in
+REFRESH_SECONDS = CONFIG.get("poll_refresh_seconds", 5)
+MAX_OPTIONS = 5
+MAX_DURATION = 30 * 86400
+KEEP_CLOSED_SECONDS = 30 * 86400
+DEFAULT_OPTIONS = ["👍 Yes", "👎 No", "🤷 Maybe"]
+VOTE = struct.Struct("<QB")  # user id, option index (RETRACTED = vote withdrawn)
+RETRACTED = 255
+
+POLLS = PartitionedStore("polls")
+
+
+def votes_path(guild_id: int, message_id: int) -> Path:
+    return partition_path(guild_id, f"polls/{message_id}.votes")
+
+
+class PollTally:
+    """Current vote of every voter in one open poll, plus per-option counts.
+
+    Every vote change is appended to ``data/guilds/<guild_id>/polls/<message_id>.votes``
+    as a 9-byte record and the file is replayed (last vote wins) when the poll is first
+    touched after a restart. Counts are kept up to date on each vote, so rendering the
+    results never walks the voters.
+    """
+
+    def __init__(self, path: Path, options: int):
+        self.path = path
+        self.votes = {}  # user_id -> option index
+        self.counts = [0] * options
+        if path.exists():
+            raw = path.read_bytes()
+            for user_id, option in VOTE.iter_unpack(raw[:len(raw) - len(raw) % VOTE.size]):
+                if option == RETRACTED:
+                    self.votes.pop(user_id, None)
+                elif option < options:
+                    self.votes[user_id] = option
+            for option in self.votes.values():
+                self.counts[option] += 1
+
+    def vote(self, user_id: int, option: int) -> int | None:
+        """Vote for ``option``; voting for your current option withdraws the vote.
+
+        Returns the user's option afterwards (None if withdrawn).
+        """
+        previous = self.votes.get(user_id)
+        if previous is not None:
+            self.counts[previous] -= 1
+        if previous == option:
+            del self.votes[user_id]
+            new = None
+        else:
+            self.votes[user_id] = option
+            self.counts[option] += 1
+            new = option
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(VOTE.pack(user_id, RETRACTED if new is None else new))
+        return new
+
+
+class PollDuration(commands.Converter):
+    """``30m``/``2h``/``1d`` -> seconds. A bare number isn't a duration, so it stays in the question."""
+
+    async def convert(self, ctx, argument: str) -> int:
+        if not re.fullmatch(r"\d+[smhdw]", argument.lower()):
+            raise commands.BadArgument("Duration must look like 30m, 2h or 1d")
+        return parse_duration(argument)
+
+
+def poll_embed(record: dict, counts: list) -> discord.Embed:
+    total = sum(counts)
+    closed = record["closed"]
+    embed = discord.Embed(title=f"📊 {record['question'][:240]}",
+                          color=discord.Color.dark_grey() if closed else discord.Color.blurple())
+    lines = []
+    for option, count in zip(record["options"], counts):
+        share = count / total if total else 0.0
+        bar = "█" * round(share * 10) + "░" * (10 - round(share * 10))
+        lines.append(f"**{option}**\n`{bar}` {count:,} ({share:.0%})")
+    embed.description = "\n".join(lines)
+    if closed:
+        status = "Poll closed"
+    elif record.get("ends_at"):
+        status = f"Closes <t:{record['ends_at']}:R>"
+    else:
+        status = "Open until closed with !endpoll"
+    embed.add_field(name="Votes", value=f"{total:,}", inline=True)
+    embed.add_field(name="Status", value=status, inline=True)
+    if not closed:
+        embed.set_footer(text="Click your option again to withdraw your vote")
+    return embed
+
+
+class VoteButton(Button):
+    def __init__(self, index: int, label: str | None = None):
+        super().__init__(label=(label or f"Option {index + 1}")[:80], style=discord.ButtonStyle.primary,
+                         custom_id=f"poll_vote_v1_{index}")
+        self.index = index
+
+    async def callback(self, interaction: discord.Interaction):
+        cog = interaction.client.get_cog("Polls")
+        if cog is None:
+            return await interaction.response.send_message("❌ Polls are unavailable right now.", ephemeral=True)
+        await cog.vote(interaction, self.index)
+
+
+class PollView(View):
+    """Vote buttons. Without ``options`` it is the catch-all registered at startup, so the
+    buttons on every poll message keep working after a restart."""
+
+    def __init__(self, options: list | None = None):
+        super().__init__(timeout=None)
+        for i in range(len(options) if options else MAX_OPTIONS):
+            self.add_item(VoteButton(i, options[i] if options else None))
+
+
+class Polls(commands.Cog):
+    """Button polls with persistent records, in-memory tallies and rate-limited result edits."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.tallies = {}    # (guild_id, message_id) -> PollTally, open polls only
+        self.last_edit = {}  # (guild_id, message_id) -> epoch of the last results edit
+        self.closing = set()  # (guild_id, message_id) of polls being closed: votes are refused
+
+    async def cog_load(self):
+        if self.bot.is_ready():
+            self.schedule_all()
+
+    async def cog_unload(self):
+        SCHEDULER.cancel_owner("poll")
+
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.schedule_all()
+
+    def schedule_all(self):
+        for guild in self.bot.guilds:
+            for message_id, record in POLLS.partition(guild.id).items():
+                if not record["closed"] and record.get("ends_at"):
+                    self.schedule_close(guild.id, int(message_id), record["ends_at"])
+
+    def schedule_close(self, guild_id: int, message_id: int, ends_at: int):
+        SCHEDULER.schedule(("poll", guild_id, message_id, "close"), ends_at, lambda: self.close(guild_id, message_id))
+
+    def tally(self, guild_id: int, message_id: int, record: dict) -> PollTally:
+        tally = self.tallies.get((guild_id, message_id))
+        if tally is None:
+            tally = self.tallies[(guild_id, message_id)] = PollTally(
+                votes_path(guild_id, message_id), len(record["options"])
+            )
+        return tally
+
+    async def vote(self, interaction: discord.Interaction, option: int):
+        guild_id, message_id = interaction.guild_id, interaction.message.id
+        record = POLLS.partition(guild_id).get(str(message_id))
+        if record is None or record["closed"] or (guild_id, message_id) in self.closing:
+            return await interaction.response.send_message("❌ This poll is closed.", ephemeral=True)
+        if option >= len(record["options"]):
+            return await interaction.response.send_message("❌ That option no longer exists.", ephemeral=True)
+        choice = self.tally(guild_id, message_id, record).vote(interaction.user.id, option)
+        self.mark_dirty(guild_id, message_id)
+        if choice is None:
+            await interaction.response.send_message("🗳️ Vote withdrawn.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"🗳️ You voted for **{record['options'][choice]}**.", ephemeral=True)
+
+    def mark_dirty(self, guild_id: int, message_id: int):
+        """Queue a results edit unless one is already queued: at most one per REFRESH_SECONDS."""
+        key = ("poll", guild_id, message_id, "refresh")
+        if SCHEDULER.due_at(key) is None:
+            when = max(time.time(), self.last_edit.get((guild_id, message_id), 0) + REFRESH_SECONDS)
+            SCHEDULER.schedule(key, when, lambda: self.refresh(guild_id, message_id))
+
+    async def refresh(self, guild_id: int, message_id: int):
+        record = POLLS.partition(guild_id).get(str(message_id))
+        tally = self.tallies.get((guild_id, message_id))
+        if record is None or record["closed"] or tally is None:
+            return
+        self.last_edit[(guild_id, message_id)] = time.time()
+        await self.edit_results(guild_id, message_id, record, tally.counts)
+
+    async def edit_results(self, guild_id: int, message_id: int, record: dict, counts: list, final: bool = False):
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(record["channel_id"]) if guild else None
+        if channel is None:
+            return
+        kwargs = {"embed": poll_embed(record, counts)}
+        if final:
+            kwargs["view"] = None
+        try:
+            await channel.get_partial_message(message_id).edit(**kwargs)
+        except discord.HTTPException:
+            logger.warning("Couldn't update poll %s in guild %s", message_id, guild_id)
+
+    async def close(self, guild_id: int, message_id: int) -> dict | None:
+        """Freeze the final counts into the record and drop the votes file. Safe to call twice.
+
+        Returns the closed record, or None if there was no open poll to close.
+        """
+        key = (guild_id, message_id)
+        record = POLLS.partition(guild_id).get(str(message_id))
+        if record is None or record["closed"] or key in self.closing:
+            return None
+        # From here on votes are refused, so none can land after the counts are frozen
+        self.closing.add(key)
+        try:
+            return await self._close(guild_id, message_id, record)
+        finally:
+            self.closing.discard(key)
+
+    async def _close(self, guild_id: int, message_id: int, record: dict) -> dict | None:
+        SCHEDULER.cancel(("poll", guild_id, message_id, "close"))
+        SCHEDULER.cancel(("poll", guild_id, message_id, "refresh"))
+        tally = self.tallies.pop((guild_id, message_id), None) or PollTally(
+            votes_path(guild_id, message_id), len(record["options"])
+        )
+        self.last_edit.pop((guild_id, message_id), None)
+
+        def freeze(data: dict) -> dict | None:
+            record = data.get(str(message_id))
+            if record is None or record["closed"]:  # closed on another shard meanwhile
+                return None
+            now = int(time.time())
+            record.update(closed=True, closed_at=now, counts=tally.counts, voters=len(tally.votes))
+            self._prune(data, now)
+            return record
+
+        record = await POLLS.update(guild_id, freeze)
+        if record is None:
+            return None
+        votes_path(guild_id, message_id).unlink(missing_ok=True)
+        await self.edit_results(guild_id, message_id, record, tally.counts, final=True)
+        return record
+
+    @staticmethod
+    def _prune(data: dict, now: int):
+        for message_id, record in list(data.items()):
+            if record["closed"] and now - record.get("closed_at", now) > KEEP_CLOSED_SECONDS:
+                del data[message_id]
+
+    @commands.command(name="poll")
+    async def poll(self, ctx, duration: PollDuration | None = None, *, question: str):
+        """📊 Create a poll: `!poll [2h] Question | Option 1 | Option 2 ...` (yes/no/maybe by default)."""
+        parts = [p.strip() for p in question.split("|")]
+        question, options = parts[0], [p for p in parts[1:] if p]
+        options = options or DEFAULT_OPTIONS
+        if not question:
+            return await ctx.send("❌ Please give the poll a question.")
+        if not 2 <= len(options) <= MAX_OPTIONS:
+            return await ctx.send(f"❌ Polls need between 2 and {MAX_OPTIONS} options.")
+        if duration is not None and not 60 <= duration <= MAX_DURATION:
+            return await ctx.send(f"❌ Duration must be between 1m and {format_duration(MAX_DURATION)}.")
+
+        record = {
+            "channel_id": ctx.channel.id,
+            "author_id": ctx.author.id,
+            "question": question,
+            "options": options,
+            "ends_at": int(time.time()) + duration if duration else None,
+            "closed": False,
+        }
+        msg = await ctx.send(embed=poll_embed(record, [0] * len(options)))
+        await POLLS.update(ctx.guild.id, lambda data: data.update({str(msg.id): record}))
+        if duration:
+            self.schedule_close(ctx.guild.id, msg.id, record["ends_at"])
+        # The buttons go on once the record is saved, so an early click can't find no poll
+        try:
+            await msg.edit(view=PollView(options))
+        except discord.HTTPException:
+            logger.warning("Couldn't add vote buttons to poll %s in guild %s", msg.id, ctx.guild.id)
+
+    @commands.command(name="endpoll")
+    async def endpoll(self, ctx, message_id: int):
+        """📊 Close a poll now (its creator or anyone with Manage Messages)."""
+        record = POLLS.partition(ctx.guild.id).get(str(message_id))
+        if record is None:
+            return await ctx.send("❌ No poll with that message ID.")
+        if record["author_id"] != ctx.author.id and not ctx.author.guild_permissions.manage_messages:
+            return await ctx.send("❌ Only the poll's creator or a moderator can close it.")
+        if record["closed"]:
+            return await ctx.send("❌ That poll is already closed.")
+        record = await self.close(ctx.guild.id, message_id)
+        if record is None:
+            return await ctx.send("❌ That poll is already closed.")
+        await ctx.send(f"📊 Poll closed: **{record['question'][:200]}** ({record['voters']:,} voters)")
+
+
+async def setup(bot):
+    await bot.add_cog(Polls(bot))
+    # Catch-all vote buttons so polls keep working after a restart
+    bot.add_view(PollView())
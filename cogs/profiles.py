@@ -1,87 +1,143 @@
 import discord
 from discord.ext import commands
+from cogs.outbox import queue_dm
+from cogs.records import Profile
+from cogs.storage import PartitionedStore
 from pathlib import Path
-from datetime import datetime
-import json
+import time
+
+try:
+    import numpy as np
+except ImportError:  # !serverstats is unavailable without numpy
+    np = None
 
 BASE = Path(__file__).parent.parent
 PROFILES_FILE = BASE / "data" / "profiles.json"
 
 logger = __import__("logging").getLogger(__name__)
 
-def load_json(path: Path):
-    if not path.exists():
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+PROFILES = PartitionedStore("profiles", legacy_path=PROFILES_FILE, record_type=Profile)
+
+STAT_COLUMNS = ("kills", "deaths", "playtime_hours", "level")
+KD_BUCKETS = (0.5, 1.0, 2.0, 5.0)  # upper bounds; the last bucket is open-ended
+
+
+class StatsTable:
+    """Column-per-stat copy of a guild's profiles for vectorized aggregates.
+
+    Rows are assigned densely as players appear (``index`` maps user id -> row) and the
+    columns grow by doubling. ``source`` is the partition dict the table was built from,
+    so a reload of the partition is detected and the table rebuilt; tables are dropped
+    from ``STATS_TABLES`` when PROFILES evicts or invalidates their partition.
+    """
+
+    def __init__(self, source: dict):
+        self.source = source
+        self.user_ids = list(source)
+        self.index = {uid: row for row, uid in enumerate(self.user_ids)}
+        capacity = max(1024, 2 * len(source))
+        profiles = list(source.values())
+        self.columns = {}
+        for name in STAT_COLUMNS:
+            column = self.columns[name] = np.zeros(capacity, dtype=np.int64)
+            column[:len(profiles)] = np.fromiter((getattr(p, name) for p in profiles), dtype=np.int64, count=len(profiles))
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def set_row(self, uid: str, prof: Profile):
+        row = self.index.get(uid)
+        if row is None:
+            row = self.index[uid] = len(self.user_ids)
+            self.user_ids.append(uid)
+            if row >= len(self.columns["kills"]):
+                for name, column in self.columns.items():
+                    self.columns[name] = np.concatenate([column, np.zeros(len(column), dtype=np.int64)])
+        for name in STAT_COLUMNS:
+            self.columns[name][row] = getattr(prof, name)
+
+    def column(self, name: str):
+        return self.columns[name][:len(self.user_ids)]
+
+    def top(self, name: str, n: int = 3) -> list:
+        """(user id, value) for the n highest rows, without sorting the whole column."""
+        values = self.column(name)
+        n = min(n, len(values))
+        if not n:
+            return []
+        rows = np.argpartition(values, -n)[-n:]
+        rows = rows[np.argsort(values[rows])[::-1]]
+        return [(self.user_ids[r], int(values[r])) for r in rows]
+
+
+STATS_TABLES = {}  # guild_id -> StatsTable
+# A table holds its partition, so let it go with the partition
+PROFILES.on_drop(lambda guild_id: STATS_TABLES.pop(guild_id, None))
+
+
+def stats_table(guild_id: int) -> StatsTable:
+    data = PROFILES.partition(guild_id)
+    table = STATS_TABLES.get(guild_id)
+    if table is None or table.source is not data:
+        table = STATS_TABLES[guild_id] = StatsTable(data)
+    return table
+
+
+def sync_stats(guild_id: int, user_id: int, prof: Profile):
+    """Mirror a profile change into the guild's stats table, if one has been built."""
+    table = STATS_TABLES.get(guild_id)
+    if table is not None and table.source is PROFILES.partition(guild_id):
+        table.set_row(str(user_id), prof)
 
-def save_json(path: Path, data):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
 
 class Profiles(commands.Cog):
     """Player profiles and stats tracking."""
     
     def __init__(self, bot):
         self.bot = bot
-        PROFILES_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    def get_profile(self, user_id: int) -> dict:
-        """Get or create player profile."""
-        data = load_json(PROFILES_FILE)
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    def get_profile(self, guild_id: int, user_id: int) -> Profile:
+        """Get or create player profile (not saved until it changes)."""
+        data = PROFILES.partition(guild_id)
         uid = str(user_id)
         if uid not in data:
-            data[uid] = {
-                "username": "",
-                "minecraft_uuid": "",
-                "kills": 0,
-                "deaths": 0,
-                "playtime_hours": 0,
-                "level": 1,
-                "achievements": [],
-                "first_seen": datetime.utcnow().isoformat(),
-                "last_seen": datetime.utcnow().isoformat()
-            }
-            save_json(PROFILES_FILE, data)
+            data[uid] = Profile()
+            sync_stats(guild_id, user_id, data[uid])
         return data[uid]
 
-    def update_stat(self, user_id: int, stat: str, amount: int):
+    async def update_stat(self, guild_id: int, user_id: int, stat: str, amount: int):
         """Update a player stat."""
-        data = load_json(PROFILES_FILE)
-        uid = str(user_id)
-        if uid not in data:
-            self.get_profile(user_id)
-            data = load_json(PROFILES_FILE)
-        data[uid][stat] = data[uid].get(stat, 0) + amount
-        data[uid]["last_seen"] = datetime.utcnow().isoformat()
-        save_json(PROFILES_FILE, data)
+        def add(data) -> Profile:
+            prof = self.get_profile(guild_id, user_id)
+            prof.add(stat, amount)
+            prof.last_seen = int(time.time())
+            return prof
+        prof = await PROFILES.update(guild_id, add)
+        if stat in STAT_COLUMNS:
+            sync_stats(guild_id, user_id, prof)
 
     @commands.command(name="profile")
     async def profile(self, ctx, member: discord.Member = None):
         """👤 View player profile."""
         member = member or ctx.author
-        prof = self.get_profile(member.id)
-
-        # Calculate K/D ratio
-        kd_ratio = prof["kills"] / max(1, prof["deaths"])
+        prof = self.get_profile(ctx.guild.id, member.id)
 
         embed = discord.Embed(title=f"👤 {member.name}'s Profile", color=discord.Color.blurple())
         embed.set_thumbnail(url=member.avatar.url if member.avatar else None)
         
-        embed.add_field(name="Level", value=f"**{prof['level']}**", inline=True)
-        embed.add_field(name="Playtime", value=f"**{prof['playtime_hours']}h**", inline=True)
-        embed.add_field(name="Joined", value=f"<t:{int(datetime.fromisoformat(prof['first_seen']).timestamp())}:d>", inline=True)
+        embed.add_field(name="Level", value=f"**{prof.level}**", inline=True)
+        embed.add_field(name="Playtime", value=f"**{prof.playtime_hours}h**", inline=True)
+        embed.add_field(name="Joined", value=f"<t:{prof.first_seen}:d>", inline=True)
         
-        embed.add_field(name="Kills", value=f"**{prof['kills']}**", inline=True)
-        embed.add_field(name="Deaths", value=f"**{prof['deaths']}**", inline=True)
-        embed.add_field(name="K/D Ratio", value=f"**{kd_ratio:.2f}**", inline=True)
+        embed.add_field(name="Kills", value=f"**{prof.kills}**", inline=True)
+        embed.add_field(name="Deaths", value=f"**{prof.deaths}**", inline=True)
+        embed.add_field(name="K/D Ratio", value=f"**{prof.kd_ratio:.2f}**", inline=True)
 
-        if prof.get("achievements"):
-            achievements_str = ", ".join(prof["achievements"][:5])
+        if prof.achievements:
+            achievements_str = ", ".join(prof.achievements[:5])
             embed.add_field(name="Achievements", value=achievements_str, inline=False)
 
         await ctx.send(embed=embed)
@@ -90,26 +146,26 @@ class Profiles(commands.Cog):
     async def stats(self, ctx, member: discord.Member = None):
         """📊 View detailed player stats."""
         member = member or ctx.author
-        prof = self.get_profile(member.id)
+        prof = self.get_profile(ctx.guild.id, member.id)
 
         embed = discord.Embed(title=f"📊 Stats - {member.name}", color=discord.Color.gold())
-        embed.add_field(name="💀 Kills", value=f"**{prof['kills']:,}**", inline=True)
-        embed.add_field(name="⚰️ Deaths", value=f"**{prof['deaths']:,}**", inline=True)
-        embed.add_field(name="📈 K/D", value=f"**{prof['kills'] / max(1, prof['deaths']):.2f}**", inline=True)
+        embed.add_field(name="💀 Kills", value=f"**{prof.kills:,}**", inline=True)
+        embed.add_field(name="⚰️ Deaths", value=f"**{prof.deaths:,}**", inline=True)
+        embed.add_field(name="📈 K/D", value=f"**{prof.kd_ratio:.2f}**", inline=True)
         
-        embed.add_field(name="⏱️ Playtime", value=f"**{prof['playtime_hours']:,}** hours", inline=True)
-        embed.add_field(name="⭐ Level", value=f"**{prof['level']}**", inline=True)
-        embed.add_field(name="🏅 Achievements", value=f"**{len(prof.get('achievements', []))}**", inline=True)
+        embed.add_field(name="⏱️ Playtime", value=f"**{prof.playtime_hours:,}** hours", inline=True)
+        embed.add_field(name="⭐ Level", value=f"**{prof.level}**", inline=True)
+        embed.add_field(name="🏅 Achievements", value=f"**{len(prof.achievements)}**", inline=True)
 
         await ctx.send(embed=embed)
 
     @commands.command(name="leaderboard_kills")
     async def leaderboard_kills(self, ctx):
         """🏆 Top killers."""
-        data = load_json(PROFILES_FILE)
+        data = PROFILES.partition(ctx.guild.id)
         sorted_players = sorted(
             data.items(),
-            key=lambda x: x[1].get("kills", 0),
+            key=lambda x: x[1].kills,
             reverse=True
         )[:10]
 
@@ -118,17 +174,17 @@ class Profiles(commands.Cog):
             member = ctx.guild.get_member(int(uid))
             name = member.mention if member else f"<@{uid}>"
             emoji = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
-            embed.add_field(name=f"{emoji} {name}", value=f"**{prof['kills']:,}** kills", inline=False)
+            embed.add_field(name=f"{emoji} {name}", value=f"**{prof.kills:,}** kills", inline=False)
 
         await ctx.send(embed=embed)
 
     @commands.command(name="leaderboard_playtime")
     async def leaderboard_playtime(self, ctx):
         """⏱️ Most active players."""
-        data = load_json(PROFILES_FILE)
+        data = PROFILES.partition(ctx.guild.id)
         sorted_players = sorted(
             data.items(),
-            key=lambda x: x[1].get("playtime_hours", 0),
+            key=lambda x: x[1].playtime_hours,
             reverse=True
         )[:10]
 
@@ -137,33 +193,70 @@ class Profiles(commands.Cog):
             member = ctx.guild.get_member(int(uid))
             name = member.mention if member else f"<@{uid}>"
             emoji = "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else f"{rank}."
-            embed.add_field(name=f"{emoji} {name}", value=f"**{prof['playtime_hours']:,}h** playtime", inline=False)
+            embed.add_field(name=f"{emoji} {name}", value=f"**{prof.playtime_hours:,}h** playtime", inline=False)
 
         await ctx.send(embed=embed)
 
+    @commands.command(name="serverstats")
+    async def serverstats(self, ctx):
+        """📈 Server-wide player statistics."""
+        if np is None:
+            return await ctx.send("❌ `!serverstats` needs numpy (`pip install numpy`).")
+        start = time.perf_counter()
+        table = stats_table(ctx.guild.id)
+        if not len(table):
+            return await ctx.send("❌ No player profiles yet.")
+
+        kills, deaths = table.column("kills"), table.column("deaths")
+        playtime, level = table.column("playtime_hours"), table.column("level")
+        kd = kills / np.maximum(deaths, 1)
+        kd_counts = np.bincount(np.searchsorted(KD_BUCKETS, kd, side="right"), minlength=len(KD_BUCKETS) + 1)
+
+        embed = discord.Embed(title="📈 Server Stats", color=discord.Color.blurple())
+        embed.add_field(name="👥 Players", value=f"**{len(table):,}**", inline=True)
+        embed.add_field(name="💀 Kills", value=f"**{int(kills.sum()):,}**", inline=True)
+        embed.add_field(name="⚰️ Deaths", value=f"**{int(deaths.sum()):,}**", inline=True)
+        embed.add_field(name="⏱️ Playtime", value=f"**{int(playtime.sum()):,}h**", inline=True)
+        embed.add_field(name="⭐ Avg Level", value=f"**{level.mean():.1f}**", inline=True)
+        embed.add_field(name="📈 Server K/D", value=f"**{kills.sum() / max(1, deaths.sum()):.2f}**", inline=True)
+
+        lines = []
+        for label, column in (("Kills", kills), ("Playtime", playtime), ("Level", level), ("K/D", kd)):
+            p50, p90, p99 = np.percentile(column, (50, 90, 99))
+            lines.append(f"**{label}** p50 {p50:,.1f} · p90 {p90:,.1f} · p99 {p99:,.1f}")
+        embed.add_field(name="Percentiles", value="\n".join(lines), inline=False)
+
+        bounds = (0,) + KD_BUCKETS
+        labels = [f"{lo:g}–{hi:g}" for lo, hi in zip(bounds, KD_BUCKETS)] + [f"{KD_BUCKETS[-1]:g}+"]
+        embed.add_field(name="K/D Distribution", value="\n".join(
+            f"`{label:>7}` {count:,} ({count / len(table):.0%})" for label, count in zip(labels, kd_counts.tolist())
+        ), inline=False)
+
+        for label, name, unit in (("🏆 Top Kills", "kills", ""), ("⏱️ Top Playtime", "playtime_hours", "h"), ("⭐ Top Level", "level", "")):
+            embed.add_field(name=label, value="\n".join(
+                f"<@{uid}> {value:,}{unit}" for uid, value in table.top(name)
+            ), inline=True)
+
+        embed.set_footer(text=f"Computed in {(time.perf_counter() - start) * 1000:.1f}ms")
+        await ctx.send(embed=embed)
+
     @commands.command(name="achievement")
     @commands.has_permissions(administrator=True)
     async def achievement(self, ctx, member: discord.Member, *, achievement: str):
         """🏅 Give an achievement to a player."""
-        data = load_json(PROFILES_FILE)
-        uid = str(member.id)
-        if uid not in data:
-            self.get_profile(member.id)
-            data = load_json(PROFILES_FILE)
-        
-        if achievement not in data[uid]["achievements"]:
-            data[uid]["achievements"].append(achievement)
-            save_json(PROFILES_FILE, data)
+        def award(data) -> bool:
+            prof = self.get_profile(ctx.guild.id, member.id)
+            if achievement in prof.achievements:
+                return False
+            prof.achievements = [*prof.achievements, achievement]
+            return True
 
+        if await PROFILES.update(ctx.guild.id, award):
             embed = discord.Embed(title="🏅 Achievement Unlocked!", color=discord.Color.gold())
             embed.add_field(name="Player", value=member.mention)
             embed.add_field(name="Achievement", value=achievement, inline=False)
             await ctx.send(embed=embed)
-            
-            try:
-                await member.send(f"🏅 **Achievement Unlocked:** {achievement}")
-            except:
-                pass
+            queue_dm(self.bot, member, f"🏅 **Achievement Unlocked:** {achievement}")
         else:
             await ctx.send(f"ℹ️ {member.mention} already has this achievement.")
 
@@ -0,0 +1,156 @@
+import time
+from datetime import datetime, timezone
+
+
+def to_epoch(value) -> int | None:
+    """Integer UTC epoch seconds from an epoch number or a legacy ISO string (naive = UTC)."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+class Profile:
+    """One player's profile. Timestamps are integer epoch seconds."""
+
+    __slots__ = ("username", "minecraft_uuid", "kills", "deaths", "playtime_hours", "level", "xp",
+                 "achievements", "first_seen", "last_seen", "extra")
+    COUNTERS = ("kills", "deaths", "playtime_hours", "level", "xp")
+
+    def __init__(self, now: int | None = None):
+        now = now if now is not None else int(time.time())
+        self.username = ""
+        self.minecraft_uuid = ""
+        self.kills = 0
+        self.deaths = 0
+        self.playtime_hours = 0
+        self.level = 1
+        self.xp = 0
+        self.achievements = ()  # shared empty tuple until the first achievement
+        self.first_seen = now
+        self.last_seen = now
+        self.extra = None  # stats without a dedicated slot, kept so nothing is lost on save
+
+    @property
+    def kd_ratio(self) -> float:
+        return self.kills / max(1, self.deaths)
+
+    def add(self, stat: str, amount: int):
+        if stat in self.COUNTERS:
+            setattr(self, stat, getattr(self, stat) + amount)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[stat] = self.extra.get(stat, 0) + amount
+
+    def get(self, stat: str, default=0):
+        if stat in self.__slots__ and stat != "extra":
+            return getattr(self, stat)
+        return (self.extra or {}).get(stat, default)
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Profile":
+        p = cls.__new__(cls)
+        p.username = d.get("username", "")
+        p.minecraft_uuid = d.get("minecraft_uuid", "")
+        p.kills = d.get("kills", 0)
+        p.deaths = d.get("deaths", 0)
+        p.playtime_hours = d.get("playtime_hours", 0)
+        p.level = d.get("level", 1)
+        p.xp = d.get("xp", 0)
+        p.achievements = d.get("achievements") or ()
+        p.first_seen = to_epoch(d.get("first_seen")) or 0
+        p.last_seen = to_epoch(d.get("last_seen")) or p.first_seen
+        extra = {k: v for k, v in d.items() if k not in cls.__slots__}
+        p.extra = extra or None
+        return p
+
+    def to_dict(self) -> dict:
+        d = {
+            "username": self.username,
+            "minecraft_uuid": self.minecraft_uuid,
+            "kills": self.kills,
+            "deaths": self.deaths,
+            "playtime_hours": self.playtime_hours,
+            "level": self.level,
+            "xp": self.xp,
+            "achievements": list(self.achievements),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+        }
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+
+class Transaction:
+    __slots__ = ("type", "amount", "reason", "timestamp")
+
+    def __init__(self, type: str, amount: int, reason: str, timestamp: int):
+        self.type = type
+        self.amount = amount
+        self.reason = reason
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Transaction":
+        return cls(d.get("type", "add"), d.get("amount", 0), d.get("reason", ""), to_epoch(d.get("timestamp")) or 0)
+
+    def to_dict(self) -> dict:
+        return {"type": self.type, "amount": self.amount, "reason": self.reason, "timestamp": self.timestamp}
+
+
+class Account:
+    """One player's economy account.
+
+    ``inventory`` maps item id -> count and stays None until the first item, so
+    accounts that never bought anything carry no dict.
+    """
+
+    __slots__ = ("balance", "last_daily", "transactions", "inventory")
+
+    def __init__(self):
+        self.balance = 0
+        self.last_daily = None
+        self.transactions = []
+        self.inventory = None
+
+    def apply(self, amount: int, reason: str = "", now: int | None = None):
+        """Add (or, if negative, remove) coins, never going below zero, and log it."""
+        self.balance = max(0, self.balance + amount)
+        self.transactions.append(Transaction(
+            "add" if amount > 0 else "remove", abs(amount), reason, now if now is not None else int(time.time())
+        ))
+
+    def add_items(self, counts: dict):
+        if self.inventory is None:
+            self.inventory = {}
+        for item_id, count in counts.items():
+            self.inventory[item_id] = self.inventory.get(item_id, 0) + count
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Account":
+        a = cls.__new__(cls)
+        a.balance = d.get("balance", 0)
+        a.last_daily = to_epoch(d.get("last_daily"))
+        a.transactions = [Transaction.from_dict(t) for t in d.get("transactions", [])]
+        a.inventory = d.get("inventory") or None
+        return a
+
+    def to_dict(self) -> dict:
+        d = {
+            "balance": self.balance,
+            "transactions": [t.to_dict() for t in self.transactions],
+        }
+        if self.last_daily is not None:  # legacy; moved to the cooldown service on the next !daily
+            d["last_daily"] = self.last_daily
+        if self.inventory:
+            d["inventory"] = self.inventory
+        return d
@@ -0,0 +1,89 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Runs async callbacks at epoch times from one background task.
+
+    Jobs are keyed tuples whose first element names the owner, e.g.
+    ``("giveaway", guild_id, message_id)``. Scheduling an existing key replaces the job
+    and cancelling just forgets it; stale heap entries are skipped when they come up, so
+    both are O(log n). The task sleeps until the earliest job is due and is woken early
+    when an earlier one is added. Jobs whose time has already passed (e.g. while the bot
+    was offline) run straight away.
+    """
+
+    def __init__(self):
+        self._heap = []   # (when, seq, key)
+        self._jobs = {}   # key -> ((when, seq, key), callback)
+        self._seq = itertools.count()
+        self._running = set()
+        self._task = None
+        self._wake = None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def schedule(self, key: tuple, when: float, callback):
+        """Run ``await callback()`` at epoch ``when``, replacing any job with the same key."""
+        entry = (when, next(self._seq), key)
+        self._jobs[key] = (entry, callback)
+        heapq.heappush(self._heap, entry)
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        elif self._heap[0] is entry:
+            self._wake.set()
+
+    def cancel(self, key: tuple):
+        self._jobs.pop(key, None)
+
+    def cancel_owner(self, owner: str):
+        """Forget every job whose key starts with ``owner`` (used when a cog unloads)."""
+        for key in [key for key in self._jobs if key[0] == owner]:
+            del self._jobs[key]
+
+    def due_at(self, key: tuple) -> float | None:
+        job = self._jobs.get(key)
+        return job[0][0] if job else None
+
+    async def _run(self):
+        while True:
+            while self._heap and self._current(self._heap[0]) is None:
+                heapq.heappop(self._heap)
+            timeout = max(0.0, self._heap[0][0] - time.time()) if self._heap else None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                callback = self._current(entry)
+                if callback is None:
+                    continue
+                del self._jobs[entry[2]]
+                task = asyncio.create_task(self._fire(entry[2], callback))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    def _current(self, entry):
+        """The callback if ``entry`` is still the live job for its key, else None."""
+        job = self._jobs.get(entry[2])
+        return job[1] if job and job[0] is entry else None
+
+    @staticmethod
+    async def _fire(key, callback):
+        try:
+            await callback()
+        except Exception:
+            logger.exception("Scheduled job %s failed", key)
+
+
+SCHEDULER = Scheduler()
@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from cogs.metrics import CONFIG, record_storage
+
+BASE = Path(__file__).parent.parent
+GUILDS_DIR = BASE / "data" / "guilds"
+
+logger = logging.getLogger(__name__)
+
+# Partitions untouched for this long are dropped from memory (they are already on disk)
+PARTITION_IDLE_SECONDS = CONFIG.get("partition_idle_seconds", 1800)
+SWEEP_INTERVAL = 60
+# How many times PartitionedStore.update re-applies a change that lost a race with another shard
+UPDATE_ATTEMPTS = 3
+# Largest request line the state service accepts (a whole partition is sent on save)
+MAX_MESSAGE_BYTES = 256 * 1024 * 1024
+
+# Set by the multi-process launcher in bot.py; when present, partitions are still read from
+# disk but saved through the shared state service, which rejects writes based on stale data.
+STATE_SOCKET = os.getenv("STATE_SOCKET")
+WORKER_ID = os.getenv("WORKER_INDEX", str(os.getpid()))
+
+
+class StaleWriteError(RuntimeError):
+    """Raised when a partition was changed by another shard since it was loaded."""
+
+
+STALE_WRITE_MESSAGE = "⚠️ That was changed somewhere else at the same moment and wasn't saved. Please try again."
+
+
+async def notify_stale_write(interaction):
+    """Tell an interaction's user that their change lost a race with another shard."""
+    if interaction.response.is_done():
+        await interaction.followup.send(STALE_WRITE_MESSAGE, ephemeral=True)
+    else:
+        await interaction.response.send_message(STALE_WRITE_MESSAGE, ephemeral=True)
+
+
+def read_bytes(path: Path) -> bytes:
+    """Raw file contents, or b"" if the file doesn't exist."""
+    if not path.exists():
+        return b""
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        raw = f.read()
+    record_storage("read", path, time.perf_counter() - start, len(raw))
+    return raw
+
+
+def parse_json(raw: bytes):
+    try:
+        return json.loads(raw) if raw else {}
+    except json.JSONDecodeError:
+        return {}
+
+
+def load_json(path: Path):
+    return parse_json(read_bytes(path))
+
+
+def save_json(path: Path, data) -> bytes:
+    """Write ``data`` atomically (readers see the old or the new file, never half of one)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    raw = json.dumps(data, indent=2).encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(raw)
+    os.replace(tmp, path)
+    record_storage("write", path, time.perf_counter() - start, len(raw))
+    return raw
+
+
+def content_version(raw: bytes) -> str:
+    """Version token of a partition file in multi-process mode: a digest of its bytes."""
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def partition_path(guild_id: int, filename: str) -> Path:
+    return GUILDS_DIR / str(guild_id) / filename
+
+
+STORES = {}  # name -> PartitionedStore, used to route state service invalidations
+
+
+class PartitionedStore:
+    """A JSON document split into one file per guild.
+
+    ``partition(guild_id)`` loads ``data/guilds/<guild_id>/<name>.json`` on first use and
+    keeps it in memory; ``save(guild_id)`` writes it back. Partitions idle for longer than
+    ``PARTITION_IDLE_SECONDS`` are evicted on the next access sweep.
+
+    If a pre-partitioning global file (``legacy_path``) exists, the first guild to load
+    this store adopts it and the old file is renamed to ``*.migrated``.
+
+    With a ``record_type`` (a class with ``from_dict``/``to_dict``), each top-level value
+    of a partition is held in memory as that record and converted back to JSON on save.
+
+    ``save`` is a coroutine: in multi-process mode it is a round trip to the state
+    service and raises ``StaleWriteError`` if another shard saved the partition since it
+    was read. Changes that can simply be re-applied should go through ``update``.
+
+    Caches derived from a partition register with ``on_drop`` to be told when it leaves
+    memory (idle eviction or invalidation), so they don't keep it alive.
+    """
+
+    def __init__(self, name: str, legacy_path: Path | None = None, register: bool = True, record_type=None):
+        self.name = name
+        self.legacy_path = legacy_path
+        self.record_type = record_type
+        self._partitions = {}  # guild_id -> data
+        self._versions = {}    # guild_id -> content_version of the file as read (multi-process mode only)
+        self._last_used = {}   # guild_id -> monotonic time
+        self._last_sweep = time.monotonic()
+        self._save_lock = asyncio.Lock()  # one save in flight, so each carries the version the last returned
+        self._drop_hooks = []  # callbacks(guild_id) run when a partition leaves memory
+        if register:
+            STORES[name] = self
+
+    def path(self, guild_id: int) -> Path:
+        return partition_path(guild_id, f"{self.name}.json")
+
+    def partition(self, guild_id: int) -> dict:
+        now = time.monotonic()
+        if now - self._last_sweep > SWEEP_INTERVAL:
+            self.evict_idle(now)
+        self._last_used[guild_id] = now
+        data = self._partitions.get(guild_id)
+        if data is None:
+            data = self._partitions[guild_id] = self._load(guild_id)
+        return data
+
+    def _load(self, guild_id: int) -> dict:
+        path = self.path(guild_id)
+        if not path.exists() and self.legacy_path and self.legacy_path.exists():
+            self._adopt_legacy(guild_id, path)
+        raw = read_bytes(path)
+        if STATE_SOCKET:
+            self._versions[guild_id] = content_version(raw)
+        return self._decode(parse_json(raw))
+
+    def _adopt_legacy(self, guild_id: int, path: Path):
+        migrated = self.legacy_path.with_name(self.legacy_path.name + ".migrated")
+        try:
+            # Renaming first means only one guild (or shard process) can adopt the file
+            self.legacy_path.rename(migrated)
+        except FileNotFoundError:
+            return
+        save_json(path, load_json(migrated))
+        logger.info("Migrated %s into guild %s partition", self.legacy_path.name, guild_id)
+
+    def _decode(self, data: dict) -> dict:
+        if self.record_type is None:
+            return data
+        from_dict = self.record_type.from_dict
+        return {key: from_dict(value) for key, value in data.items()}
+
+    def _encode(self, data: dict) -> dict:
+        if self.record_type is None:
+            return data
+        return {key: record.to_dict() for key, record in data.items()}
+
+    async def save(self, guild_id: int, changed: dict | None = None):
+        """Write the guild's partition back.
+
+        ``changed`` is the partition object the caller modified. If it is no longer the
+        cached one by the time the write goes out (dropped after a conflict or an
+        invalidation while the caller waited), the change was made to a discarded copy
+        and ``StaleWriteError`` is raised instead of saving the copy that replaced it.
+        """
+        if not STATE_SOCKET:
+            data = self._partitions.get(guild_id)
+            if changed is not None and data is not changed:
+                raise StaleWriteError(f"{self.name} partition for guild {guild_id} was reloaded before it was saved")
+            if data is not None:
+                save_json(self.path(guild_id), self._encode(data))
+            return
+        async with self._save_lock:
+            data = self._partitions.get(guild_id)
+            if data is None or (changed is not None and data is not changed):
+                # Dropped by an invalidation while the caller was changing it
+                raise StaleWriteError(f"{self.name} partition for guild {guild_id} changed on another shard")
+            reply = await CLIENT.call("save", name=self.name, guild_id=guild_id, data=self._encode(data),
+                                      version=self._versions.get(guild_id))
+            if reply.get("conflict"):
+                # Another shard wrote first: drop our copy so the next access sees theirs
+                self.invalidate(guild_id)
+                raise StaleWriteError(f"{self.name} partition for guild {guild_id} changed on another shard")
+            self._versions[guild_id] = reply["version"]
+
+    async def update(self, guild_id: int, mutate):
+        """Apply ``mutate(partition)`` and save it, returning whatever ``mutate`` returns.
+
+        If another shard saved the partition first, the stale copy is dropped and
+        ``mutate`` runs again on a fresh read, so it must make its checks against the data
+        it is given. Raises ``StaleWriteError`` after ``UPDATE_ATTEMPTS`` lost races.
+        """
+        for attempt in range(1, UPDATE_ATTEMPTS + 1):
+            data = self.partition(guild_id)
+            result = mutate(data)
+            try:
+                await self.save(guild_id, data)
+                return result
+            except StaleWriteError:
+                if attempt == UPDATE_ATTEMPTS:
+                    raise
+                logger.info("Retrying %s update for guild %s after a conflicting write", self.name, guild_id)
+
+    def on_drop(self, callback):
+        """Call ``callback(guild_id)`` whenever a guild's partition is evicted or invalidated."""
+        self._drop_hooks.append(callback)
+
+    def _dropped(self, guild_id: int):
+        for callback in self._drop_hooks:
+            callback(guild_id)
+
+    def invalidate(self, guild_id: int):
+        self._versions.pop(guild_id, None)
+        if self._partitions.pop(guild_id, None) is not None:
+            self._dropped(guild_id)
+
+    def evict_idle(self, now: float | None = None):
+        now = now if now is not None else time.monotonic()
+        self._last_sweep = now
+        for guild_id, used in list(self._last_used.items()):
+            if now - used > PARTITION_IDLE_SECONDS:
+                self._versions.pop(guild_id, None)
+                self._last_used.pop(guild_id, None)
+                if self._partitions.pop(guild_id, None) is not None:
+                    self._dropped(guild_id)
+
+    def loaded(self) -> list:
+        return list(self._partitions)
+
+
+# -------------------------
+# Shared state service (multi-process mode)
+# -------------------------
+class StateClient:
+    """Request/response connection from a shard worker to the state service.
+
+    Uses asyncio streams over a local Unix socket, so a save never blocks the event loop.
+    Requests go one at a time; partitions are read from disk, so only saves come here.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def call(self, op: str, **kwargs) -> dict:
+        request = json.dumps(dict(kwargs, op=op, worker=WORKER_ID), separators=(",", ":")).encode("utf-8") + b"\n"
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+                self._writer.write(request)
+                await self._writer.drain()
+                line = await self._reader.readline()
+                if not line:
+                    raise ConnectionError("State service closed the connection")
+            except BaseException:
+                # A request cut short would leave its reply to be read by the next one
+                self._disconnect()
+                raise
+        reply = json.loads(line)
+        if "error" in reply:
+            raise RuntimeError(f"State service error on {op}: {reply['error']}")
+        return reply
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def listen(self):
+        """Drop cached partitions whenever another worker saves them."""
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+                writer.write(json.dumps({"op": "subscribe", "worker": WORKER_ID}).encode("utf-8") + b"\n")
+                await writer.drain()
+                while line := await reader.readline():
+                    message = json.loads(line)
+                    store = STORES.get(message.get("name"))
+                    if message.get("op") == "invalidate" and store:
+                        store.invalidate(message["guild_id"])
+            except (OSError, json.JSONDecodeError):
+                logger.exception("Lost state service subscription; reconnecting")
+            # Anything cached may have missed invalidations while disconnected
+            for store in STORES.values():
+                for guild_id in store.loaded():
+                    store.invalidate(guild_id)
+            await asyncio.sleep(1)
+
+
+CLIENT = StateClient(STATE_SOCKET) if STATE_SOCKET else None
+
+
+class StateService:
+    """Single writer of every partition when the bot runs as several shard processes.
+
+    Workers read partition files directly and remember a digest of the bytes they read;
+    every save comes here with that digest. Requests are handled one at a time, so each
+    check-and-write is atomic: a save whose digest no longer matches the file is
+    rejected, which keeps economy and ticket updates from silently overwriting each
+    other across shards. Successful saves are pushed to the other workers as
+    invalidations.
+    """
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.versions = {}     # (name, guild_id) -> content_version of the file as last written
+        self.subscribers = {}  # worker id -> StreamWriter
+
+    def _path(self, key) -> Path:
+        return partition_path(key[1], f"{key[0]}.json")
+
+    def version(self, key) -> str:
+        if key not in self.versions:
+            self.versions[key] = content_version(read_bytes(self._path(key)))
+        return self.versions[key]
+
+    def handle(self, request: dict) -> dict:
+        op = request.get("op")
+        key = (request.get("name"), request.get("guild_id"))
+        if op == "save":
+            current = self.version(key)
+            if request.get("version") != current:
+                return {"conflict": True, "version": current}
+            raw = save_json(self._path(key), request["data"])
+            self.versions[key] = content_version(raw)
+            self._broadcast(request.get("worker"), key)
+            return {"version": self.versions[key]}
+        return {"error": f"unknown op {op!r}"}
+
+    def _broadcast(self, origin, key):
+        line = json.dumps({"op": "invalidate", "name": key[0], "guild_id": key[1]}).encode("utf-8") + b"\n"
+        for worker, writer in list(self.subscribers.items()):
+            if worker != origin:
+                writer.write(line)
+
+    async def _client(self, reader, writer):
+        worker = None
+        try:
+            while line := await reader.readline():
+                request = json.loads(line)
+                if request.get("op") == "subscribe":
+                    worker = request.get("worker")
+                    self.subscribers[worker] = writer
+                    continue
+                try:
+                    reply = self.handle(request)
+                except Exception as e:
+                    logger.exception("State service failed on %s", request.get("op"))
+                    reply = {"error": str(e)}
+                writer.write(json.dumps(reply, separators=(",", ":")).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if worker is not None and self.subscribers.get(worker) is writer:
+                self.subscribers.pop(worker, None)
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._client, path=self.socket_path, limit=MAX_MESSAGE_BYTES)
+        logger.info("State service listening on %s", self.socket_path)
+        return server
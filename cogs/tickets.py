@@ -1,13 +1,20 @@
 import asyncio
+import heapq
 import logging
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
 import json
 import os
+import time
 from pathlib import Path
 from datetime import datetime
 import io
+from cogs.cooldowns import format_duration
+from cogs.metrics import instrumented
+from cogs.outbox import queue_dm
+from cogs.records import to_epoch
+from cogs.storage import PartitionedStore, StaleWriteError, load_json, notify_stale_write, partition_path
 
 BASE = Path(__file__).parent.parent
 TICKETS_FILE = BASE / "tickets.json"
@@ -18,20 +25,10 @@ CONFIG_FILE = BASE / "config.json"
 logger = logging.getLogger(__name__)
 
 # -------------------------
-# Helper: JSON persistence
+# Per-guild data partitions
 # -------------------------
-def load_json(path: Path):
-    if not path.exists():
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
-
-def save_json(path: Path, data):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+TICKETS = PartitionedStore("tickets", legacy_path=TICKETS_FILE)
+BLACKLIST = PartitionedStore("blacklist", legacy_path=BLACKLIST_FILE)
 
 
 async def generate_transcript(channel: discord.TextChannel, format: str = "html") -> str:
@@ -106,6 +103,170 @@ async def generate_transcript(channel: discord.TextChannel, format: str = "html"
 
     return str(path)
 
+
+# -------------------------
+# Ticket lifecycle metrics
+# -------------------------
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS = [60, 300, 900, 1800, 3600, 4 * 3600, 12 * 3600, 86400, 3 * 86400]
+LATENCY_METRICS = ("time_to_claim", "time_to_first_reply", "time_to_close")
+
+
+def _epoch(iso: str | None) -> int | None:
+    """Epoch seconds of a stored ``utcnow().isoformat()`` timestamp, independent of the host timezone."""
+    return to_epoch(iso)
+
+
+class TicketLifecycle:
+    """Append-only ticket event log plus incrementally aggregated latency histograms.
+
+    Every event is appended as one compact JSON line to the guild's ``ticket_events.log``.
+    The guild's ``ticket_stats`` histograms are updated as each event arrives, so readers
+    never rescan the log.
+    """
+
+    def __init__(self):
+        self.store = PartitionedStore("ticket_stats")
+
+    def stats(self, guild_id: int) -> dict:
+        return self._init(self.store.partition(guild_id))
+
+    @staticmethod
+    def _init(data: dict) -> dict:
+        data.setdefault("bounds", LATENCY_BUCKETS)
+        data.setdefault("opened", {})
+        return data
+
+    def _append(self, guild_id: int, event: str, channel_id: int, ts: int, **fields):
+        line = {"e": event, "c": channel_id, "ts": ts}
+        line.update({k: v for k, v in fields.items() if v is not None})
+        path = partition_path(guild_id, "ticket_events.log")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def _observe(self, stats: dict, metric: str, ticket_type: str, staff_id: int | None, seconds: int):
+        bounds = stats["bounds"]
+        idx = next((i for i, b in enumerate(bounds) if seconds <= b), len(bounds))
+        groups = stats.setdefault(metric, {"by_type": {}, "by_staff": {}})
+        keys = [("by_type", ticket_type)]
+        if staff_id:
+            keys.append(("by_staff", str(staff_id)))
+        for group, key in keys:
+            hist = groups[group].setdefault(key, {"counts": [0] * (len(bounds) + 1), "n": 0, "sum": 0})
+            hist["counts"][idx] += 1
+            hist["n"] += 1
+            hist["sum"] += seconds
+
+    async def record(self, event: str, guild_id: int, channel_id: int, info: dict, staff_id: int | None = None):
+        """Record a lifecycle event ('open', 'claim', 'first_reply' or 'close') for a ticket."""
+        now = int(time.time())
+        ticket_type = info.get("type", "unknown")
+        self._append(guild_id, event, channel_id, now, u=info.get("user_id"), t=ticket_type, s=staff_id)
+
+        def count(data: dict):
+            stats = self._init(data)  # the partition update() hands over, fresh on a retry
+            opened = _epoch(info.get("created_at"))
+            if event == "open":
+                stats["opened"][ticket_type] = stats["opened"].get(ticket_type, 0) + 1
+            elif opened is not None:
+                metric = {"claim": "time_to_claim", "first_reply": "time_to_first_reply", "close": "time_to_close"}[event]
+                self._observe(stats, metric, ticket_type, staff_id, max(0, now - opened))
+        await self.store.update(guild_id, count)
+
+
+def histogram_quantile(hist: dict, q: float, bounds: list) -> str:
+    """Approximate a quantile from bucket counts, reported as the bucket's upper bound."""
+    target = q * hist["n"]
+    running = 0
+    for i, count in enumerate(hist["counts"]):
+        running += count
+        if running >= target and count:
+            return f"≤ {format_duration(bounds[i])}" if i < len(bounds) else f"> {format_duration(bounds[-1])}"
+    return "n/a"
+
+
+LIFECYCLE = TicketLifecycle()
+
+
+# -------------------------
+# Closed ticket history
+# -------------------------
+HISTORY_PER_USER = 50
+
+class TicketHistory:
+    """Archive of closed tickets, partitioned by guild and indexed by opener and ticket type.
+
+    ``data[user_id][type]`` lists that opener's closed tickets of one type in close order,
+    so the last N of a type is two dict lookups plus a slice, and the last N overall
+    merges the tails of the opener's few per-type lists; neither scans every closed
+    ticket or transcript. Only the newest ``HISTORY_PER_USER`` entries per user and type
+    are kept.
+    """
+
+    def __init__(self):
+        self.store = PartitionedStore("ticket_history")
+
+    async def archive(self, guild_id: int, channel, info: dict, closed_by: int | None = None,
+                      transcript: str | None = None):
+        """Store a closed ticket record along with a pointer to its transcript file."""
+        entry = {
+            "channel_id": channel.id,
+            "channel_name": getattr(channel, "name", ""),
+            "type": info.get("type", "unknown"),
+            "created_at": info.get("created_at"),
+            "closed_at": datetime.utcnow().isoformat(),
+            "claimer_id": info.get("claimer_id"),
+            "closed_by": closed_by,
+            "transcript": Path(transcript).name if transcript else None,
+        }
+
+        def append(data: dict):
+            entries = self._by_type(data, str(info.get("user_id"))).setdefault(entry["type"], [])
+            entries.append(entry)
+            del entries[:-HISTORY_PER_USER]
+        await self.store.update(guild_id, append)
+
+    @staticmethod
+    def _by_type(data: dict, uid: str) -> dict:
+        by_type = data.setdefault(uid, {})
+        if isinstance(by_type, list):  # archived as one list per user before the type index
+            grouped = {}
+            for entry in by_type:
+                grouped.setdefault(entry.get("type", "unknown"), []).append(entry)
+            by_type = data[uid] = grouped
+        return by_type
+
+    def recent(self, guild_id: int, user_id: int, limit: int = 5, ticket_type: str | None = None) -> list:
+        """Return a user's most recent closed tickets (only ``ticket_type`` ones if given), newest first."""
+        data = self.store.partition(guild_id)
+        if limit <= 0 or str(user_id) not in data:
+            return []
+        by_type = self._by_type(data, str(user_id))
+        if ticket_type is not None:
+            return by_type.get(ticket_type, [])[-limit:][::-1]
+        tails = [entry for entries in by_type.values() for entry in entries[-limit:]]
+        return heapq.nlargest(limit, tails, key=lambda entry: entry["closed_at"])
+
+
+HISTORY = TicketHistory()
+
+
+def add_history_field(embed: discord.Embed, guild_id: int, user_id: int, limit: int = 5):
+    """Append the opener's previous tickets to an embed."""
+    past = HISTORY.recent(guild_id, user_id, limit)
+    if not past:
+        embed.add_field(name="Previous Tickets", value="None", inline=False)
+        return
+    lines = []
+    for entry in past:
+        closed = _epoch(entry.get("closed_at"))
+        when = f"<t:{closed}:d>" if closed else "unknown"
+        claimer = f" • <@{entry['claimer_id']}>" if entry.get("claimer_id") else ""
+        transcript = f" • `{entry['transcript']}`" if entry.get("transcript") else ""
+        lines.append(f"**{entry['type']}** — {when}{claimer}{transcript}")
+    embed.add_field(name=f"Previous Tickets ({len(past)})", value="\n".join(lines)[:1024], inline=False)
+
 # -------------------------
 # Load config (used by cog)
 # -------------------------
@@ -127,13 +288,19 @@ class TicketCloseView(View):
     def __init__(self):
         super().__init__(timeout=None)
 
+    async def on_error(self, interaction: discord.Interaction, error: Exception, item):
+        if isinstance(error, StaleWriteError):
+            return await notify_stale_write(interaction)
+        await super().on_error(interaction, error, item)
+
     @discord.ui.button(label="Claim", style=discord.ButtonStyle.primary, custom_id="ticket_claim_v1")
+    @instrumented("ticket_claim")
     async def claim_ticket(self, interaction: discord.Interaction, button: Button):
         """Allow staff to claim the ticket so other staff know who is handling it."""
         channel = interaction.channel
         guild = interaction.guild
         user = interaction.user
-        tickets = load_json(TICKETS_FILE)
+        tickets = TICKETS.partition(guild.id)
 
         cid = str(channel.id)
         if cid not in tickets:
@@ -144,9 +311,20 @@ class TicketCloseView(View):
         if not is_staff and not user.guild_permissions.manage_guild:
             return await interaction.response.send_message("❌ You don't have permission to claim tickets.", ephemeral=True)
 
+        opener_id = tickets[cid].get("user_id")
+
         # Record claimer
-        tickets[cid]["claimer_id"] = user.id
-        save_json(TICKETS_FILE, tickets)
+        def claim(tickets: dict) -> dict | None:
+            info = tickets.get(cid)
+            if info is None:  # closed on another shard meanwhile
+                return None
+            first_claim = not info.get("claimer_id")
+            info["claimer_id"] = user.id
+            return info if first_claim else None
+
+        info = await TICKETS.update(guild.id, claim)
+        if info is not None:
+            await LIFECYCLE.record("claim", guild.id, channel.id, info, staff_id=user.id)
 
         # Disable claim button on the view and update message so it's clear
         for child in list(self.children):
@@ -159,16 +337,25 @@ class TicketCloseView(View):
 
         await interaction.response.send_message(f"✅ {user.mention} has claimed this ticket.", ephemeral=False)
 
-        # Send DM to ticket creator to notify them their ticket was claimed
-        ticket_user_id = tickets[cid].get("user_id")
-        if ticket_user_id:
+        # Give the claimer the opener's recent ticket history (staff-only view)
+        if opener_id:
+            history_embed = discord.Embed(title="🗂️ Opener History", color=discord.Color.blurple())
+            add_history_field(history_embed, guild.id, opener_id)
             try:
-                ticket_user = await guild.fetch_member(ticket_user_id)
-                await ticket_user.send(f"📨 **Ticket Claimed!**\n\n{user.mention} from **{guild.name}** has claimed your ticket: {channel.name}\n\nThey will help you shortly! 🎯")
+                await interaction.followup.send(embed=history_embed, ephemeral=True)
             except Exception:
-                logger.exception("Failed to send DM to ticket creator %s", ticket_user_id)
+                logger.exception("Failed to send ticket history to claimer %s", user.id)
+
+        # Send DM to ticket creator to notify them their ticket was claimed
+        if opener_id:
+            queue_dm(
+                interaction.client, opener_id,
+                f"📨 **Ticket Claimed!**\n\n{user.mention} from **{guild.name}** has claimed your ticket: {channel.name}\n\nThey will help you shortly! 🎯",
+                guild=guild
+            )
 
     @discord.ui.button(label="Transcript", style=discord.ButtonStyle.secondary, custom_id="ticket_transcript_v1")
+    @instrumented("ticket_transcript")
     async def transcript_ticket(self, interaction: discord.Interaction, button: Button):
         """Generate a transcript and post to the configured log channel (if any)."""
         channel = interaction.channel
@@ -209,9 +396,11 @@ class TicketCloseView(View):
             await interaction.followup.send("❌ Transcript generated but failed to deliver.", ephemeral=True)
 
     @discord.ui.button(label="Close Ticket", style=discord.ButtonStyle.danger, custom_id="ticket_close_btn_v1")
+    @instrumented("ticket_close")
     async def close_ticket(self, interaction: discord.Interaction, button: Button):
         channel = interaction.channel
-        tickets = load_json(TICKETS_FILE)
+        guild = interaction.guild
+        tickets = TICKETS.partition(guild.id)
 
         # tickets keyed by channel_id (string)
         cid = str(channel.id)
@@ -226,14 +415,18 @@ class TicketCloseView(View):
             pass
 
         # Remove record first
-        info = tickets.pop(cid, None)
-        save_json(TICKETS_FILE, tickets)
+        info = await TICKETS.update(guild.id, lambda tickets: tickets.pop(cid, None))
+        if info is None:
+            return await interaction.followup.send("❌ This ticket was already closed.", ephemeral=True)
+        await LIFECYCLE.record("close", guild.id, channel.id, info, staff_id=info.get("claimer_id"))
 
         # Auto-generate transcript in HTML format before deletion
+        transcript_path = None
         try:
-            await generate_transcript(channel, format="html")
+            transcript_path = await generate_transcript(channel, format="html")
         except Exception:
             logger.exception("Failed to auto-generate transcript before closing channel %s", getattr(channel, 'id', None))
+        await HISTORY.archive(guild.id, channel, info, closed_by=interaction.user.id, transcript=transcript_path)
 
         # Remember the category so we can remove it if empty after deletion
         category = channel.category
@@ -304,6 +497,7 @@ class TicketTypeButton(Button):
         super().__init__(label=label, style=style, custom_id=f"ticket_btn_{value}", emoji=emoji)
         self.value = value
 
+    @instrumented("ticket_open")
     async def callback(self, interaction: discord.Interaction):
         await open_ticket(interaction, self.value)
 
@@ -315,8 +509,8 @@ async def open_ticket(interaction: discord.Interaction, ticket_type: str):
     if guild is None:
         return await interaction.response.send_message("This command must be used in a server.", ephemeral=True)
 
-    tickets = load_json(TICKETS_FILE)
-    blacklist = load_json(BLACKLIST_FILE)
+    tickets = TICKETS.partition(guild.id)
+    blacklist = BLACKLIST.partition(guild.id)
 
     # Blacklist check
     if str(user.id) in blacklist:
@@ -336,9 +530,10 @@ async def open_ticket(interaction: discord.Interaction, ticket_type: str):
                 orphaned.append(cid)
 
     if orphaned:
-        for cid in orphaned:
-            tickets.pop(cid, None)
-        save_json(TICKETS_FILE, tickets)
+        def drop_orphans(tickets: dict):
+            for cid in orphaned:
+                tickets.pop(cid, None)
+        await TICKETS.update(guild.id, drop_orphans)
 
     if existing_channel:
         return await interaction.response.send_message(f"❗ You already have an open ticket: {existing_channel.mention}", ephemeral=True)
@@ -377,12 +572,13 @@ async def open_ticket(interaction: discord.Interaction, ticket_type: str):
         logger.exception("Failed to create ticket channel in guild %s", getattr(guild, 'id', None))
         return await interaction.response.send_message("❌ Failed to create ticket channel. Contact an admin.", ephemeral=True)
 
-    tickets[str(channel.id)] = {
+    info = {
         "user_id": user.id,
         "type": ticket_type,
         "created_at": datetime.utcnow().isoformat()
     }
-    save_json(TICKETS_FILE, tickets)
+    await TICKETS.update(guild.id, lambda tickets: tickets.update({str(channel.id): info}))
+    await LIFECYCLE.record("open", guild.id, channel.id, info)
 
     # Respond to the user first
     try:
@@ -423,16 +619,91 @@ class TicketPanelView(View):
                 emoji = "❓"
             self.add_item(TicketTypeButton(label=opt.get("label"), value=opt.get("value"), emoji=emoji))
 
+    async def on_error(self, interaction: discord.Interaction, error: Exception, item):
+        if isinstance(error, StaleWriteError):
+            return await notify_stale_write(interaction)
+        await super().on_error(interaction, error, item)
+
         # (Select removed) Buttons-only UI for a cleaner experience
 
 
 # -------------------------
 # Cog with commands
 # -------------------------
+def is_staff_member(member) -> bool:
+    roles = getattr(member, "roles", None)
+    if roles is None:
+        return False
+    return any(r.name in STAFF_ROLES for r in roles) or member.guild_permissions.manage_guild
+
+
 class Tickets(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.guild is None or message.author.bot:
+            return
+        # In-memory partition lookup, so ordinary chat never touches the disk
+        info = TICKETS.partition(message.guild.id).get(str(message.channel.id))
+        if info is None or info.get("first_reply_at") or info.get("user_id") == message.author.id:
+            return
+        if not is_staff_member(message.author):
+            return
+
+        def first_reply(tickets: dict) -> dict | None:
+            info = tickets.get(str(message.channel.id))
+            if info is None or info.get("first_reply_at"):
+                return None
+            info["first_reply_at"] = datetime.utcnow().isoformat()
+            return info
+
+        info = await TICKETS.update(message.guild.id, first_reply)
+        if info is not None:
+            await LIFECYCLE.record("first_reply", message.guild.id, message.channel.id, info, staff_id=message.author.id)
+
+    # STAFF: support latency summary from the pre-aggregated histograms
+    @commands.command(name="ticketstats")
+    @commands.has_any_role(*STAFF_ROLES)
+    async def ticketstats(self, ctx, ticket_type: str = None):
+        stats = LIFECYCLE.stats(ctx.guild.id)
+        bounds = stats["bounds"]
+        embed = discord.Embed(title="📈 Ticket Stats", color=discord.Color.blurple())
+        opened = stats.get("opened", {})
+        if ticket_type:
+            embed.description = f"Type: **{ticket_type}** — {opened.get(ticket_type, 0)} opened"
+        else:
+            embed.description = f"{sum(opened.values())} tickets opened"
+
+        for metric in LATENCY_METRICS:
+            by_type = stats.get(metric, {}).get("by_type", {})
+            hists = [by_type[ticket_type]] if ticket_type in by_type else ([] if ticket_type else list(by_type.values()))
+            n = sum(h["n"] for h in hists)
+            if not n:
+                continue
+            merged = {"counts": [sum(c) for c in zip(*(h["counts"] for h in hists))], "n": n}
+            avg = sum(h["sum"] for h in hists) / n
+            embed.add_field(
+                name=metric.replace("_", " ").capitalize(),
+                value=f"n={n} | avg {format_duration(avg)}\n"
+                      f"p50 {histogram_quantile(merged, 0.5, bounds)} | p90 {histogram_quantile(merged, 0.9, bounds)}",
+                inline=False
+            )
+
+        by_staff = stats.get("time_to_claim", {}).get("by_staff", {})
+        if by_staff and not ticket_type:
+            top = sorted(by_staff.items(), key=lambda kv: kv[1]["n"], reverse=True)[:5]
+            lines = [f"<@{sid}> — {h['n']} claims, avg {format_duration(h['sum'] / h['n'])}" for sid, h in top]
+            embed.add_field(name="Top Claimers", value="\n".join(lines), inline=False)
+
+        if not embed.fields:
+            embed.add_field(name="No data", value="No lifecycle events recorded yet.", inline=False)
+        await ctx.send(embed=embed)
+
     # Admin: post the ticket panel (in current channel or configured panel channel)
     @commands.command(name="ticketpanel")
     @commands.has_permissions(administrator=True)
@@ -457,20 +728,28 @@ class Tickets(commands.Cog):
     @commands.command(name="closeticket")
     @commands.has_any_role(*STAFF_ROLES)
     async def closeticket(self, ctx):
-        tickets = load_json(TICKETS_FILE)
+        tickets = TICKETS.partition(ctx.guild.id)
         cid = str(ctx.channel.id)
         if cid not in tickets:
             return await ctx.send("❌ This is not a registered ticket channel.")
         # Remove record
-        tickets.pop(cid, None)
-        save_json(TICKETS_FILE, tickets)
+        info = await TICKETS.update(ctx.guild.id, lambda tickets: tickets.pop(cid, None))
+        if info is None:
+            return await ctx.send("❌ This ticket was already closed.")
+        await LIFECYCLE.record("close", ctx.guild.id, ctx.channel.id, info, staff_id=info.get("claimer_id") or ctx.author.id)
+        transcript_path = None
+        try:
+            transcript_path = await generate_transcript(ctx.channel, format="html")
+        except Exception:
+            logger.exception("Failed to auto-generate transcript before closing channel %s", ctx.channel.id)
+        await HISTORY.archive(ctx.guild.id, ctx.channel, info, closed_by=ctx.author.id, transcript=transcript_path)
         await ctx.send("Ticket closed by staff. Deleting channel...")
         await ctx.channel.delete()
 
     # INFO: show ticket info
     @commands.command(name="ticketinfo")
     async def ticketinfo(self, ctx):
-        tickets = load_json(TICKETS_FILE)
+        tickets = TICKETS.partition(ctx.guild.id)
         cid = str(ctx.channel.id)
         if cid not in tickets:
             return await ctx.send("This is not a ticket channel.")
@@ -486,19 +765,18 @@ class Tickets(commands.Cog):
     @commands.command(name="blacklist")
     @commands.has_permissions(administrator=True)
     async def blacklist(self, ctx, member: discord.Member, *, reason: str = "No reason provided"):
-        bl = load_json(BLACKLIST_FILE)
-        bl[str(member.id)] = {"by": ctx.author.id, "reason": reason, "time": datetime.utcnow().isoformat()}
-        save_json(BLACKLIST_FILE, bl)
+        entry = {"by": ctx.author.id, "reason": reason, "time": datetime.utcnow().isoformat()}
+        await BLACKLIST.update(ctx.guild.id, lambda bl: bl.update({str(member.id): entry}))
         await ctx.send(f"✅ {member.mention} has been blacklisted from creating tickets.\nReason: {reason}")
 
     # UNBLACKLIST
     @commands.command(name="unblacklist")
     @commands.has_permissions(administrator=True)
     async def unblacklist(self, ctx, member: discord.Member):
-        bl = load_json(BLACKLIST_FILE)
-        if str(member.id) in bl:
-            bl.pop(str(member.id))
-            save_json(BLACKLIST_FILE, bl)
+        uid = str(member.id)
+        if uid in BLACKLIST.partition(ctx.guild.id) and await BLACKLIST.update(
+            ctx.guild.id, lambda bl: bl.pop(uid, None)
+        ) is not None:
             return await ctx.send(f"✅ {member.mention} has been removed from the blacklist.")
         await ctx.send("That user is not blacklisted.")
 
@@ -506,7 +784,7 @@ class Tickets(commands.Cog):
     @commands.command(name="blacklistlist")
     @commands.has_permissions(administrator=True)
     async def blacklistlist(self, ctx):
-        bl = load_json(BLACKLIST_FILE)
+        bl = BLACKLIST.partition(ctx.guild.id)
         if not bl:
             return await ctx.send("Blacklist is empty.")
         lines = []
@@ -538,8 +816,9 @@ class Tickets(commands.Cog):
         await interaction.followup.send("✅ Ticket panel posted!", ephemeral=True)
 
     @discord.app_commands.command(name="ticket_info", description="Show info about the current ticket")
+    @discord.app_commands.guild_only()
     async def ticket_info_slash(self, interaction: discord.Interaction):
-        tickets = load_json(TICKETS_FILE)
+        tickets = TICKETS.partition(interaction.guild_id)
         cid = str(interaction.channel_id)
         if cid not in tickets:
             return await interaction.response.send_message("❌ This is not a ticket channel.", ephemeral=True)
@@ -555,14 +834,16 @@ class Tickets(commands.Cog):
         embed.add_field(name="Created", value=info.get("created_at", "unknown"), inline=False)
         if claimer:
             embed.add_field(name="Claimed by", value=claimer.mention, inline=True)
+        if is_staff_member(interaction.user):
+            add_history_field(embed, interaction.guild_id, info["user_id"])
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
         await interaction.response.send_message(embed=embed)
 
     @discord.app_commands.command(name="blacklist_user", description="Blacklist a user from creating tickets")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def blacklist_user_slash(self, interaction: discord.Interaction, member: discord.Member, reason: str = "No reason provided"):
-        bl = load_json(BLACKLIST_FILE)
-        bl[str(member.id)] = {"by": interaction.user.id, "reason": reason, "time": datetime.utcnow().isoformat()}
-        save_json(BLACKLIST_FILE, bl)
+        entry = {"by": interaction.user.id, "reason": reason, "time": datetime.utcnow().isoformat()}
+        await BLACKLIST.update(interaction.guild_id, lambda bl: bl.update({str(member.id): entry}))
         embed = discord.Embed(title="✅ User Blacklisted", color=discord.Color.red())
         embed.add_field(name="User", value=member.mention)
         embed.add_field(name="Reason", value=reason)
@@ -571,10 +852,10 @@ class Tickets(commands.Cog):
     @discord.app_commands.command(name="unblacklist_user", description="Remove a user from the blacklist")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def unblacklist_user_slash(self, interaction: discord.Interaction, member: discord.Member):
-        bl = load_json(BLACKLIST_FILE)
-        if str(member.id) in bl:
-            bl.pop(str(member.id))
-            save_json(BLACKLIST_FILE, bl)
+        uid = str(member.id)
+        if uid in BLACKLIST.partition(interaction.guild_id) and await BLACKLIST.update(
+            interaction.guild_id, lambda bl: bl.pop(uid, None)
+        ) is not None:
             await interaction.response.send_message(f"✅ {member.mention} has been removed from the blacklist.", ephemeral=True)
         else:
             await interaction.response.send_message(f"❌ {member.mention} is not blacklisted.", ephemeral=True)
@@ -582,7 +863,7 @@ class Tickets(commands.Cog):
     @discord.app_commands.command(name="blacklist_view", description="View the current blacklist")
     @discord.app_commands.checks.has_permissions(administrator=True)
     async def blacklist_view_slash(self, interaction: discord.Interaction):
-        bl = load_json(BLACKLIST_FILE)
+        bl = BLACKLIST.partition(interaction.guild_id)
         if not bl:
             return await interaction.response.send_message("✅ Blacklist is empty.", ephemeral=True)
         
@@ -599,10 +880,4 @@ async def setup(bot):
     # Register persistent views so buttons/select keep working after restart
     bot.add_view(TicketPanelView())
     bot.add_view(TicketCloseView())
-    
-    # Sync slash commands
-    try:
-        await bot.tree.sync()
-        logger.info("Slash commands synced successfully")
-    except Exception:
-        logger.exception("Failed to sync slash commands")
+    # Slash commands are synced once from bot.py's setup_hook (skipped when unchanged)
@@ -0,0 +1,285 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+import discord
+from discord.ext import commands
+from cogs.metrics import CONFIG
+from cogs.records import Profile
+from cogs.storage import load_json
+
+BASE = Path(__file__).parent.parent
+TRACES_DIR = BASE / "data" / "traces"
+SHOP_FILE = BASE / "data" / "shop.json"
+
+logger = logging.getLogger(__name__)
+
+TRACE_VERSION = 1
+FLUSH_INTERVAL = 5
+DEFAULT_TRACE_MINUTES = CONFIG.get("trace_max_minutes", 60)
+# Arguments that can't identify anyone (numbers, durations like 2h, winner counts like
+# 3w, price filters like <=500, giveaway modes like by:level) are kept verbatim.
+STRUCTURAL = re.compile(r"\d+(\.\d+)?[smhdw]?|<=\d+|by:[a-z]+")
+
+# Event kinds. Each trace line after the header is
+#   [t_ms, kind, guild, channel, user, payload]
+# where guild/channel/user are small per-trace aliases, never real snowflakes.
+MESSAGE = "m"        # payload: content length
+COMMAND = "c"        # payload: [qualified name, args, kwargs]
+APP_COMMAND = "a"    # payload: [qualified name, options]
+COMPONENT = "b"      # payload: custom_id
+MEMBER_JOIN = "j"    # payload: is bot
+MEMBER_REMOVE = "l"  # payload: is bot
+
+
+def trace_keywords() -> set:
+    """Words the bot itself defines (stat names, ticket types, shop items and categories).
+
+    These are kept verbatim in traces so a replay takes the same code paths.
+    """
+    keywords = set(Profile.COUNTERS) | {"kd", "kills", "deaths", "playtime", "level"}
+    keywords.update(str(o.get("value", "")).lower() for o in CONFIG.get("ticket_options", []))
+    shop = load_json(SHOP_FILE)
+    items = shop.get("items", []) if isinstance(shop, dict) and isinstance(shop.get("items"), list) else []
+    for item in items:
+        keywords.add(str(item.get("id", "")).lower())
+        keywords.add(str(item.get("category", "general")).lower())
+    keywords.discard("")
+    return keywords
+
+
+class Anonymizer:
+    """Maps snowflakes to 1, 2, 3... for the lifetime of one trace. The mapping is never written.
+
+    Free text that isn't a known keyword or structural token is replaced by a salted hash.
+    The salt is random per trace and never written, so equal strings still match within a
+    trace but can't be looked up or compared across traces.
+    """
+
+    def __init__(self, keywords: set = frozenset()):
+        self._aliases = {}
+        self.keywords = keywords
+        self._salt = os.urandom(16)
+
+    def __call__(self, snowflake) -> int | None:
+        if snowflake is None:
+            return None
+        alias = self._aliases.get(snowflake)
+        if alias is None:
+            alias = self._aliases[snowflake] = len(self._aliases) + 1
+        return alias
+
+    def value(self, value):
+        """Encode a converted command argument without leaking names, ids or free text."""
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, str):
+            if value.lower() in self.keywords or STRUCTURAL.fullmatch(value):
+                return value
+            digest = hashlib.blake2b(value.encode("utf-8"), key=self._salt, digest_size=6).hexdigest()
+            return {"h": digest, "s": len(value)}
+        if isinstance(value, (discord.Member, discord.User)):
+            return {"u": self(value.id)}
+        if isinstance(value, discord.Role):
+            return {"r": self(value.id)}
+        if isinstance(value, discord.abc.GuildChannel):
+            return {"c": self(value.id)}
+        if isinstance(value, (list, tuple)):
+            return [self.value(v) for v in value]
+        return {"s": len(str(value))}
+
+
+def read_trace(path: Path) -> tuple[dict, list]:
+    """Return the header and the events of a trace, sorted by time."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("v") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {header.get('v')!r} in {path}")
+        events = [json.loads(line) for line in f if line.strip()]
+    events.sort(key=lambda e: e[0])
+    return header, events
+
+
+class TraceRecorder(commands.Cog):
+    """Records anonymized gateway events and command invocations for offline replay.
+
+    Traces are gzip'd JSON lines under ``data/traces/``; replay them with
+    ``python -m benchmarks.replay``.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.path = None
+        self.started = 0.0
+        self.stop_at = 0.0
+        self.events = 0
+        self.anon = None
+        self._buffer = []
+        self._flusher = None
+        self._pending = None  # the latest gzip append, running in a worker thread
+        self._original_error_handler = None
+
+    async def cog_load(self):
+        # Failed commands are recorded by wrapping the bot's handler instead of adding an
+        # on_command_error listener, which would switch off discord.py's default logging
+        original = self._original_error_handler = self.bot.on_command_error
+
+        async def on_command_error(ctx, error):
+            if self.recording and ctx.command and isinstance(error, commands.CommandInvokeError):
+                self._record_command(ctx)
+            await original(ctx, error)
+
+        self.bot.on_command_error = on_command_error
+
+    async def cog_unload(self):
+        if self._original_error_handler is not None:
+            self.bot.on_command_error = self._original_error_handler
+            self._original_error_handler = None
+        await self.stop()
+
+    @property
+    def recording(self) -> bool:
+        return self.path is not None
+
+    def start(self, minutes: float = DEFAULT_TRACE_MINUTES) -> Path:
+        TRACES_DIR.mkdir(parents=True, exist_ok=True)
+        self.path = TRACES_DIR / f"trace-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.jsonl.gz"
+        self.started = time.time()
+        self.stop_at = self.started + minutes * 60
+        self.events = 0
+        self.anon = Anonymizer(trace_keywords())
+        header = {"v": TRACE_VERSION, "started": int(self.started), "prefix": self.bot.command_prefix
+                  if isinstance(self.bot.command_prefix, str) else None}
+        self._buffer = [json.dumps(header)]
+        self._flusher = asyncio.create_task(self._flush_loop())
+        logger.info("Recording trace to %s for up to %s minutes", self.path, minutes)
+        return self.path
+
+    async def stop(self) -> Path | None:
+        if not self.recording:
+            return None
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        await self._flush()
+        if self._pending:
+            await self._pending
+        path, self.path = self.path, None
+        logger.info("Trace %s closed with %d events", path, self.events)
+        return path
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self._flush()
+            if time.time() >= self.stop_at:
+                self._flusher = None
+                await self.stop()
+                return
+
+    async def _flush(self):
+        if not self._buffer or not self.path:
+            return
+        lines, self._buffer = self._buffer, []
+        # Appends are chained so they never overlap, and shielded so cancelling the flusher
+        # mid-write can't leave a thread appending while the next flush starts another
+        self._pending = asyncio.create_task(self._write(self._pending, self.path, "\n".join(lines) + "\n"))
+        await asyncio.shield(self._pending)
+
+    async def _write(self, previous, path: Path, text: str):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await asyncio.to_thread(self._append, path, text)
+        except OSError:
+            logger.exception("Failed to append to trace %s", path)
+
+    @staticmethod
+    def _append(path: Path, text: str):
+        # Each flush appends a gzip member; gzip readers treat the file as one stream
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            f.write(text)
+
+    def _record(self, created_at: datetime | None, kind: str, guild, channel, user, payload):
+        when = created_at.timestamp() if created_at else time.time()
+        event = [max(0, int((when - self.started) * 1000)), kind,
+                 self.anon(guild.id if guild else None), self.anon(channel.id if channel else None),
+                 self.anon(user.id if user else None), payload]
+        self._buffer.append(json.dumps(event, separators=(",", ":")))
+        self.events += 1
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if self.recording and not message.author.bot:
+            self._record(message.created_at, MESSAGE, message.guild, message.channel, message.author, len(message.content))
+
+    def _record_command(self, ctx):
+        args = [self.anon.value(a) for a in ctx.args[2:]]  # skip self and ctx
+        kwargs = {k: self.anon.value(v) for k, v in ctx.kwargs.items()}
+        self._record(ctx.message.created_at, COMMAND, ctx.guild, ctx.channel, ctx.author,
+                     [ctx.command.qualified_name, args, kwargs])
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx):
+        if self.recording:
+            self._record_command(ctx)
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        if self.recording:
+            options = {k: self.anon.value(v) for k, v in interaction.namespace}
+            self._record(interaction.created_at, APP_COMMAND, interaction.guild, interaction.channel,
+                         interaction.user, [command.qualified_name, options])
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if self.recording and interaction.type == discord.InteractionType.component:
+            custom_id = (interaction.data or {}).get("custom_id")
+            self._record(interaction.created_at, COMPONENT, interaction.guild, interaction.channel,
+                         interaction.user, custom_id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if self.recording:
+            self._record(None, MEMBER_JOIN, member.guild, None, member, member.bot)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        if self.recording:
+            self._record(None, MEMBER_REMOVE, member.guild, None, member, member.bot)
+
+    @commands.group(name="trace", invoke_without_command=True)
+    @commands.has_permissions(administrator=True)
+    async def trace(self, ctx):
+        """🎞️ Gateway trace recording status."""
+        if not self.recording:
+            return await ctx.send("⏹️ Not recording. Use `!trace start [minutes]`.")
+        elapsed = (time.time() - self.started) / 60
+        await ctx.send(f"⏺️ Recording `{self.path.name}` — {self.events} events in {elapsed:.1f} min")
+
+    @trace.command(name="start")
+    @commands.has_permissions(administrator=True)
+    async def trace_start(self, ctx, minutes: float = DEFAULT_TRACE_MINUTES):
+        if self.recording:
+            return await ctx.send(f"❌ Already recording `{self.path.name}`.")
+        path = self.start(minutes)
+        await ctx.send(f"⏺️ Recording anonymized events to `{path.name}` for up to {minutes:g} min.")
+
+    @trace.command(name="stop")
+    @commands.has_permissions(administrator=True)
+    async def trace_stop(self, ctx):
+        events = self.events
+        path = await self.stop()
+        if path is None:
+            return await ctx.send("❌ Not recording.")
+        await ctx.send(f"⏹️ Saved `{path.name}` ({events} events, {path.stat().st_size / 1024:.0f} KiB).")
+
+
+async def setup(bot):
+    await bot.add_cog(TraceRecorder(bot))
@@ -0,0 +1,312 @@
+import array
+import asyncio
+import json
+import logging
+import mmap
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import discord
+from discord.ext import commands
+from discord.ui import Button, View
+from cogs.metrics import CONFIG
+from cogs.storage import PartitionedStore
+
+BASE = Path(__file__).parent.parent
+TRIVIA_FILE = BASE / "data" / "trivia.jsonl"
+
+logger = logging.getLogger(__name__)
+
+ANSWER_SECONDS = CONFIG.get("trivia_answer_seconds", 20)
+BANK_CHECK_INTERVAL = 5  # seconds between trivia.jsonl mtime checks
+MAX_ROUNDS = 10
+MAX_OPTIONS = 5  # one row of buttons
+POINTS_CORRECT = 10
+POINTS_FASTEST = 5
+SAMPLER_IDLE_SECONDS = 7 * 86400  # a channel's no-repeat history is forgotten after a week without games
+
+TRIVIA = PartitionedStore("trivia")
+
+
+class TriviaBank:
+    """Questions in a JSON-lines file, memory-mapped and parsed one at a time.
+
+    Each line is ``{"q": ..., "options": [...], "answer": ..., "category": ...}``. Only
+    the byte offset of every line is kept in memory (8 bytes per question); a question
+    is decoded when it is drawn. The offsets are rebuilt when the file changes.
+
+    The map is of a private temporary copy, so the file can be edited or truncated in
+    place while it is mapped (reading a truncated mapping crashes the process).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offsets = array.array("Q")
+        self.version = 0  # bumped on every reload so per-channel samplers start over
+        self._file = None
+        self._map = None
+        self._mtime = None
+        self._checked = 0.0
+
+    def __len__(self):
+        self.refresh()
+        return len(self.offsets)
+
+    def refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._checked < BANK_CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if force or mtime != self._mtime:
+            self._mtime = mtime
+            self._open()
+
+    def _open(self):
+        self.close()
+        self.offsets = array.array("Q")
+        self.version += 1
+        if self._mtime is None:
+            return
+        self._file = tempfile.TemporaryFile()
+        try:
+            with open(self.path, "rb") as src:
+                shutil.copyfileobj(src, self._file)
+        except FileNotFoundError:
+            pass
+        self._file.flush()
+        if self._file.tell() == 0:
+            return self.close()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        pos, size = 0, len(self._map)
+        while pos < size:
+            end = self._map.find(b"\n", pos)
+            end = size if end == -1 else end
+            if self._map[pos:end].strip():
+                self.offsets.append(pos)
+            pos = end + 1
+        logger.info("Indexed %d trivia questions", len(self.offsets))
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+
+    def question(self, index: int) -> dict | None:
+        """Decode question ``index``; None (and a warning) if the line is malformed."""
+        start = self.offsets[index]
+        end = self._map.find(b"\n", start)
+        line = self._map[start:end if end != -1 else len(self._map)]
+        try:
+            q = json.loads(line)
+            options = [str(o) for o in q["options"]]
+            if not 2 <= len(options) <= MAX_OPTIONS or str(q["answer"]) not in options:
+                raise ValueError("answer must be one of 2-5 options")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Skipping trivia question at byte %d: %s", start, e)
+            return None
+        return {"q": str(q["q"]), "options": options, "answer": options.index(str(q["answer"])),
+                "category": q.get("category")}
+
+
+class NoRepeatSampler:
+    """Draws 0..n-1 in random order without repeats, starting a new cycle when all are used.
+
+    A partial Fisher-Yates shuffle over a sparse swap map: each draw is O(1) and memory
+    grows with the number of draws, not with the size of the bank.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.drawn = 0
+        self._swaps = {}
+
+    def next(self) -> int:
+        if self.drawn >= self.n:
+            self.drawn = 0
+            self._swaps = {}
+        i = self.drawn
+        j = random.randrange(i, self.n)
+        pick = self._swaps.get(j, j)
+        self._swaps[j] = self._swaps.get(i, i)
+        self.drawn += 1
+        return pick
+
+
+BANK = TriviaBank(TRIVIA_FILE)
+
+
+class AnswerButton(Button):
+    def __init__(self, index: int, option: str):
+        super().__init__(label=f"{chr(65 + index)}. {option}"[:80], style=discord.ButtonStyle.primary)
+        self.index = index
+
+    async def callback(self, interaction: discord.Interaction):
+        view = self.view
+        if view.is_finished():
+            return await interaction.response.send_message("⌛ Time's up for this question.", ephemeral=True)
+        if interaction.user.id in view.answers:
+            return await interaction.response.send_message("❌ You already answered.", ephemeral=True)
+        view.answers[interaction.user.id] = (self.index, time.monotonic() - view.opened)
+        await interaction.response.send_message(f"🔒 Locked in **{chr(65 + self.index)}**.", ephemeral=True)
+
+
+class QuestionView(View):
+    """Answer buttons for one question. Only each user's first answer counts."""
+
+    def __init__(self, question: dict):
+        super().__init__(timeout=None)  # the session closes the window itself
+        self.answers = {}  # user_id -> (option index, seconds taken)
+        self.opened = time.monotonic()
+        for i, option in enumerate(question["options"]):
+            self.add_item(AnswerButton(i, option))
+
+    def close(self):
+        for child in self.children:
+            child.disabled = True
+        self.stop()
+
+
+class Trivia(commands.Cog):
+    """Timed trivia rounds answered with buttons, with a per-guild leaderboard."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.samplers = {}  # channel_id -> (bank version, NoRepeatSampler, monotonic time of last game)
+        self.sessions = set()  # channel ids with a game in progress
+
+    async def cog_load(self):
+        BANK.refresh(force=True)
+
+    async def cog_unload(self):
+        BANK.close()
+
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    def next_question(self, channel_id: int) -> dict | None:
+        """A question this channel hasn't had since the bank was last cycled through."""
+        size = len(BANK)
+        if not size:
+            return None
+        entry = self.samplers.get(channel_id)
+        if entry is None or entry[0] != BANK.version:
+            entry = self.samplers[channel_id] = (BANK.version, NoRepeatSampler(size), time.monotonic())
+        for _ in range(min(size, 10)):  # skip a few malformed lines rather than fail the round
+            question = BANK.question(entry[1].next())
+            if question is not None:
+                return question
+        return None
+
+    def prune_samplers(self, channel_id: int):
+        """Mark ``channel_id`` as just played; drop samplers of an older bank or idle channels."""
+        now = time.monotonic()
+        entry = self.samplers.get(channel_id)
+        if entry is not None:
+            self.samplers[channel_id] = (entry[0], entry[1], now)
+        for cid, (version, _, last_game) in list(self.samplers.items()):
+            if version != BANK.version or now - last_game > SAMPLER_IDLE_SECONDS:
+                del self.samplers[cid]
+
+    async def play_round(self, ctx, question: dict, number: int, rounds: int, scores: dict):
+        options = "\n".join(f"**{chr(65 + i)}.** {opt}" for i, opt in enumerate(question["options"]))
+        embed = discord.Embed(title=f"🧠 Trivia — Question {number}/{rounds}", color=discord.Color.blurple())
+        embed.add_field(name=question["q"][:256], value=options, inline=False)
+        embed.set_footer(text=f"{question['category'] or 'general'} · {ANSWER_SECONDS}s to answer")
+        view = QuestionView(question)
+        msg = await ctx.send(embed=embed, view=view)
+        await asyncio.sleep(ANSWER_SECONDS)
+        view.close()
+        try:
+            await msg.edit(view=view)
+        except discord.HTTPException:
+            pass
+
+        correct = sorted((seconds, uid) for uid, (choice, seconds) in view.answers.items()
+                         if choice == question["answer"])
+        for uid in view.answers:
+            entry = scores.setdefault(uid, [0, 0, 0])  # points, correct, answered
+            entry[2] += 1
+        for rank, (_, uid) in enumerate(correct):
+            scores[uid][0] += POINTS_CORRECT + (POINTS_FASTEST if rank == 0 else 0)
+            scores[uid][1] += 1
+
+        answer = question["options"][question["answer"]]
+        result = discord.Embed(title=f"✅ The answer was {chr(65 + question['answer'])}. {answer}",
+                               color=discord.Color.green() if correct else discord.Color.red())
+        if correct:
+            fastest_seconds, fastest = correct[0]
+            result.description = f"⚡ Fastest: <@{fastest}> ({fastest_seconds:.1f}s)"
+            others = ", ".join(f"<@{uid}>" for _, uid in correct[1:11])
+            if others:
+                result.add_field(name=f"Also correct ({len(correct) - 1})", value=others, inline=False)
+        else:
+            result.description = "Nobody got it right!"
+        result.set_footer(text=f"{len(view.answers)} answered")
+        await ctx.send(embed=result)
+
+    async def record(self, guild_id: int, scores: dict):
+        """Add a finished session's scores to the leaderboard with a single save."""
+        def add(board: dict):
+            for uid, (points, correct, answered) in scores.items():
+                entry = board.setdefault(str(uid), {"points": 0, "correct": 0, "answered": 0})
+                entry["points"] += points
+                entry["correct"] += correct
+                entry["answered"] += answered
+        await TRIVIA.update(guild_id, add)
+
+    @commands.group(name="trivia", invoke_without_command=True)
+    async def trivia(self, ctx, rounds: int = 1):
+        """🧠 Play trivia: everyone answers with the buttons before time runs out."""
+        if not 1 <= rounds <= MAX_ROUNDS:
+            return await ctx.send(f"❌ Rounds must be between 1 and {MAX_ROUNDS}.")
+        if ctx.channel.id in self.sessions:
+            return await ctx.send("❌ A trivia game is already running in this channel.")
+        self.sessions.add(ctx.channel.id)
+        scores = {}  # user_id -> [points, correct, answered], written once at the end
+        try:
+            for number in range(1, rounds + 1):
+                question = self.next_question(ctx.channel.id)
+                if question is None:
+                    await ctx.send("❌ The trivia bank is empty.")
+                    break
+                await self.play_round(ctx, question, number, rounds, scores)
+        finally:
+            self.sessions.discard(ctx.channel.id)
+            self.prune_samplers(ctx.channel.id)
+            if scores:
+                await self.record(ctx.guild.id, scores)
+
+        if rounds > 1 and scores:
+            standings = sorted(scores.items(), key=lambda kv: kv[1][0], reverse=True)[:10]
+            embed = discord.Embed(title="🏁 Trivia Results", color=discord.Color.gold())
+            embed.description = "\n".join(
+                f"**#{i}** <@{uid}> — {points} pts ({correct}/{rounds} correct)"
+                for i, (uid, (points, correct, _)) in enumerate(standings, 1)
+            )
+            await ctx.send(embed=embed)
+
+    @trivia.command(name="top")
+    async def trivia_top(self, ctx):
+        """🏆 Trivia leaderboard."""
+        board = TRIVIA.partition(ctx.guild.id)
+        if not board:
+            return await ctx.send("🏆 No trivia has been played here yet.")
+        top = sorted(board.items(), key=lambda kv: kv[1]["points"], reverse=True)[:10]
+        embed = discord.Embed(title="🏆 Trivia Leaderboard", color=discord.Color.gold())
+        embed.description = "\n".join(
+            f"**#{i}** <@{uid}> — {entry['points']:,} pts · {entry['correct']}/{entry['answered']} correct"
+            for i, (uid, entry) in enumerate(top, 1)
+        )
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Trivia(bot))
@@ -1,17 +1,162 @@
 import discord
 from discord.ext import commands
+from pathlib import Path
 from datetime import datetime
+import hashlib
+import json
+import logging
+import time
+
+BASE = Path(__file__).parent.parent
+TREE_HASH_FILE = BASE / "data" / "command_tree.json"
+
+logger = logging.getLogger(__name__)
+
+
+def command_tree_fingerprint(bot) -> tuple[str, int]:
+    """Stable hash of the serialized global slash-command tree, plus the command count."""
+    payload = []
+    for cmd in bot.tree.get_commands():
+        try:
+            payload.append(cmd.to_dict(bot.tree))
+        except TypeError:  # discord.py < 2.4
+            payload.append(cmd.to_dict())
+    payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+    blob = json.dumps({"application_id": bot.application_id, "commands": payload}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest(), len(payload)
+
+
+class GuildStats:
+    """Running counters for a guild, seeded once and updated from gateway events."""
+
+    __slots__ = ("humans", "bots", "text_channels", "voice_channels", "categories", "roles")
+
+    def __init__(self, guild: discord.Guild):
+        self.bots = sum(1 for m in guild.members if m.bot)
+        self.humans = len(guild.members) - self.bots
+        self.text_channels = len(guild.text_channels)
+        self.voice_channels = len(guild.voice_channels)
+        self.categories = len(guild.categories)
+        self.roles = len(guild.roles)
+
+    def channel_delta(self, channel, delta: int):
+        if isinstance(channel, discord.CategoryChannel):
+            self.categories += delta
+        elif isinstance(channel, discord.VoiceChannel):
+            self.voice_channels += delta
+        elif isinstance(channel, discord.TextChannel):
+            self.text_channels += delta
+
 
 class Utilities(commands.Cog):
     """Utility commands for server management."""
     
     def __init__(self, bot):
         self.bot = bot
+        self.stats = {}  # guild_id -> GuildStats
+
+    async def sync_command_tree(self, force: bool = False) -> bool:
+        """Sync slash commands unless the tree matches the last synced fingerprint. Returns True if synced."""
+        start = time.perf_counter()
+        digest, count = command_tree_fingerprint(self.bot)
+        previous = {}
+        if TREE_HASH_FILE.exists():
+            try:
+                previous = json.loads(TREE_HASH_FILE.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                previous = {}
+
+        if not force and previous.get("hash") == digest:
+            logger.info(
+                "Command tree unchanged (%s, %d commands); skipped sync in %.1fms, saving ~%.2fs",
+                digest[:12], count, (time.perf_counter() - start) * 1000, previous.get("sync_seconds", 0)
+            )
+            return False
+
+        sync_start = time.perf_counter()
+        try:
+            await self.bot.tree.sync()
+        except Exception:
+            logger.exception("Failed to sync slash commands")
+            return False
+        sync_seconds = time.perf_counter() - sync_start
+        TREE_HASH_FILE.parent.mkdir(parents=True, exist_ok=True)
+        TREE_HASH_FILE.write_text(json.dumps({
+            "hash": digest,
+            "commands": count,
+            "synced_at": datetime.utcnow().isoformat(),
+            "sync_seconds": round(sync_seconds, 3)
+        }, indent=2), encoding="utf-8")
+        logger.info("Slash commands synced (%s, %d commands) in %.2fs", digest[:12], count, sync_seconds)
+        return True
+
+    def guild_stats(self, guild: discord.Guild) -> GuildStats:
+        """O(1) member/channel/role counts for a guild (seeded on first use if needed)."""
+        stats = self.stats.get(guild.id)
+        if stats is None:
+            stats = self.stats[guild.id] = GuildStats(guild)
+        return stats
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self.stats[guild.id] = GuildStats(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.stats[guild.id] = GuildStats(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.stats.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        stats = self.stats.get(member.guild.id)
+        if stats:
+            if member.bot:
+                stats.bots += 1
+            else:
+                stats.humans += 1
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        stats = self.stats.get(member.guild.id)
+        if stats:
+            if member.bot:
+                stats.bots -= 1
+            else:
+                stats.humans -= 1
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        stats = self.stats.get(channel.guild.id)
+        if stats:
+            stats.channel_delta(channel, 1)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        stats = self.stats.get(channel.guild.id)
+        if stats:
+            stats.channel_delta(channel, -1)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        stats = self.stats.get(role.guild.id)
+        if stats:
+            stats.roles += 1
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        stats = self.stats.get(role.guild.id)
+        if stats:
+            stats.roles -= 1
 
     @commands.command(name="serverinfo")
     async def serverinfo(self, ctx):
         """ℹ️ Get server information."""
         guild = ctx.guild
+        stats = self.guild_stats(guild)
         
         embed = discord.Embed(title=f"ℹ️ {guild.name}", color=discord.Color.blurple())
         embed.set_thumbnail(url=guild.icon.url if guild.icon else None)
@@ -20,8 +165,8 @@ class Utilities(commands.Cog):
         embed.add_field(name="Members", value=f"**{guild.member_count}**", inline=True)
         embed.add_field(name="Created", value=f"<t:{int(guild.created_at.timestamp())}:d>", inline=True)
         
-        embed.add_field(name="Channels", value=f"Text: {len(guild.text_channels)} | Voice: {len(guild.voice_channels)}", inline=True)
-        embed.add_field(name="Roles", value=f"**{len(guild.roles)}**", inline=True)
+        embed.add_field(name="Channels", value=f"Text: {stats.text_channels} | Voice: {stats.voice_channels}", inline=True)
+        embed.add_field(name="Roles", value=f"**{stats.roles}**", inline=True)
         embed.add_field(name="Boosts", value=f"**{guild.premium_subscription_count}**", inline=True)
         
         embed.set_footer(text=f"Guild ID: {guild.id}")
@@ -55,14 +200,23 @@ class Utilities(commands.Cog):
     async def membercount(self, ctx):
         """👥 Get member count."""
         guild = ctx.guild
+        stats = self.guild_stats(guild)
         
         embed = discord.Embed(title="👥 Member Count", color=discord.Color.blurple())
         embed.add_field(name="Total Members", value=f"**{guild.member_count}**", inline=True)
-        embed.add_field(name="Humans", value=f"**{sum(1 for m in guild.members if not m.bot)}**", inline=True)
-        embed.add_field(name="Bots", value=f"**{sum(1 for m in guild.members if m.bot)}**", inline=True)
+        embed.add_field(name="Humans", value=f"**{stats.humans}**", inline=True)
+        embed.add_field(name="Bots", value=f"**{stats.bots}**", inline=True)
         
         await ctx.send(embed=embed)
 
+    @commands.command(name="synccommands")
+    @commands.has_permissions(administrator=True)
+    async def synccommands(self, ctx):
+        """🔄 Force a slash-command sync."""
+        async with ctx.typing():
+            synced = await self.sync_command_tree(force=True)
+        await ctx.send("✅ Slash commands synced." if synced else "❌ Slash command sync failed. Check the logs.")
+
     @commands.command(name="ping")
     async def ping(self, ctx):
         """🏓 Check bot latency."""
@@ -89,28 +243,53 @@ class Utilities(commands.Cog):
         # Economy
         embed.add_field(
             name="💰 Economy",
-            value="`balance` `daily` `pay` `leaderboard` `shop` `buy`",
+            value="`balance` `daily` `weekly` `pay` `leaderboard` `shop` `buy` `cart` `checkout` "
+                  "`inventory` `transactions` `economystats` `payout interest|role|csv`",
             inline=False
         )
         
         # Profiles
         embed.add_field(
             name="👤 Profiles",
-            value="`profile` `stats` `leaderboard_kills` `leaderboard_playtime` `achievement`",
+            value="`profile` `stats` `rank` `serverstats` `leaderboard_kills` `leaderboard_playtime` `achievement`",
             inline=False
         )
         
         # Fun
         embed.add_field(
             name="🎮 Fun",
-            value="`rps` `8ball` `coinflip` `roll` `giveaway` `poll` `trivia` `joke`",
+            value="`rps` `8ball` `coinflip` `roll` `joke` `trivia` `trivia top` `poll` `endpoll`",
+            inline=False
+        )
+
+        # Giveaways
+        embed.add_field(
+            name="🎉 Giveaways",
+            value="`giveaway <duration> [Nw] [by:level|by:playtime|by:tickets] <prize>` "
+                  "`giveaway end` `giveaway reroll` `giveaway list`",
+            inline=False
+        )
+
+        # Tickets
+        embed.add_field(
+            name="🎫 Tickets",
+            value="`ticketpanel` `ticketinfo` `closeticket` `ticketstats` "
+                  "`blacklist` `unblacklist` `blacklistlist` `reloadviews`\n"
+                  "Staff see the opener's previous tickets with `/ticket_info` (only to them)",
             inline=False
         )
         
         # Utilities
         embed.add_field(
             name="🔧 Utilities",
-            value="`serverinfo` `userinfo` `membercount` `ping` `help_minecraft`",
+            value="`serverinfo` `userinfo` `membercount` `ping` `synccommands` `help_minecraft`",
+            inline=False
+        )
+
+        # Diagnostics
+        embed.add_field(
+            name="📈 Diagnostics",
+            value="`perf` `stalls` `trace start|stop` and the Prometheus `/metrics` endpoint",
             inline=False
         )
         
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+import discord
+from discord.ext import commands
+from cogs.metrics import CONFIG, REGISTRY, STAFF_ROLES
+
+COGS_DIR = str(Path(__file__).parent)
+
+logger = logging.getLogger(__name__)
+
+STALL_THRESHOLD = CONFIG.get("stall_threshold_ms", 250) / 1000
+TICK_INTERVAL = 0.05
+# Wrappers that sit between the loop and the real callback
+IGNORED_FILES = {"metrics.py", "watchdog.py"}
+
+
+def attribute(frame) -> tuple[str, list[str]]:
+    """Label a stalled stack with its outermost cog frame (the command or view callback).
+
+    Returns the label and the last few formatted frames, innermost last.
+    """
+    label = f"{Path(frame.f_code.co_filename).stem}.{frame.f_code.co_name}"
+    f = frame
+    while f is not None:
+        filename = f.f_code.co_filename
+        if filename.startswith(COGS_DIR) and Path(filename).name not in IGNORED_FILES:
+            label = f"{Path(filename).stem}.{getattr(f.f_code, 'co_qualname', f.f_code.co_name)}"
+        f = f.f_back
+    stack = traceback.extract_stack(frame)
+    return label, [f"{Path(s.filename).name}:{s.lineno} {s.name}" for s in stack[-8:]]
+
+
+class Watchdog(commands.Cog):
+    """Detects event-loop stalls and attributes them to the command or callback that blocked.
+
+    A coroutine bumps a heartbeat every ``TICK_INTERVAL``. A daemon thread checks that
+    heartbeat; when it is older than ``STALL_THRESHOLD`` it samples the loop thread's
+    stack, and once the loop recovers it logs the stall with its attribution.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_tick = time.monotonic()
+        self.offenders = {}  # label -> {"count", "total", "worst", "stack"}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._loop_thread_id = None
+        self._ticker = None
+        self._thread = None
+
+    async def cog_load(self):
+        self._loop_thread_id = threading.get_ident()
+        self._ticker = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def cog_unload(self):
+        self._stop.set()
+        if self._ticker:
+            self._ticker.cancel()
+
+    async def _tick(self):
+        while True:
+            self.last_tick = time.monotonic()
+            await asyncio.sleep(TICK_INTERVAL)
+
+    def _watch(self):
+        stall = None  # (label, stack) sampled during the current stall
+        while not self._stop.wait(STALL_THRESHOLD / 2):
+            lag = time.monotonic() - self.last_tick - TICK_INTERVAL
+            if lag > STALL_THRESHOLD:
+                if stall is None:
+                    frame = sys._current_frames().get(self._loop_thread_id)
+                    stall = attribute(frame) if frame is not None else ("unknown", [])
+                stall_lag = lag
+            elif stall is not None:
+                self._record(stall[0], stall_lag, stall[1])
+                stall = None
+
+    def _record(self, label: str, seconds: float, stack: list):
+        with self._lock:
+            entry = self.offenders.setdefault(label, {"count": 0, "total": 0.0, "worst": 0.0, "stack": stack})
+            entry["count"] += 1
+            entry["total"] += seconds
+            if seconds >= entry["worst"]:
+                entry["worst"] = seconds
+                entry["stack"] = stack
+        REGISTRY.observe("bot_loop_stall_seconds", seconds, source=label)
+        logger.warning("Event loop stalled for %.0fms in %s\n  %s", seconds * 1000, label, "\n  ".join(stack))
+
+    def worst_offenders(self, limit: int = 10) -> list:
+        with self._lock:
+            items = [(label, dict(entry)) for label, entry in self.offenders.items()]
+        items.sort(key=lambda kv: kv[1]["total"], reverse=True)
+        return items[:limit]
+
+    @commands.command(name="stalls")
+    @commands.has_any_role(*STAFF_ROLES)
+    async def stalls(self, ctx):
+        """🐢 Worst event-loop stalls since startup."""
+        offenders = self.worst_offenders()
+        embed = discord.Embed(title="🐢 Event Loop Stalls", color=discord.Color.orange())
+        embed.description = f"Threshold: {STALL_THRESHOLD * 1000:.0f}ms"
+        if not offenders:
+            embed.add_field(name="No stalls", value="The event loop hasn't blocked past the threshold.", inline=False)
+        for label, entry in offenders:
+            where = entry["stack"][-1] if entry["stack"] else "n/a"
+            embed.add_field(
+                name=f"`{label}`",
+                value=f"×{entry['count']} | total {entry['total'] * 1000:.0f}ms | worst {entry['worst'] * 1000:.0f}ms\n`{where}`",
+                inline=False
+            )
+        await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Watchdog(bot))
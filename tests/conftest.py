@@ -0,0 +1,45 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cogs import storage  # noqa: E402
+from cogs.storage import StateClient, StateService  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    """Give every test an empty guild data directory and cold store caches."""
+    monkeypatch.setattr(storage, "GUILDS_DIR", tmp_path / "guilds")
+    for store in storage.STORES.values():
+        monkeypatch.setattr(store, "legacy_path", None)
+        monkeypatch.setattr(store, "_last_sweep", store._last_sweep)
+        store._partitions.clear()
+        store._versions.clear()
+    yield tmp_path
+    for store in storage.STORES.values():
+        store._partitions.clear()
+        store._versions.clear()
+
+
+@pytest.fixture
+def state_service(tmp_path, monkeypatch):
+    """Run a StateService and point this process at it, as a shard worker would be."""
+    socket_path = str(tmp_path / "state.sock")
+    monkeypatch.setattr(storage, "STATE_SOCKET", socket_path)
+
+    def run(scenario):
+        async def main():
+            server = await StateService(socket_path).serve()
+            monkeypatch.setattr(storage, "CLIENT", StateClient(socket_path))
+            try:
+                return await scenario()
+            finally:
+                storage.CLIENT._disconnect()
+                server.close()
+                await server.wait_closed()
+        return asyncio.run(main())
+    return run
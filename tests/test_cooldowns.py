@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeTextChannel
+from cogs import cooldowns
+from cogs.cooldowns import CooldownService, format_duration, parse_duration
+from cogs.economy import Economy
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("45", 45), ("30s", 30), ("10m", 600), ("2H", 7200), (" 7d ", 604800), ("1w", 604800), ("0m", 0),
+    ("", None), ("m", None), ("1.5h", None), ("-5m", None), ("10y", None), ("2h30m", None),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("seconds, text", [
+    (0, "0s"), (59.9, "59s"), (60, "1m"), (3599, "59m"), (3600, "1h 0m"), (5430, "1h 30m"),
+    (86399, "23h 59m"), (86400, "1d 0h"), (8 * 86400 + 7200, "8d 2h"),
+])
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
+
+
+def test_claim_starts_the_cooldown_once():
+    service = CooldownService()
+
+    async def scenario():
+        first = await service.claim(1, "daily", 42, 3600)
+        second = await service.claim(1, "daily", 42, 3600)
+        other = await service.claim(1, "daily", 43, 3600)
+        return first, second, other
+    first, second, other = asyncio.run(scenario())
+    assert first == 0 and other == 0
+    assert 3590 < second <= 3600
+    assert service.remaining(1, "daily", 42) == second
+    assert service.remaining(2, "daily", 42) == 0
+
+
+def test_claim_after_expiry_and_reset():
+    service = CooldownService()
+
+    async def scenario():
+        await service.set(1, "daily", 42, int(time.time()) - 1)
+        assert await service.claim(1, "daily", 42, 60) == 0
+        await service.reset(1, "daily", 42)
+        assert service.remaining(1, "daily", 42) == 0
+        assert await service.claim(1, "daily", 42, 60) == 0
+    asyncio.run(scenario())
+
+
+def test_expired_entries_are_swept_every_prune_every_writes(monkeypatch):
+    monkeypatch.setattr(cooldowns, "PRUNE_EVERY", 3)
+    service = CooldownService()
+    expired = int(time.time()) - 10
+
+    async def scenario():
+        await service.set(1, "weekly", 1, expired)
+        await service.set(1, "daily", 2, expired)
+        assert service.store.partition(1) == {"weekly": {"1": expired}, "daily": {"2": expired}}
+        await service.claim(1, "daily", 3, 60)
+    asyncio.run(scenario())
+    assert list(service.store.partition(1)) == ["daily"]
+    assert list(service.store.partition(1)["daily"]) == ["3"]
+
+
+def test_failed_reward_releases_the_cooldown(monkeypatch):
+    guild = FakeGuild()
+    guild.channels.append(FakeTextChannel(guild, "general"))
+    ctx = FakeContext(FakeBot(), guild, guild.add_member("steve"))
+    cog = Economy(ctx.bot)
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("save failed")
+    monkeypatch.setattr(cog, "add_balance", fail)
+    with pytest.raises(RuntimeError):
+        asyncio.run(cog.claim_reward(ctx, "daily"))
+    assert cooldowns.COOLDOWNS.remaining(guild.id, "daily", ctx.author.id) == 0
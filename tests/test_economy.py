@@ -0,0 +1,237 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeTextChannel
+from cogs import economy
+from cogs.cooldowns import COOLDOWNS
+from cogs.economy import BALANCE_BUCKETS, ECONOMY, ECONOMY_STATS, Economy, EconomyStats, ShopCatalog
+from cogs.records import Account
+from cogs.storage import PartitionedStore, StaleWriteError, partition_path
+
+
+def write(path, data, mtime_ns):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def shop(tmp_path):
+    path = tmp_path / "shop.json"
+    write(path, {"items": [{"id": "Sword", "price": 50, "category": "Weapons"}, {"id": "apple", "price": 5}]}, 10**18)
+    catalog = ShopCatalog(path)
+    catalog.refresh(force=True)
+    return catalog
+
+
+def test_catalog_indexes_items(shop):
+    assert shop.ids_by_price == ["apple", "sword"]
+    assert shop.by_category == {"general": ["apple"], "weapons": ["sword"]}
+    assert shop.get("SWORD")["name"] == "sword"
+
+
+def test_catalog_reloads_when_the_file_changes(shop):
+    write(shop.path, {"bow": {"price": 30, "category": "weapons"}}, 2 * 10**18)
+    shop.refresh(force=True)
+    assert list(shop.items) == ["bow"]
+    assert shop.get("sword") is None
+
+
+@pytest.mark.parametrize("broken", [b'{"items": [{"id": "bow", "pri', b"[]", b'{"items": {"bow": 1}}', b"\xff\xfe{"])
+def test_catalog_keeps_last_good_index_on_a_bad_file(shop, broken):
+    shop.path.write_bytes(broken)
+    os.utime(shop.path, ns=(2 * 10**18, 2 * 10**18))
+    shop.refresh(force=True)
+    assert shop.ids_by_price == ["apple", "sword"]
+
+    # Fixed on the next save: the mtime wasn't recorded, so an unforced check picks it up
+    write(shop.path, {"items": [{"id": "bow", "price": 30}]}, 3 * 10**18)
+    shop._checked = 0.0
+    shop.refresh()
+    assert shop.ids_by_price == ["bow"]
+
+
+def test_catalog_skips_malformed_items(shop):
+    write(shop.path, {"items": [{"id": "bow", "price": "cheap"}, "axe", {"price": 3}, {"id": "pick", "price": 7}]},
+          2 * 10**18)
+    shop.refresh(force=True)
+    assert list(shop.items) == ["pick"]
+
+
+@pytest.fixture
+def ctx():
+    guild = FakeGuild()
+    guild.channels.append(FakeTextChannel(guild, "general"))
+    return FakeContext(FakeBot(), guild, guild.add_member("steve"))
+
+
+def test_cart_skips_items_removed_from_the_shop(shop, monkeypatch, ctx):
+    monkeypatch.setattr(economy, "CATALOG", shop)
+    guild = ctx.guild
+    cog = Economy(ctx.bot)
+
+    async def scenario():
+        await cog.add_balance(guild.id, ctx.author.id, 100)
+        await cog.cart_add.callback(cog, ctx, "sword")
+        await cog.cart_add.callback(cog, ctx, "apple", 2)
+        write(shop.path, {"items": [{"id": "apple", "price": 5}]}, 2 * 10**18)
+        shop.refresh(force=True)
+        await cog.cart.callback(cog, ctx)
+        await cog.checkout_cmd.callback(cog, ctx)
+    asyncio.run(scenario())
+
+    fields = [(f.name, f.value) for f in ctx.sent[2][1]["embed"].fields]
+    assert fields == [("1× sword", "❌ No longer available"), ("2× apple", "10 coins")]
+    assert ctx.sent[2][1]["embed"].footer.text.startswith("Total: 10 coins")
+    assert ctx.sent[3][1]["embed"].description == "2× apple"
+    assert cog.get_balance(guild.id, ctx.author.id) == 90
+
+
+class FakeAttachment:
+    def __init__(self, text: str):
+        self.raw = text.encode("utf-8")
+        self.size = len(self.raw)
+
+    async def read(self):
+        return self.raw
+
+
+def test_bulk_credit_skips_non_positive_amounts(ctx):
+    cog = Economy(ctx.bot)
+    summary = asyncio.run(cog.bulk_credit(ctx.guild.id, {1: 50, 2: 0, 3: -20, "4": "7"}, "Event"))
+    assert (summary["players"], summary["total"], summary["skipped"]) == (2, 57, 2)
+    assert [cog.get_balance(ctx.guild.id, uid) for uid in (1, 2, 3, 4)] == [50, 0, 0, 7]
+    journal = json.loads(partition_path(ctx.guild.id, "payouts.log").read_text(encoding="utf-8"))
+    assert journal["credits"] == {"1": 50, "4": 7}
+
+
+def test_bulk_credit_changes_nothing_if_it_fails_before_crediting(ctx, monkeypatch):
+    monkeypatch.setattr(economy, "PAYOUT_CHUNK", 2)
+    cog = Economy(ctx.bot)
+    calls = []
+
+    async def progress(done, total):
+        calls.append(done)
+        if done == 4:
+            raise RuntimeError("cancelled mid-payout")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cog.bulk_credit(ctx.guild.id, {uid: 10 for uid in range(1, 6)}, "Event", progress))
+    assert calls == [2, 4]
+    assert all(cog.get_balance(ctx.guild.id, uid) == 0 for uid in range(1, 6))
+    assert not partition_path(ctx.guild.id, "payouts.log").exists()
+
+
+def test_interest_rejects_a_zero_cap(ctx):
+    cog = Economy(ctx.bot)
+    asyncio.run(cog.add_balance(ctx.guild.id, ctx.author.id, 1000))
+    asyncio.run(cog.payout_interest.callback(cog, ctx, 10, 0))
+    assert ctx.sent[-1][0].startswith("❌ Cap must be positive")
+    assert cog.get_balance(ctx.guild.id, ctx.author.id) == 1000
+
+
+def test_csv_payout_skips_negative_rows(ctx):
+    cog = Economy(ctx.bot)
+    asyncio.run(cog.add_balance(ctx.guild.id, 2, 100))
+    ctx.message.attachments = [FakeAttachment("user_id,amount\n1,50\n2,-30\n<@3>,25\n1,5\n4,0\n")]
+    asyncio.run(cog.payout_csv.callback(cog, ctx, reason="Event"))
+    assert ctx.sent[0][0] == "ℹ️ Skipped 3 row(s) that weren't `user_id,amount` with a positive amount."
+    assert [cog.get_balance(ctx.guild.id, uid) for uid in (1, 2, 3, 4)] == [55, 100, 25, 0]
+
+
+def sketch(*balances):
+    stats = {"supply": 0, "counts": [0] * BALANCE_BUCKETS, "sums": [0] * BALANCE_BUCKETS, "days": {}}
+    for balance in balances:
+        EconomyStats._move(stats, 0, balance)
+    return stats
+
+
+def test_percentile_interpolates_within_a_bucket():
+    assert EconomyStats.percentile(sketch(), 0.5) == 0
+    assert EconomyStats.percentile(sketch(*[5] * 10), 0.5) == 6  # all in [4, 8)
+    stats = sketch(*range(1, 1001))
+    assert EconomyStats.percentile(stats, 0.5) == 501
+    assert 512 <= EconomyStats.percentile(stats, 0.99) < 1024
+
+
+def test_gini():
+    assert EconomyStats.gini(sketch()) == 0.0
+    assert EconomyStats.gini(sketch(*[700] * 50)) == pytest.approx(0.0)
+    expected = 1 - (3 / 4 * (3 / 1027) + 1 / 4 * (2 * 3 / 1027 + 1024 / 1027))
+    assert EconomyStats.gini(sketch(1, 1, 1, 1024)) == pytest.approx(expected)
+    assert EconomyStats.gini(sketch(0, 0, 10)) == pytest.approx(0.0)  # only positive balances count
+
+
+def test_stats_count_saved_changes_once(ctx, monkeypatch):
+    cog = Economy(ctx.bot)
+    guild_id = ctx.guild.id
+    real_save = ECONOMY.save
+    conflicts = [True]
+
+    async def save(gid, changed=None):
+        if conflicts and conflicts.pop():
+            ECONOMY.invalidate(gid)  # what a lost race does
+            raise StaleWriteError("conflict")
+        await real_save(gid, changed)
+
+    asyncio.run(cog.add_balance(guild_id, 1, 300, source="admin"))
+    monkeypatch.setattr(ECONOMY, "save", save)
+    asyncio.run(cog.add_balance(guild_id, 2, 200, source="daily"))
+    monkeypatch.undo()
+
+    stats = ECONOMY_STATS.stats(guild_id)
+    assert stats["supply"] == 500
+    assert sum(stats["counts"]) == 2
+    (day,) = stats["days"].values()
+    assert day["minted"] == {"admin": 300, "daily": 200}
+
+
+def test_unsaved_changes_are_not_counted(ctx):
+    cog = Economy(ctx.bot)
+    guild_id = ctx.guild.id
+    asyncio.run(cog.add_balance(guild_id, 1, 300))
+    cog.apply(guild_id, cog.get_account(guild_id, 1), -100, "pending", "shop")
+    ECONOMY_STATS.store.invalidate(guild_id)
+    partition_path(guild_id, "economy_stats.json").unlink()
+    assert ECONOMY_STATS.stats(guild_id)["supply"] == 300  # seeded without the unsaved change
+    asyncio.run(cog.save(guild_id))
+    stats = ECONOMY_STATS.stats(guild_id)
+    assert stats["supply"] == 200
+    assert list(stats["days"].values())[0]["burned"] == {"shop": 100}
+
+
+def test_concurrent_transactions_survive_a_conflict(ctx, state_service):
+    cog = Economy(ctx.bot)
+    guild_id = ctx.guild.id
+
+    async def scenario():
+        ECONOMY.partition(guild_id)
+        other_shard = PartitionedStore("economy", register=False, record_type=Account)
+        await other_shard.update(guild_id, lambda data: data.setdefault("9", Account()).apply(40))
+        # The first save conflicts and drops the accounts both changes were made to
+        await asyncio.gather(cog.add_balance(guild_id, 1, 100), cog.add_balance(guild_id, 2, 50))
+
+    state_service(scenario)
+    saved = json.loads(partition_path(guild_id, "economy.json").read_text(encoding="utf-8"))
+    assert {uid: account["balance"] for uid, account in saved.items()} == {"9": 40, "1": 100, "2": 50}
+    assert ECONOMY_STATS.stats(guild_id)["supply"] == 190
+
+
+def test_legacy_daily_claim_is_moved_to_the_cooldowns_and_saved(ctx):
+    cog = Economy(ctx.bot)
+    guild_id, uid = ctx.guild.id, str(ctx.author.id)
+    path = partition_path(guild_id, "economy.json")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({uid: {"balance": 10, "last_daily": int(time.time()) - 3600}}), encoding="utf-8")
+
+    asyncio.run(cog.daily.callback(cog, ctx))
+    assert ctx.sent[-1][0].startswith("❌ You already claimed your daily reward")
+    assert "last_daily" not in json.loads(path.read_text(encoding="utf-8"))[uid]
+
+    ECONOMY.invalidate(guild_id)  # a restart: the old claim time must not come back
+    COOLDOWNS.store.invalidate(guild_id)
+    assert ECONOMY.partition(guild_id)[uid].last_daily is None
+    assert 0 < COOLDOWNS.remaining(guild_id, "daily", ctx.author.id) <= 23 * 3600
@@ -0,0 +1,80 @@
+import random
+from collections import Counter
+
+import pytest
+
+from cogs import giveaways
+from cogs.giveaways import FenwickSampler, draw, draw_weighted
+
+
+class FixedRNG:
+    """randrange returns the queued values in order."""
+
+    def __init__(self, *values):
+        self.values = list(values)
+
+    def randrange(self, *args):
+        return self.values.pop(0)
+
+
+@pytest.fixture
+def rng(monkeypatch):
+    seeded = random.Random(1234)
+    monkeypatch.setattr(giveaways, "RNG", seeded)
+    return seeded
+
+
+@pytest.mark.parametrize("weights", [[1], [3, 0, 2], [0, 0, 5, 1, 0, 7, 2], list(range(1, 18))])
+def test_fenwick_pick_maps_every_target_to_its_item(weights, monkeypatch):
+    # Target t must land on the item whose cumulative weight range contains t
+    expected = [i for i, w in enumerate(weights) for _ in range(w)]
+    sampler = FenwickSampler(weights)
+    monkeypatch.setattr(giveaways, "RNG", FixedRNG(*range(sum(weights))))
+    assert [sampler.pick() for _ in range(sum(weights))] == expected
+
+
+def test_fenwick_remove_takes_the_item_out_of_the_pool(monkeypatch):
+    sampler = FenwickSampler([2, 5, 1, 4])
+    sampler.remove(1)
+    assert sampler.total == 7
+    monkeypatch.setattr(giveaways, "RNG", FixedRNG(*range(7)))
+    assert [sampler.pick() for _ in range(7)] == [0, 0, 2, 3, 3, 3, 3]
+
+
+def test_fenwick_pick_is_none_once_empty():
+    assert FenwickSampler([]).pick() is None
+    assert FenwickSampler([0, 0]).pick() is None
+    sampler = FenwickSampler([1, 2])
+    sampler.remove(0)
+    sampler.remove(1)
+    assert sampler.pick() is None
+
+
+def test_fenwick_picks_in_proportion_to_weight(rng):
+    sampler = FenwickSampler([1, 3, 6])
+    counts = Counter(sampler.pick() for _ in range(20000))
+    assert counts[0] / 20000 == pytest.approx(0.1, abs=0.02)
+    assert counts[1] / 20000 == pytest.approx(0.3, abs=0.02)
+    assert counts[2] / 20000 == pytest.approx(0.6, abs=0.02)
+
+
+def test_draw_weighted_picks_distinct_eligible_winners(rng):
+    ids = list(range(100, 110))
+    winners = draw_weighted(ids, [1] * 10, 5, lambda uid: uid % 2 == 0)
+    assert len(winners) == 5 and len(set(winners)) == 5
+    assert all(uid % 2 == 0 for uid in winners)
+    assert sorted(draw_weighted(ids, [1, 0] * 5, 10, lambda uid: True)) == ids[::2]  # zero weight never wins
+
+
+def test_draw_picks_distinct_winners(rng):
+    ids = list(range(50))
+    winners = draw(ids, 10, lambda uid: True)
+    assert len(winners) == 10 and len(set(winners)) == 10
+    assert sorted(draw(ids, 100, lambda uid: True)) == ids
+    assert draw(ids, 5, lambda uid: False) == []
+    assert sorted(draw(ids, 50, lambda uid: uid < 3)) == [0, 1, 2]
+
+
+def test_draw_is_uniform(rng):
+    counts = Counter(uid for _ in range(5000) for uid in draw(list(range(10)), 2, lambda uid: True))
+    assert all(count / 10000 == pytest.approx(0.1, abs=0.015) for count in counts.values())
@@ -0,0 +1,39 @@
+import asyncio
+
+from benchmarks.fakes import FakeBot, FakeGuild, FakeTextChannel
+from cogs import storage
+from cogs.leveling import LEVEL_THRESHOLDS, Leveling
+from cogs.profiles import PROFILES, stats_table
+from cogs.storage import StaleWriteError
+
+
+def test_level_up_is_announced_once_after_a_failed_save(monkeypatch):
+    guild = FakeGuild()
+    channel = FakeTextChannel(guild, "general")
+    cog = Leveling(FakeBot())
+    table = stats_table(guild.id)
+    real_save = PROFILES.save
+    failures = [storage.UPDATE_ATTEMPTS]
+
+    async def save(guild_id, changed=None):
+        if failures[0]:
+            failures[0] -= 1
+            PROFILES.invalidate(guild_id)  # another shard keeps winning
+            raise StaleWriteError("conflict")
+        await real_save(guild_id, changed)
+    monkeypatch.setattr(PROFILES, "save", save)
+
+    cog.pending = {guild.id: {7: LEVEL_THRESHOLDS[2]}}  # enough XP for level 3
+    cog.channels = {(guild.id, 7): channel}
+    asyncio.run(cog.flush())
+    assert channel.sent == []
+    assert cog.pending == {guild.id: {7: LEVEL_THRESHOLDS[2]}}
+    assert len(table) == 0
+
+    asyncio.run(cog.flush())
+    assert [m.content for m in channel.sent] == ["⭐ <@7> reached **level 3**!"]
+    assert PROFILES.partition(guild.id)["7"].xp == LEVEL_THRESHOLDS[2]
+    assert stats_table(guild.id).top("level", 1) == [("7", 3)]
+
+    asyncio.run(cog.flush())
+    assert len(channel.sent) == 1
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import discord
+import pytest
+
+from cogs import outbox
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "test"
+
+
+class FlakyUser:
+    """Raises an HTTPException with the given statuses, then accepts the DM."""
+
+    id = 1
+
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+        self.attempts = 0
+
+    async def send(self, content, **kwargs):
+        self.attempts += 1
+        if self.statuses:
+            raise discord.HTTPException(FakeResponse(self.statuses.pop(0)), "error")
+
+
+@pytest.fixture
+def box(monkeypatch):
+    async def no_sleep(_):
+        pass
+    monkeypatch.setattr(outbox.asyncio, "sleep", no_sleep)
+    return outbox.Outbox(bot=None)
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retries_rate_limits_and_server_errors(box, status):
+    user = FlakyUser(status)
+    assert asyncio.run(box._deliver(user, None, "hi", {})) is True
+    assert user.attempts == 2
+
+
+@pytest.mark.parametrize("status", [400, 404])
+def test_other_client_errors_are_not_retried(box, status):
+    user = FlakyUser(status)
+    with pytest.raises(discord.HTTPException):
+        asyncio.run(box._deliver(user, None, "hi", {}))
+    assert user.attempts == 1
+
+
+def test_gives_up_after_max_attempts(box):
+    user = FlakyUser(*[500] * outbox.MAX_ATTEMPTS)
+    with pytest.raises(discord.HTTPException):
+        asyncio.run(box._deliver(user, None, "hi", {}))
+    assert user.attempts == outbox.MAX_ATTEMPTS
+
+
+def test_expired_closed_dm_entries_are_swept(box):
+    now = time.time()
+    box.closed_dms = {1: now - 1, 2: now - 1, 3: now + 3600}
+    box._last_sweep = now - outbox.CLOSED_DM_SWEEP_INTERVAL - 1
+    assert box.dms_closed(3)
+    assert box.closed_dms == {3: now + 3600}
@@ -0,0 +1,97 @@
+import asyncio
+
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeInteraction, FakeMessage, FakeTextChannel
+from cogs.polls import POLLS, RETRACTED, VOTE, PollTally, Polls, PollView, votes_path
+
+
+def test_vote_switch_and_withdraw(tmp_path):
+    tally = PollTally(tmp_path / "1.votes", 3)
+    assert tally.vote(10, 0) == 0
+    assert tally.vote(11, 0) == 0
+    assert tally.vote(10, 2) == 2      # switch
+    assert tally.vote(11, 0) is None   # same option again withdraws
+    assert tally.votes == {10: 2}
+    assert tally.counts == [0, 0, 1]
+    assert (tmp_path / "1.votes").stat().st_size == 4 * VOTE.size
+
+
+def test_replay_rebuilds_votes_and_counts(tmp_path):
+    path = tmp_path / "1.votes"
+    live = PollTally(path, 3)
+    for user_id, option in [(1, 0), (2, 1), (3, 1), (1, 1), (2, 1), (4, 2), (3, 0), (2, 0)]:
+        live.vote(user_id, option)
+    replayed = PollTally(path, 3)
+    assert replayed.votes == live.votes == {1: 1, 3: 0, 4: 2, 2: 0}
+    assert replayed.counts == live.counts == [2, 1, 1]
+
+
+def test_replay_ignores_a_torn_record_and_unknown_options(tmp_path):
+    path = tmp_path / "1.votes"
+    path.write_bytes(VOTE.pack(1, 0) + VOTE.pack(2, 4) + VOTE.pack(3, 1) + VOTE.pack(3, RETRACTED)
+                     + VOTE.pack(5, 1)[:5])  # crashed mid-append
+    tally = PollTally(path, 2)
+    assert tally.votes == {1: 0}
+    assert tally.counts == [1, 0]
+
+
+def test_close_freezes_the_replayed_counts():
+    cog = Polls(FakeBot())
+    record = {"channel_id": 1, "author_id": 1, "question": "Best biome?", "options": ["Plains", "Desert"],
+              "ends_at": None, "closed": False}
+    POLLS.partition(7)["99"] = record
+    path = votes_path(7, 99)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(VOTE.pack(1, 1) + VOTE.pack(2, 0) + VOTE.pack(3, 1))
+
+    closed = asyncio.run(cog.close(7, 99))
+    assert closed["closed"] and closed["counts"] == [1, 2] and closed["voters"] == 3
+    assert not path.exists()
+    assert asyncio.run(cog.close(7, 99)) is None
+
+
+def test_a_vote_during_close_is_refused(monkeypatch):
+    guild = FakeGuild()
+    channel = FakeTextChannel(guild)
+    cog = Polls(FakeBot())
+    POLLS.partition(guild.id)["99"] = {"channel_id": channel.id, "author_id": 1, "question": "Best mob?",
+                                       "options": ["Creeper", "Axolotl"], "ends_at": None, "closed": False}
+    message = FakeMessage(channel, guild.me)
+    message.id = 99
+    late = FakeInteraction(cog.bot, guild, guild.add_member("alex"), channel, message)
+    real_update = POLLS.update
+
+    async def update(guild_id, mutate):
+        await cog.vote(late, 1)  # clicked while the final counts are being saved
+        return await real_update(guild_id, mutate)
+    monkeypatch.setattr(POLLS, "update", update)
+
+    closed = asyncio.run(cog.close(guild.id, 99))
+    assert late.response.sent == [("❌ This poll is closed.", {"ephemeral": True})]
+    assert closed["counts"] == [0, 0] and closed["voters"] == 0
+    assert not votes_path(guild.id, 99).exists()
+    assert cog.closing == set() and cog.tallies == {}
+
+
+def test_buttons_are_added_after_the_poll_is_saved(monkeypatch):
+    guild = FakeGuild()
+    ctx = FakeContext(FakeBot(), guild, guild.add_member("steve"), FakeTextChannel(guild))
+    cog = Polls(ctx.bot)
+    sent = []
+    real_send = ctx.send
+
+    async def send(content=None, **kwargs):
+        sent.append(await real_send(content, **kwargs))
+        return sent[-1]
+    ctx.send = send
+    real_update = POLLS.update
+    seen = []
+
+    async def update(guild_id, mutate):
+        seen.append(sent[0].view)
+        return await real_update(guild_id, mutate)
+    monkeypatch.setattr(POLLS, "update", update)
+
+    asyncio.run(cog.poll.callback(cog, ctx, None, question="Best mob? | Creeper | Axolotl"))
+    assert seen == [None]
+    assert isinstance(sent[0].view, PollView)
+    assert POLLS.partition(guild.id)[str(sent[0].id)]["options"] == ["Creeper", "Axolotl"]
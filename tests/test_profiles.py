@@ -0,0 +1,27 @@
+import asyncio
+
+from cogs import profiles
+from cogs.profiles import PROFILES, STATS_TABLES, Profiles, stats_table
+
+
+def test_stats_table_is_released_with_its_partition():
+    cog = Profiles(None)
+    asyncio.run(cog.update_stat(3, 1, "kills", 5))
+    assert stats_table(3).top("kills", 1) == [("1", 5)]
+
+    PROFILES.evict_idle(now=10**12)
+    assert 3 not in PROFILES.loaded()
+    assert 3 not in STATS_TABLES  # nothing holds the evicted partition any more
+
+    asyncio.run(cog.update_stat(3, 2, "kills", 9))
+    assert stats_table(3).top("kills", 2) == [("2", 9), ("1", 5)]
+
+
+def test_sync_stats_ignores_a_table_of_a_dropped_partition():
+    cog = Profiles(None)
+    asyncio.run(cog.update_stat(4, 1, "deaths", 2))
+    stale = stats_table(4)
+    PROFILES._partitions.pop(4)  # reloaded without the hook, as a stand-in for any missed drop
+    asyncio.run(cog.update_stat(4, 1, "deaths", 1))
+    assert stale.column("deaths").tolist() == [2]
+    assert profiles.stats_table(4).column("deaths").tolist() == [3]
@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import pytest
+
+from cogs import storage
+from cogs.storage import PartitionedStore, StaleWriteError
+
+
+def two_workers():
+    # Two stores with the same name stand in for the same partition cached by two shards
+    return PartitionedStore("bank", register=False), PartitionedStore("bank", register=False)
+
+
+def test_save_from_a_stale_copy_is_rejected(state_service):
+    async def scenario():
+        a, b = two_workers()
+        a.partition(1)["alice"] = 10
+        b.partition(1)["bob"] = 20
+        await a.save(1)
+        with pytest.raises(StaleWriteError):
+            await b.save(1)
+        assert 1 not in b.loaded()  # dropped, so the next read sees a's write
+        assert b.partition(1) == {"alice": 10}
+    state_service(scenario)
+
+
+def test_update_reapplies_the_change_after_a_conflict(state_service):
+    async def scenario():
+        a, b = two_workers()
+        b.partition(1)
+        await a.update(1, lambda data: data.update(alice=10))
+        calls = []
+
+        def add_bob(data):
+            calls.append(dict(data))
+            data["bob"] = 20
+        await b.update(1, add_bob)
+        return calls
+    calls = state_service(scenario)
+    assert calls == [{}, {"alice": 10}]
+    path = storage.partition_path(1, "bank.json")
+    assert json.loads(path.read_text()) == {"alice": 10, "bob": 20}
+
+
+def test_concurrent_updates_survive_a_conflict(state_service):
+    async def scenario():
+        a, b = two_workers()
+        a.partition(1)
+        await b.update(1, lambda data: data.update(other=1))  # a's copy is now stale
+        calls = []
+
+        def add(key):
+            def mutate(data):
+                calls.append(key)
+                data[key] = True
+            return mutate
+        # Both change a's cached copy; the first save conflicts and drops it while the
+        # second is still waiting to save, so the second must re-apply too
+        await asyncio.gather(a.update(1, add("first")), a.update(1, add("second")))
+        return calls
+    calls = state_service(scenario)
+    assert calls == ["first", "second", "first", "second"]
+    path = storage.partition_path(1, "bank.json")
+    assert json.loads(path.read_text()) == {"other": 1, "first": True, "second": True}
+
+
+def test_successive_saves_from_one_worker_do_not_conflict(state_service):
+    async def scenario():
+        a, _ = two_workers()
+        for i in range(3):
+            a.partition(1)[f"k{i}"] = i
+            await a.save(1)
+        await asyncio.gather(*(a.update(1, lambda data, i=i: data.update({f"g{i}": i})) for i in range(5)))
+        return a.partition(1)
+    data = state_service(scenario)
+    assert len(data) == 8
+
+
+def test_update_gives_up_after_repeated_conflicts(state_service, monkeypatch):
+    async def scenario():
+        a, b = two_workers()
+
+        def lose_the_race(data):
+            # Another shard saves in between every read and write
+            b.partition(1)["n"] = b.partition(1).get("n", 0) + 1
+            asyncio.get_running_loop().create_task(b.save(1))
+            data["mine"] = True
+
+        async def racing_save(guild_id, changed=None):
+            await asyncio.sleep(0.05)
+            await PartitionedStore.save(a, guild_id, changed)
+        monkeypatch.setattr(a, "save", racing_save)
+        with pytest.raises(StaleWriteError):
+            await a.update(1, lose_the_race)
+    state_service(scenario)
+
+
+def test_local_mode_update_saves_to_disk():
+    store = PartitionedStore("local", register=False)
+    result = asyncio.run(store.update(5, lambda data: data.setdefault("n", 3)))
+    assert result == 3
+    assert json.loads(storage.partition_path(5, "local.json").read_text()) == {"n": 3}
+
+
+def test_drop_hooks_run_on_eviction_and_invalidation(monkeypatch):
+    store = PartitionedStore("hooked", register=False)
+    dropped = []
+    store.on_drop(dropped.append)
+    store.partition(1)
+    store.partition(2)
+    store.invalidate(1)
+    monkeypatch.setattr(storage.time, "monotonic", lambda: 10**9)
+    store.evict_idle()
+    assert dropped == [1, 2]
+    assert store.loaded() == []
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+
+from benchmarks.fakes import FakeBot, FakeContext, FakeGuild, FakeTextChannel
+from cogs import tickets
+
+
+@pytest.fixture
+def non_utc_host(monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("needs time.tzset")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_epoch_reads_naive_iso_as_utc(non_utc_host):
+    assert tickets._epoch("2024-01-01T00:00:00") == 1704067200
+    assert tickets._epoch("2024-01-01T00:00:00+00:00") == 1704067200
+    assert tickets._epoch(None) is None
+    assert tickets._epoch("not a date") is None
+
+
+def test_latency_is_measured_against_utc_now(non_utc_host):
+    info = {"type": "support", "user_id": 1, "created_at": datetime.utcnow().isoformat()}
+    asyncio.run(tickets.LIFECYCLE.record("claim", 42, 7, info, staff_id=9))
+    hist = tickets.LIFECYCLE.stats(42)["time_to_claim"]["by_type"]["support"]
+    assert hist["n"] == 1
+    assert hist["sum"] < 60
+
+
+def test_lifecycle_counts_into_the_partition_it_is_given(monkeypatch):
+    given = []
+
+    async def update(guild_id, mutate):
+        given.append({})  # a fresh read, as on a retry after a conflicting write
+        return mutate(given[-1])
+    monkeypatch.setattr(tickets.LIFECYCLE.store, "update", update)
+
+    asyncio.run(tickets.LIFECYCLE.record("open", 42, 7, {"type": "support", "user_id": 1}))
+    assert given[0]["opened"] == {"support": 1}
+    assert tickets.LIFECYCLE.stats(42)["opened"] == {}
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.name = f"ticket-{channel_id}"
+
+
+def test_history_is_newest_first_and_capped_per_user():
+    for i in range(tickets.HISTORY_PER_USER + 5):
+        asyncio.run(tickets.HISTORY.archive(42, FakeChannel(i), {"user_id": 1, "type": "support"}))
+    entries = tickets.HISTORY.store.partition(42)["1"]["support"]
+    assert len(entries) == tickets.HISTORY_PER_USER
+    assert entries[0]["channel_id"] == 5
+
+    recent = tickets.HISTORY.recent(42, 1, limit=3)
+    assert [e["channel_id"] for e in recent] == [54, 53, 52]
+    assert tickets.HISTORY.recent(42, 1, limit=0) == []
+    assert tickets.HISTORY.recent(42, 2) == []
+
+
+def test_history_is_indexed_by_type():
+    for i, kind in enumerate(["support", "appeal", "support", "store", "appeal"]):
+        asyncio.run(tickets.HISTORY.archive(42, FakeChannel(i), {"user_id": 1, "type": kind}))
+        time.sleep(0.001)
+    assert [e["channel_id"] for e in tickets.HISTORY.recent(42, 1, ticket_type="appeal")] == [4, 1]
+    assert tickets.HISTORY.recent(42, 1, ticket_type="bug") == []
+    assert [e["channel_id"] for e in tickets.HISTORY.recent(42, 1, limit=4)] == [4, 3, 2, 1]
+
+
+def test_history_reads_entries_archived_before_the_type_index():
+    old = [{"channel_id": i, "type": kind, "closed_at": f"2024-01-0{i + 1}T00:00:00"}
+           for i, kind in enumerate(["support", "appeal", "support"])]
+    tickets.HISTORY.store.partition(42)["1"] = old
+    assert [e["channel_id"] for e in tickets.HISTORY.recent(42, 1)] == [2, 1, 0]
+    asyncio.run(tickets.HISTORY.archive(42, FakeChannel(3), {"user_id": 1, "type": "support"}))
+    assert [e["channel_id"] for e in tickets.HISTORY.recent(42, 1, ticket_type="support")] == [3, 2, 0]
+
+
+def test_closeticket_archives_a_transcript_pointer(monkeypatch, tmp_path):
+    monkeypatch.setattr(tickets, "BASE", tmp_path)
+    guild = FakeGuild()
+    channel = FakeTextChannel(guild, "ticket-steve")
+    guild.channels.append(channel)
+    ctx = FakeContext(FakeBot(), guild, guild.me, channel)
+    tickets.TICKETS.partition(guild.id)[str(channel.id)] = {"user_id": 5, "type": "support",
+                                                            "created_at": datetime.utcnow().isoformat()}
+    cog = tickets.Tickets(ctx.bot)
+    asyncio.run(cog.closeticket.callback(cog, ctx))
+
+    (entry,) = tickets.HISTORY.recent(guild.id, 5)
+    assert entry["transcript"].startswith(f"transcript_{guild.id}_{channel.id}_")
+    assert (tmp_path / "transcripts" / entry["transcript"]).exists()
@@ -0,0 +1,83 @@
+import json
+import os
+import random
+import time
+
+import pytest
+
+from cogs import trivia
+from cogs.trivia import NoRepeatSampler, TriviaBank, Trivia
+
+
+def questions(n):
+    return "".join(json.dumps({"q": f"Q{i}?", "options": ["a", "b"], "answer": "a"}) + "\n" for i in range(n))
+
+
+@pytest.fixture
+def bank(tmp_path):
+    path = tmp_path / "trivia.jsonl"
+    path.write_text(questions(5) + "\n" + "not json\n", encoding="utf-8")
+    bank = TriviaBank(path)
+    bank.refresh(force=True)
+    yield bank
+    bank.close()
+
+
+@pytest.mark.parametrize("n", [1, 2, 7, 100])
+def test_no_repeat_sampler_cycles_through_every_index(n):
+    random.seed(n)
+    sampler = NoRepeatSampler(n)
+    for _ in range(3):
+        assert sorted(sampler.next() for _ in range(n)) == list(range(n))
+
+
+def test_no_repeat_sampler_keeps_only_the_swaps_it_made():
+    sampler = NoRepeatSampler(10**9)
+    picks = [sampler.next() for _ in range(1000)]
+    assert len(set(picks)) == 1000
+    assert len(sampler._swaps) <= 1000
+
+
+def test_no_repeat_sampler_is_uniform():
+    random.seed(7)
+    firsts = [NoRepeatSampler(4).next() for _ in range(8000)]
+    assert all(firsts.count(i) / 8000 == pytest.approx(0.25, abs=0.02) for i in range(4))
+
+
+def test_bank_indexes_non_blank_lines(bank):
+    assert len(bank.offsets) == 6
+    assert [bank.question(i)["q"] for i in range(5)] == [f"Q{i}?" for i in range(5)]
+    assert bank.question(5) is None  # malformed line
+
+
+def test_bank_survives_the_file_being_truncated_in_place(bank):
+    with open(bank.path, "r+b") as f:
+        f.truncate(0)
+    assert bank.question(4)["q"] == "Q4?"  # still reading the copy taken at load time
+    os.utime(bank.path, ns=(1, 1))
+    bank.refresh(force=True)
+    assert len(bank.offsets) == 0
+
+
+def test_bank_reloads_with_a_new_version(bank):
+    version = bank.version
+    bank.path.write_text(questions(2), encoding="utf-8")
+    bank.refresh(force=True)
+    assert bank.version == version + 1
+    assert len(bank.offsets) == 2
+
+
+def test_samplers_are_pruned_after_a_reload_or_a_long_idle(bank, monkeypatch):
+    monkeypatch.setattr(trivia, "BANK", bank)
+    cog = Trivia(None)
+    assert cog.next_question(1) and cog.next_question(2) and cog.next_question(3)
+    version, sampler, _ = cog.samplers[2]
+    cog.samplers[2] = (version, sampler, time.monotonic() - trivia.SAMPLER_IDLE_SECONDS - 1)
+    cog.prune_samplers(1)
+    assert sorted(cog.samplers) == [1, 3]
+
+    bank.refresh(force=True)
+    assert cog.next_question(1)
+    cog.prune_samplers(1)
+    assert list(cog.samplers) == [1]
+    assert cog.samplers[1][0] == bank.version